@@ -7,7 +7,8 @@
 # Licensed under the terms of the GNU General Public License.
 
 # ---- Standard library imports
-from time import clock
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
 import csv
 import os
 import os.path as osp
@@ -22,7 +23,7 @@ from PyQt5.QtCore import pyqtSignal as QSignal
 from PyQt5.QtWidgets import (
     QGridLayout, QComboBox, QTextEdit, QSizePolicy, QPushButton, QLabel,
     QTabWidget, QApplication, QWidget, QMainWindow, QToolBar, QFrame,
-    QMessageBox)
+    QMessageBox, QDoubleSpinBox)
 
 import matplotlib as mpl
 import matplotlib.dates as mdates
@@ -42,6 +43,7 @@ from gwhat.gwrecharge.gwrecharge_gui import RechgEvalWidget
 from gwhat.config.gui import FRAME_SYLE
 from gwhat.utils import icons
 from gwhat.utils.icons import QToolButtonNormal, get_iconsize
+from gwhat.utils.math import minmax_downsample
 from gwhat.widgets.buttons import ToolBarWidget
 from gwhat.brf_mod import BRFManager
 from gwhat.widgets.buttons import OnOffToolButton
@@ -98,9 +100,16 @@ class WLCalc(QWidget, SaveFileMixin):
         self.peak_indx = np.array([]).astype(int)
         self.peak_memory = [np.array([]).astype(int)]
 
+        # The display coordinates of the peaks are cached and updated only
+        # when the peaks or the limits of the graph change.
+        self._peaks_display_index = None
+
         # Selected water level data.
         self.wl_selected_i = []
 
+        # Water level measured manually in the well.
+        self._wlmeas = (np.array([]), np.array([]))
+
         # Soil Profiles :
         self.soilFilename = []
         self.SOILPROFIL = SoilProfil()
@@ -142,6 +151,8 @@ class WLCalc(QWidget, SaveFileMixin):
         ax0 = self.fig.add_axes([0, 0, 1, 1], zorder=100)
         ax0.patch.set_visible(False)
         ax0.invert_yaxis()
+        ax0.callbacks.connect('xlim_changed', self._on_xlim_changed)
+        ax0.callbacks.connect('ylim_changed', self._on_ylim_changed)
 
         # Setup the Precipitation axe.
         ax1 = ax0.twinx()
@@ -421,6 +432,33 @@ class WLCalc(QWidget, SaveFileMixin):
         self.btn_save_mrc.setToolTip('Save calculated MRC to file.')
         self.btn_save_mrc.clicked.connect(self.save_mrc_tofile)
 
+        self.btn_findpeak = QToolButtonNormal(icons.get_icon('findPeak'))
+        self.btn_findpeak.setToolTip(
+            "<p>Detect automatically the periods over which the water "
+            "level recedes.</p>")
+        self.btn_findpeak.clicked.connect(self.find_peak)
+
+        # Setup the options to detect automatically the recession periods.
+        self.MRC_min_duration = QDoubleSpinBox()
+        self.MRC_min_duration.setDecimals(1)
+        self.MRC_min_duration.setRange(0, 9999)
+        self.MRC_min_duration.setSingleStep(1)
+        self.MRC_min_duration.setValue(5)
+        self.MRC_min_duration.setSuffix(' days')
+        self.MRC_min_duration.setToolTip(
+            "<p>Minimum duration of the recession periods that are "
+            "detected automatically.</p>")
+
+        self.MRC_min_amplitude = QDoubleSpinBox()
+        self.MRC_min_amplitude.setDecimals(3)
+        self.MRC_min_amplitude.setRange(0, 99)
+        self.MRC_min_amplitude.setSingleStep(0.01)
+        self.MRC_min_amplitude.setValue(0.05)
+        self.MRC_min_amplitude.setSuffix(' m')
+        self.MRC_min_amplitude.setToolTip(
+            "<p>Minimum water level decline over the recession periods "
+            "that are detected automatically.</p>")
+
         self.btn_MRCalc = QPushButton('Compute MRC')
         self.btn_MRCalc.clicked.connect(self.btn_MRCalc_isClicked)
         self.btn_MRCalc.setToolTip('<p>Calculate the Master Recession Curve'
@@ -428,7 +466,7 @@ class WLCalc(QWidget, SaveFileMixin):
 
         mrc_tb = ToolBarWidget()
         for btn in [self.btn_undo, self.btn_clearPeak, self.btn_addpeak,
-                    self.btn_delpeak, self.btn_save_mrc]:
+                    self.btn_delpeak, self.btn_findpeak, self.btn_save_mrc]:
             mrc_tb.addWidget(btn)
 
         # Setup the MRC Layout.
@@ -439,6 +477,12 @@ class WLCalc(QWidget, SaveFileMixin):
         mrc_lay.addWidget(QLabel('MRC Type :'), row, 0)
         mrc_lay.addWidget(self.MRC_type, row, 1)
         row += 1
+        mrc_lay.addWidget(QLabel('Min. duration :'), row, 0)
+        mrc_lay.addWidget(self.MRC_min_duration, row, 1)
+        row += 1
+        mrc_lay.addWidget(QLabel('Min. amplitude :'), row, 0)
+        mrc_lay.addWidget(self.MRC_min_amplitude, row, 1)
+        row += 1
         mrc_lay.addWidget(self.MRC_results, row, 0, 1, 3)
         row += 1
         mrc_lay.addWidget(mrc_tb, row, 0, 1, 3)
@@ -528,6 +572,8 @@ class WLCalc(QWidget, SaveFileMixin):
     def set_wldset(self, wldset):
         """Set the namespace for the water level dataset."""
         self._wldset = wldset
+        self._wlmeas = (np.array([]), np.array([]))
+        self._peaks_display_index = None
         self.rechg_eval_widget.set_wldset(wldset)
         self.mrc_eval_widget.setEnabled(self.wldset is not None)
 
@@ -703,23 +749,18 @@ class WLCalc(QWidget, SaveFileMixin):
 
     # ---- Peaks handlers
     def find_peak(self):
-
-        n_j, n_add = local_extrema(self.water_lvl, 4 * 5)
-
-        # Removing first and last point if necessary to always start with a
-        # maximum and end with a minimum.
-
-        # WARNING: y axis is inverted. Consequently, the logic needs to be
-        #          inverted also
-
-        if n_j[0] > 0:
-            n_j = np.delete(n_j, 0)
-
-        if n_j[-1] < 0:
-            n_j = np.delete(n_j, -1)
-
-        self.peak_indx = np.abs(n_j).astype(int)
+        """
+        Detect automatically the periods over which the water level recedes
+        and add the corresponding extremums to the graph.
+        """
+        if self.wldset is None:
+            return
+        self.peak_indx = find_mrc_recession_periods(
+            self.time, self.water_lvl,
+            min_duration=self.MRC_min_duration.value(),
+            min_amplitude=self.MRC_min_amplitude.value())
         self.peak_memory.append(self.peak_indx)
+        self.btn_show_mrc.setValue(True)
         self.draw_mrc()
 
     def btn_addpeak_isclicked(self):
@@ -875,11 +916,12 @@ class WLCalc(QWidget, SaveFileMixin):
     def _update_edit_toolbar_state(self):
         """Update the state of the edit toolbar."""
         buttons = [self.btn_commit_changes,
-                   self.btn_clear_changes,
-                   self.btn_undo_changes]
+                   self.btn_clear_changes]
         for btn in buttons:
             btn.setEnabled(False if self.wldset is None else
                            self.wldset.has_uncommited_changes)
+        self.btn_undo_changes.setEnabled(
+            False if self.wldset is None else self.wldset.can_undo)
 
     # ---- Drawing methods
     def setup_hydrograph(self):
@@ -948,6 +990,8 @@ class WLCalc(QWidget, SaveFileMixin):
 
         for axe in self.fig.axes:
             axe.set_position([x0, y0, w, h])
+        self._peaks_display_index = None
+        self._downsample_wl_plt()
         self.draw()
 
     def setup_xticklabels_format(self):
@@ -1138,11 +1182,10 @@ class WLCalc(QWidget, SaveFileMixin):
     def draw_meas_wl(self):
         """Draw the water level measured manually in the well."""
         if self.wldset is not None and self.btn_show_meas_wl.value():
-            time_wl_meas, wl_meas = self.wldset.get_wlmeas()
-            if len(wl_meas) > 0:
+            self._wlmeas = self.wldset.get_wlmeas()
+            if len(self._wlmeas[1]) > 0:
                 self._meas_wl_plt.set_visible(True)
-                self._meas_wl_plt.set_data(
-                    time_wl_meas + self.dt4xls2mpl * self.dformat, wl_meas)
+                self._downsample_wl_plt()
             else:
                 self._meas_wl_plt.set_visible(False)
         else:
@@ -1190,9 +1233,9 @@ class WLCalc(QWidget, SaveFileMixin):
             ax.set_visible(True)
 
             time = self.wxdset.get_xldates() + self.dt4xls2mpl * self.dformat
-            ptot = self.wxdset.data['Ptot'].values
-            rain = self.wxdset.data['Rain'].values
-            etp = self.wxdset.data['PET'].values
+            ptot = self.wxdset['Ptot'].values
+            rain = self.wxdset['Rain'].values
+            etp = self.wxdset['PET'].values
 
             # Calculate the bins
 
@@ -1260,14 +1303,85 @@ class WLCalc(QWidget, SaveFileMixin):
     def _draw_obs_wl(self, draw=True):
         """Draw the observed water level data on the graph."""
         self.clear_selected_wl(draw=False)
-        if self.wldset is not None:
-            self._obs_wl_plt.set_data(
-                self.time + (self.dt4xls2mpl * self.dformat),
-                self.water_lvl)
+        self._downsample_wl_plt()
         self._obs_wl_plt.set_visible(self.wldset is not None)
         if draw:
             self.draw()
 
+    def _downsample_wl_plt(self):
+        """
+        Update the data of the observed and manually measured water level
+        plots, so that only the points that are required to render
+        faithfully the data at the current x-axis limits and figure size
+        are drawn.
+
+        Note that the selection tools always work with the full-resolution
+        water level data.
+        """
+        if self.wldset is None:
+            return
+        ax0 = self.fig.axes[0]
+        xmin, xmax = ax0.get_xlim()
+        npixels = ax0.bbox.width
+
+        time = self.time + (self.dt4xls2mpl * self.dformat)
+        indexes = minmax_downsample(
+            time, self.water_lvl, xmin, xmax, npixels)
+        self._obs_wl_plt.set_data(time[indexes], self.water_lvl[indexes])
+
+        time_wl_meas, wl_meas = self._wlmeas
+        time_wl_meas = time_wl_meas + (self.dt4xls2mpl * self.dformat)
+        indexes = minmax_downsample(
+            time_wl_meas, wl_meas, xmin, xmax, npixels)
+        self._meas_wl_plt.set_data(
+            time_wl_meas[indexes], wl_meas[indexes])
+
+    def _on_xlim_changed(self, ax):
+        """Handle when the x-axis limits of the graph changed."""
+        self._peaks_display_index = None
+        self._downsample_wl_plt()
+
+    def _on_ylim_changed(self, ax):
+        """Handle when the y-axis limits of the graph changed."""
+        self._peaks_display_index = None
+
+    def _get_peaks_display_index(self):
+        """
+        Return the display coordinates of the peaks sorted along the x-axis
+        and the positions in peak_indx of the sorted peaks.
+        """
+        index = self._peaks_display_index
+        if (index is None or index[0] is not self.peak_indx or
+                index[1] != self.dformat):
+            xpeak = self.time[self.peak_indx] + self.dt4xls2mpl * self.dformat
+            ypeak = self.water_lvl[self.peak_indx]
+            xyt = self.fig.axes[0].transData.transform(
+                np.column_stack((xpeak, ypeak)))
+            order = np.argsort(xyt[:, 0], kind='mergesort')
+            index = (self.peak_indx, self.dformat, xyt[order], order)
+            self._peaks_display_index = index
+        return index[2], index[3]
+
+    def _find_nearest_peak(self, x, y, radius=15):
+        """
+        Return the position in peak_indx of the peak that is the nearest
+        to the x and y display coordinates, or None if no peak is found
+        within the specified radius in pixels.
+        """
+        if len(self.peak_indx) == 0:
+            return None
+        xyt, order = self._get_peaks_display_index()
+
+        # Only the peaks that are within the radius along the x-axis
+        # need to be checked.
+        i0 = np.searchsorted(xyt[:, 0], x - radius, side='left')
+        i1 = np.searchsorted(xyt[:, 0], x + radius, side='right')
+        if i0 == i1:
+            return None
+        d = np.hypot(xyt[i0:i1, 0] - x, xyt[i0:i1, 1] - y)
+        i = np.argmin(d)
+        return order[i0 + i] if d[i] < radius else None
+
     def _draw_mrc_wl(self):
         """Draw the water levels that were predicted with the MRC."""
         if (self.wldset is not None and self.btn_show_mrc.value() and
@@ -1368,12 +1482,15 @@ class WLCalc(QWidget, SaveFileMixin):
             x_rel, y_rel = xy_release
             x_rel = x_rel - (self.dt4xls2mpl * self.dformat)
 
-            self.wl_selected_i += np.where(
-                (self.time >= min(x_click, x_rel)) &
-                (self.time <= max(x_click, x_rel)) &
-                (self.water_lvl >= min(y_click, y_rel)) &
-                (self.water_lvl <= max(y_click, y_rel))
-                )[0].tolist()
+            # Only the data that are within the time range of the selection
+            # need to be checked, since the time is sorted.
+            i0 = np.searchsorted(self.time, min(x_click, x_rel), 'left')
+            i1 = np.searchsorted(self.time, max(x_click, x_rel), 'right')
+            water_lvl = self.water_lvl[i0:i1]
+            self.wl_selected_i += (i0 + np.where(
+                (water_lvl >= min(y_click, y_rel)) &
+                (water_lvl <= max(y_click, y_rel))
+                )[0]).tolist()
             self.draw_select_wl()
 
     def on_mouse_move(self, event):
@@ -1418,24 +1535,13 @@ class WLCalc(QWidget, SaveFileMixin):
             # For deleting peak in the graph. Will put a cross on top of the
             # peak to delete if some proximity conditions are met.
 
-            x = event.x
-            y = event.y
-
-            xpeak = self.time[self.peak_indx] + self.dt4xls2mpl * self.dformat
-            ypeak = self.water_lvl[self.peak_indx]
-
-            xt = np.empty(len(xpeak))
-            yt = np.empty(len(ypeak))
-
-            for i, (xp, yp) in enumerate(zip(xpeak, ypeak)):
-                xt[i], yt[i] = ax0.transData.transform((xp, yp))
-
-            d = ((xt - x)**2 + (yt - y)**2)**0.5
-            if np.min(d) < 15:
+            indx = self._find_nearest_peak(event.x, event.y)
+            if indx is not None:
                 # Put the cross over the nearest peak.
-                indx = np.argmin(d)
-                self.xcross.set_xdata(xpeak[indx])
-                self.xcross.set_ydata(ypeak[indx])
+                peak = self.peak_indx[indx]
+                self.xcross.set_xdata(
+                    self.time[peak] + self.dt4xls2mpl * self.dformat)
+                self.xcross.set_ydata(self.water_lvl[peak])
                 self.xcross.set_visible(True)
             else:
                 self.xcross.set_visible(False)
@@ -1486,33 +1592,12 @@ class WLCalc(QWidget, SaveFileMixin):
             return
 
         if self.btn_delpeak.value():
-            if len(self.peak_indx) == 0:
-                return
-
-            xt = np.empty(len(self.peak_indx))
-            yt = np.empty(len(self.peak_indx))
-            xpeak = self.time[self.peak_indx] + self.dt4xls2mpl * self.dformat
-            ypeak = self.water_lvl[self.peak_indx]
-
-            ax = self.fig.axes[0]
-            for i in range(len(self.peak_indx)):
-                xt[i], yt[i] = ax.transData.transform((xpeak[i], ypeak[i]))
-
-            r = ((xt - x)**2 + (yt - y)**2)**0.5
-            if np.min(r) < 15:
-                indx = np.argmin(r)
-
-                # Update the plot :
-                self.xcross.set_xdata(xpeak[indx])
-                self.xcross.set_ydata(ypeak[indx])
-
+            indx = self._find_nearest_peak(x, y)
+            if indx is not None:
                 # Remove peak from peak index sequence :
                 self.peak_indx = np.delete(self.peak_indx, indx)
                 self.peak_memory.append(self.peak_indx)
 
-                xpeak = np.delete(xpeak, indx)
-                ypeak = np.delete(ypeak, indx)
-
                 # hide the cross outside of the plotting area :
                 self.xcross.set_visible(False)
                 self.draw_mrc()
@@ -1524,10 +1609,12 @@ class WLCalc(QWidget, SaveFileMixin):
             # http://matplotlib.org/examples/pylab_examples/cursor_demo.html
 
             x = self.time + self.dt4xls2mpl * self.dformat
-            y = self.water_lvl
 
-            d = np.abs(xclic - x)
-            indx = np.argmin(d)
+            # Find the nearest data point in time with a binary search.
+            indx = np.searchsorted(x, xclic)
+            if indx == len(x) or (
+                    indx > 0 and xclic - x[indx - 1] <= x[indx] - xclic):
+                indx -= 1
 
             if len(self.peak_indx) > 0:
                 if indx in self.peak_indx:
@@ -1691,7 +1778,7 @@ def local_extrema(x, Deltan):
 
         elif flagante == -1:  # ANTERIOR extremum is an MINIMUM
 
-            tminante = np.abs(n_j[-1])
+            tminante = int(np.abs(n_j[-1]))
             xminante = x[tminante]
 
             if flagmax == 1:  # CURRENT extremum is a MAXIMUM
@@ -1741,7 +1828,7 @@ def local_extrema(x, Deltan):
 
         else:  # ANTERIOR extremum is a MAXIMUM
 
-            tmaxante = np.abs(n_j[-1])
+            tmaxante = int(np.abs(n_j[-1]))
             xmaxante = x[tmaxante]
 
             if flagmin == 1:  # CURRENT extremum is a MINIMUM
@@ -1778,7 +1865,7 @@ def local_extrema(x, Deltan):
                 flagante = -1
 
                 xmin = np.min(x[tmaxante:nc+1])
-                nmin = np.where(x[tmaxante:nc+1] == xmin)[0]
+                nmin = np.where(x[tmaxante:nc+1] == xmin)[0][0]
                 nmin += tmaxante
 
                 n_j = np.append(n_j, -np.floor((n1[nmin] + n2[nmin]) / 2.))
@@ -1824,10 +1911,67 @@ def local_extrema(x, Deltan):
     return n_j, kadd
 
 
+def find_mrc_recession_periods(t, h, deltan=20, min_duration=0,
+                               min_amplitude=0):
+    """
+    Detect automatically the periods over which the water level recedes
+    from the local extrema of the water level time series.
+
+    INPUTS
+    ------
+    t : time in days
+    h : water level time series in mbgs
+    deltan : time scale, in number of readings, of the local extrema
+    min_duration : minimum duration, in days, of the recession periods
+    min_amplitude : minimum water level decline, in m, of the recession
+                    periods
+
+    OUTPUTS
+    -------
+    ipeak : sequence of indices where the maxima and minima delimiting the
+            recession periods are located in h, in the same format as
+            expected by mrc_calc.
+    """
+    t = np.asarray(t, dtype=float)
+    h = np.asarray(h, dtype=float)
+
+    # The local extrema are searched on the valid data only and are then
+    # mapped back to the indexes of the original time series.
+    valid = np.where(~np.isnan(h))[0]
+    if len(valid) < 2:
+        return np.array([]).astype(int)
+
+    n_j, n_add = local_extrema(h[valid], deltan)
+    n_j = np.asarray(n_j)
+
+    # Removing first and last point if necessary to always start with a
+    # maximum and end with a minimum.
+
+    # WARNING: y axis is inverted. Consequently, the logic needs to be
+    #          inverted also
+    if len(n_j) and n_j[0] > 0:
+        n_j = n_j[1:]
+    if len(n_j) and n_j[-1] < 0:
+        n_j = n_j[:-1]
+    if len(n_j) < 2:
+        return np.array([]).astype(int)
+
+    ipeak = valid[np.abs(n_j).astype(int)]
+    istart = ipeak[:-1:2]
+    iend = ipeak[1::2]
+
+    # Keep only the recession periods that are long and deep enough.
+    dh = h[iend] - h[istart]
+    dt = t[iend] - t[istart]
+    keep = (dh > 0) & (dh >= min_amplitude) & (dt >= min_duration)
+
+    return np.vstack((istart[keep], iend[keep])).T.flatten().astype(int)
+
+
 # =============================================================================
 
 
-def mrc_calc(t, h, ipeak, MRCTYPE=1):
+def mrc_calc(t, h, ipeak, MRCTYPE=1, verbose=True):
     """
     Calculate the equation parameters of the Master Recession Curve (MRC) of
     the aquifer from the water level time series using a modified Gauss-Newton
@@ -1843,6 +1987,7 @@ def mrc_calc(t, h, ipeak, MRCTYPE=1):
              MODE = 0 -> linear (dh/dt = b)
              MODE = 1 -> exponential (dh/dt = -a*h + b)
 
+    verbose: whether to print the progress of the optimization
     """
 
     A, B, hp, RMSE = None, None, None, None
@@ -1864,10 +2009,11 @@ def mrc_calc(t, h, ipeak, MRCTYPE=1):
 
     # ---- Optimization
 
-    print('\n---- MRC calculation started ----\n')
-    print('MRCTYPE = %s' % (['Linear', 'Exponential'][MRCTYPE]))
+    if verbose:
+        print('\n---- MRC calculation started ----\n')
+        print('MRCTYPE = %s' % (['Linear', 'Exponential'][MRCTYPE]))
 
-    tstart = clock()
+    tstart = perf_counter()
 
     # If MRCTYPE is 0, then the parameter A is kept to a value of 0 throughout
     # the entire optimization process and only paramter B is optimized.
@@ -1883,7 +2029,8 @@ def mrc_calc(t, h, ipeak, MRCTYPE=1):
     # indexes where there is a valid data inside a recession period
 
     RMSE = np.sqrt(np.mean((h[tindx]-hp[tindx])**2))
-    print('A = %0.3f ; B= %0.3f; RMSE = %f' % (A, B, RMSE))
+    if verbose:
+        print('A = %0.3f ; B= %0.3f; RMSE = %f' % (A, B, RMSE))
 
     # NP: number of parameters
     if MRCTYPE == 0:
@@ -1994,9 +2141,10 @@ def mrc_calc(t, h, ipeak, MRCTYPE=1):
         if tol < tolmax:
             break
 
-    tend = clock()
-    print('TIME = %0.3f sec' % (tend-tstart))
-    print('\n---- FIN ----\n')
+    tend = perf_counter()
+    if verbose:
+        print('TIME = %0.3f sec' % (tend-tstart))
+        print('\n---- FIN ----\n')
 
     return A, B, hp, RMSE
 
@@ -2012,25 +2160,163 @@ def calc_synth_hydrograph(A, B, h, dt, ipeak):
 
     # Time indexes delimiting periods where water level recedes :
 
-    maxpeak = ipeak[:-1:2]
-    minpeak = ipeak[1::2]
-    nsegmnt = len(minpeak)
+    maxpeak = np.asarray(ipeak[:-1:2]).astype(int)
+    minpeak = np.asarray(ipeak[1::2]).astype(int)
+    nsteps = minpeak - maxpeak
+
+    # All the recession periods are computed simultaneously, so that the
+    # number of iterations depends on the duration of the longest
+    # period only.
 
     hp = np.ones(len(h)) * np.nan
-    for i in range(nsegmnt):
-        hp[maxpeak[i]] = h[maxpeak[i]]
-        for j in range(minpeak[i] - maxpeak[i]):
-            imax = maxpeak[i]
+    hp[maxpeak] = h[maxpeak]
+    for j in range(np.max(nsteps) if len(nsteps) else 0):
+        i = maxpeak[nsteps > j] + j
 
-            LUMP1 = (1 - A*dt[imax+j]/2)
-            LUMP2 = B*dt[imax+j]
-            LUMP3 = (1 + A*dt[imax+j]/2)**-1
+        LUMP1 = (1 - A*dt[i]/2)
+        LUMP2 = B*dt[i]
+        LUMP3 = (1 + A*dt[i]/2)**-1
 
-            hp[imax+j+1] = (LUMP1 * hp[imax+j] + LUMP2) * LUMP3
+        hp[i+1] = (LUMP1 * hp[i] + LUMP2) * LUMP3
 
     return hp
 
 
+def calc_auto_mrc(t, h, MRCTYPE=1, deltan=20, min_duration=0,
+                  min_amplitude=0):
+    """
+    Detect automatically the recession periods of the water level time
+    series and compute the corresponding Master Recession Curve (MRC).
+
+    Return the sequence of indices delimiting the recession periods, as well
+    as the results returned by mrc_calc.
+    """
+    ipeak = find_mrc_recession_periods(
+        t, h, deltan, min_duration, min_amplitude)
+    A, B, hp, RMSE = mrc_calc(t, h, ipeak, MRCTYPE)
+    return ipeak, A, B, hp, RMSE
+
+
+def _calc_mrc_bootstrap_samples(segments, resamples, MRCTYPE):
+    """
+    Compute the MRC parameters for each set of resampled recession periods.
+
+    The time series used for each fit is built by concatenating the
+    resampled recession periods one after the other.
+    """
+    A_samples = np.ones(len(resamples)) * np.nan
+    B_samples = np.ones(len(resamples)) * np.nan
+    for k, indexes in enumerate(resamples):
+        t = np.hstack([segments[i][0] for i in indexes])
+        h = np.hstack([segments[i][1] for i in indexes])
+        iend = np.cumsum([len(segments[i][0]) for i in indexes]) - 1
+        istart = np.hstack(([0], iend[:-1] + 1))
+        ipeak = np.vstack((istart, iend)).T.flatten()
+        A, B, hp, RMSE = mrc_calc(t, h, ipeak, MRCTYPE, verbose=False)
+        if A is not None:
+            A_samples[k], B_samples[k] = A, B
+    return A_samples, B_samples
+
+
+def mrc_bootstrap(t, h, ipeak, MRCTYPE=1, nboot=1000, confidence=0.95,
+                  seed=None, max_workers=None):
+    """
+    Estimate the uncertainty of the MRC parameters with a bootstrap.
+
+    The recession periods delimited by the "ipeak" pointers are resampled
+    with replacement "nboot" times and the MRC parameters are computed for
+    each resample in parallel in separate processes.
+
+    Return the A and B parameters computed for each resample and the
+    confidence intervals of A and B as [[Amin, Amax], [Bmin, Bmax]].
+    """
+    t = np.asarray(t, dtype=float)
+    h = np.asarray(h, dtype=float)
+    ipeak = np.sort(ipeak).astype(int)
+    segments = [(t[i:j+1], h[i:j+1]) for
+                i, j in zip(ipeak[:-1:2], ipeak[1::2])]
+    if len(segments) == 0:
+        print('No extremum selected')
+        return None, None, None
+
+    print('Computing the MRC for {} bootstrap resamples...'.format(nboot))
+    tstart = perf_counter()
+    resamples = np.random.RandomState(seed).randint(
+        len(segments), size=(nboot, len(segments)))
+    nchunks = min(nboot, 4 * (max_workers or os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers) as executor:
+        futures = [executor.submit(_calc_mrc_bootstrap_samples,
+                                   segments, chunk, MRCTYPE) for
+                   chunk in np.array_split(resamples, nchunks)]
+        results = [future.result() for future in futures]
+    A_samples = np.hstack([result[0] for result in results])
+    B_samples = np.hstack([result[1] for result in results])
+    print('Bootstrap computed in {:0.1f} sec'.format(
+        perf_counter() - tstart))
+
+    q = 100 * (1 - confidence) / 2
+    params_ci = np.array(
+        [np.nanpercentile(A_samples, [q, 100 - q]),
+         np.nanpercentile(B_samples, [q, 100 - q])])
+
+    return A_samples, B_samples, params_ci
+
+
+def calc_mrc_for_project(project, names=None, MRCTYPE=1, deltan=20,
+                         min_duration=0, min_amplitude=0, nboot=0,
+                         confidence=0.95, max_workers=None):
+    """
+    Compute automatically the MRC of the water level datasets of a project
+    and save the results in the project.
+
+    The MRC of each dataset are computed in parallel in separate processes,
+    while the results are saved to the project hdf5 file from the main
+    process. All the water level datasets of the project are processed if
+    no name is provided. The confidence intervals of the MRC parameters are
+    also estimated and saved when "nboot" is greater than 0.
+
+    Return a dictionary with the A and B parameters and the RMSE of the MRC
+    computed for each dataset.
+    """
+    names = project.wldsets if names is None else names
+
+    print('Computing the MRC of {} water level datasets...'.format(
+        len(names)))
+    tstart = perf_counter()
+    futures = {}
+    with ProcessPoolExecutor(max_workers) as executor:
+        for name in names:
+            wldset = project.get_wldset(name)
+            if wldset is None:
+                continue
+            futures[name] = executor.submit(
+                calc_auto_mrc, wldset.xldates, wldset.waterlevels, MRCTYPE,
+                deltan, min_duration, min_amplitude)
+
+        results = {}
+        for name, future in futures.items():
+            ipeak, A, B, hp, RMSE = future.result()
+            if A is None:
+                print('Failed to compute the MRC of wldset {}.'.format(name))
+                continue
+            wldset = project.get_wldset(name)
+            wldset.set_mrc(A, B, ipeak, wldset.xldates, hp)
+            results[name] = (A, B, RMSE)
+
+    if nboot > 0:
+        for name in results:
+            wldset = project.get_wldset(name)
+            A_samples, B_samples, params_ci = mrc_bootstrap(
+                wldset.xldates, wldset.waterlevels,
+                wldset['mrc/peak_indx'], MRCTYPE, nboot, confidence,
+                max_workers=max_workers)
+            wldset.set_mrc_ci(params_ci, nboot, confidence)
+    print('MRC of {} water level datasets computed in {:0.1f} sec'.format(
+        len(results), perf_counter() - tstart))
+
+    return results
+
+
 # =============================================================================
 
 
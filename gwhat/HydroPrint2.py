@@ -35,9 +35,9 @@ from gwhat.widgets.colorpreferences import (
     ColorsManager, ColorPreferencesDialog)
 from gwhat.utils.icons import QToolButtonNormal, QToolButtonSmall, get_iconsize
 from gwhat.utils import icons
+from gwhat.utils.qthelpers import get_rasterize_dpi
 import gwhat.common.widgets as myqt
 from gwhat.common.utils import find_unique_filename
-from gwhat.projet.reader_waterlvl import load_waterlvl_measures
 from gwhat.widgets.layout import OnOffToggleWidget, VSep
 from gwhat.gwrecharge.glue import GLUEDataFrameBase
 from gwhat.widgets.buttons import LangToolButton
@@ -407,13 +407,13 @@ class HydroprintGUI(QWidget):
             self.hydrograph.set_wldset(self.wldset)
             self.hydrograph.gluedf = self.wldset.get_glue_at(-1)
 
-        # Load the manual measurements.
+        # Import the manual measurements of all the wells of the project if
+        # they changed since they were last imported.
         fname = os.path.join(
             osp.dirname(self.dmngr.projet.filename),
             "Water Levels",
             'waterlvl_manual_measurements')
-        tmeas, wlmeas = load_waterlvl_measures(fname, self.wldset['Well'])
-        self.wldset.set_wlmeas(tmeas, wlmeas)
+        self.dmngr.projet.import_wlmeas(fname)
 
         # Setup the layout of the hydrograph.
         layout = self.wldset.get_layout()
@@ -530,13 +530,9 @@ class HydroprintGUI(QWidget):
             self.hydrograph.set_time_scale()
             self.hydrograph.setup_xticklabels()
         elif sender == self.page_setup_win:
-            self.hydrograph.update_fig_size()
-            # Implicitly call : set_margins()
-            #                   draw_ylabels()
-            #                   set_time_scale()
-            #                   draw_figure_title
-            self.hydrograph.draw_waterlvl()
-            self.hydrograph.setup_legend()
+            # Only the parts of the figure that are affected by the changes
+            # made to the page setup are updated.
+            self.hydrograph.update_page_setup()
         elif sender == self.qweather_bin:
             self.hydrograph.resample_bin()
             self.hydrograph.draw_weather()
@@ -661,17 +657,29 @@ class HydroprintGUI(QWidget):
             fname = fname if fname.endswith(ftype) else fname + ftype
             set_select_file_dialog_dir(os.path.dirname(fname))
 
+            # The dense data layers are rasterized only in the SVG format,
+            # where this makes the files smaller.
+            rasterize_dpi = None
+            if fname.lower().endswith('.svg'):
+                rasterize_dpi, ok = get_rasterize_dpi(self)
+                if not ok:
+                    return
             try:
-                self.save_figure(fname)
+                self.save_figure(fname, rasterize_dpi)
             except PermissionError:
                 msg = "The file is in use by another application or user."
                 QMessageBox.warning(self, 'Warning', msg, QMessageBox.Ok)
                 self.select_save_path()
 
-    def save_figure(self, fname):
-        """Save the hydrograph figure in a file."""
-        self.hydrograph.generate_hydrograph()
-        self.hydrograph.savefig(fname)
+    def save_figure(self, fname, rasterize_dpi=None):
+        """
+        Save the hydrograph figure in a file. If rasterize_dpi is not None,
+        the dense data layers are rasterized at rasterize_dpi when saving
+        in a vector format.
+        """
+        if not self.hydrograph.isHydrographExists:
+            self.hydrograph.generate_hydrograph()
+        self.hydrograph.savefig(fname, rasterize_dpi)
 
     # ---- Graph Layout Handlers
 
@@ -748,7 +756,7 @@ class HydroprintGUI(QWidget):
 
         # Check if Weather Dataset :
 
-        if layout['wxdset'] in self.dmngr.wxdsets:
+        if self.dmngr.is_wxdset_selectable(layout['wxdset']):
             self.dmngr.set_current_wxdset(layout['wxdset'])
         else:
             if self.dmngr.set_closest_wxdset() is None:
@@ -16,9 +16,12 @@ from shutil import rmtree
 
 # ---- Third party imports
 import numpy as np
+import pandas as pd
 import xlsxwriter
 import xlwt
 
+CHUNKSIZE = 10000
+
 
 def calc_dist_from_coord(lat1, lon1, lat2, lon2):
     """
@@ -56,6 +59,10 @@ def save_content_to_file(fname, fcontent):
     """
     Smart function that checks the extension and save the content in the
     appropriate file format.
+
+    The content is a list of rows, each row being a list of values, that
+    can also contain 2D numpy arrays or pandas data frames. These blocks of
+    data are written in chunks without first being converted to lists.
     """
     root, ext = osp.splitext(fname)
     if ext in ['.xlsx', '.xls']:
@@ -66,6 +73,37 @@ def save_content_to_file(fname, fcontent):
         save_content_to_csv(fname, fcontent)
 
 
+def iter_content_blocks(fcontent):
+    """
+    Iterate over the content to save to a file and yield the consecutive
+    rows of values as lists and the blocks of data as data frames.
+    """
+    rows = []
+    for item in fcontent:
+        if isinstance(item, (np.ndarray, pd.DataFrame)):
+            if rows:
+                yield rows
+                rows = []
+            yield pd.DataFrame(np.atleast_2d(item) if
+                               isinstance(item, np.ndarray) else item)
+        else:
+            rows.append(item)
+    if rows:
+        yield rows
+
+
+def iter_block_chunks(block, chunksize=None):
+    """
+    Iterate over the rows of a block of data in chunks of lists of
+    values, with nan values converted to text so that they can be saved
+    in a csv or an Excel file.
+    """
+    chunksize = CHUNKSIZE if chunksize is None else chunksize
+    for i in range(0, len(block), chunksize):
+        chunk = block.iloc[i:i + chunksize].astype(object)
+        yield chunk.where(chunk.notnull(), 'nan').values.tolist()
+
+
 def save_content_to_csv(fname, fcontent, mode='w', delimiter=',',
                         encoding='utf8'):
     """
@@ -73,9 +111,13 @@ def save_content_to_csv(fname, fcontent, mode='w', delimiter=',',
     in arguments.
     """
     create_dirname(fname)
-    with open(fname, mode, encoding='utf8') as csvfile:
+    with open(fname, mode, encoding=encoding) as csvfile:
         writer = csv.writer(csvfile, delimiter=delimiter, lineterminator='\n')
-        writer.writerows(fcontent)
+        for block in iter_content_blocks(fcontent):
+            chunks = (iter_block_chunks(block) if
+                      isinstance(block, pd.DataFrame) else [block])
+            for chunk in chunks:
+                writer.writerows(chunk)
 
 
 def save_content_to_excel(fname, fcontent):
@@ -85,16 +127,32 @@ def save_content_to_excel(fname, fcontent):
     if ext == '.xls':
         wb = xlwt.Workbook()
         ws = wb.add_sheet('Data')
-        for i, row in enumerate(fcontent):
-            for j, cell in enumerate(row):
-                ws.write(i, j, cell)
+        i = 0
+        for block in iter_content_blocks(fcontent):
+            chunks = (iter_block_chunks(block) if
+                      isinstance(block, pd.DataFrame) else [block])
+            for chunk in chunks:
+                for row in chunk:
+                    for j, cell in enumerate(row):
+                        ws.write(i, j, cell)
+                    i += 1
         wb.save(root+'.xls')
     else:
         try:
-            with xlsxwriter.Workbook(root + '.xlsx') as wb:
+            # The rows are flushed to disk as they are written in constant
+            # memory mode, so that large datasets can be saved without
+            # holding the whole worksheet in memory.
+            with xlsxwriter.Workbook(
+                    root + '.xlsx', {'constant_memory': True}) as wb:
                 ws = wb.add_worksheet('Data')
-                for i, row in enumerate(fcontent):
-                    ws.write_row(i, 0, row)
+                i = 0
+                for block in iter_content_blocks(fcontent):
+                    chunks = (iter_block_chunks(block) if
+                              isinstance(block, pd.DataFrame) else [block])
+                    for chunk in chunks:
+                        for row in chunk:
+                            ws.write_row(i, 0, row)
+                            i += 1
         except xlsxwriter.exceptions.FileCreateError:
             raise PermissionError
 
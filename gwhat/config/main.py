@@ -46,6 +46,9 @@ DEFAULTS = [
     ('weather_normals_viewer',
         {'graphs_labels_language': 'english'}
      ),
+    ('parse_cache',
+        {'enabled': False}
+     ),
 ]
 
 
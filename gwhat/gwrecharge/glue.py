@@ -16,11 +16,10 @@ from time import strftime
 
 # ---- Third party imports
 import numpy as np
-from xlrd import xldate_as_tuple
 
 # ---- Local imports
 from gwhat.common.utils import save_content_to_file
-from gwhat.utils.math import nan_as_text_tolist
+from gwhat.utils.dates import xldates_to_datetimeindex
 from gwhat import __namever__
 
 
@@ -94,7 +93,7 @@ class GLUEDataFrameBase(Mapping):
             ]).transpose()
 
         # Merge the data header with the data.
-        fdata.extend(nan_as_text_tolist(data))
+        fdata.append(data)
         return fdata
 
     def _format_mly_glue_budget(self):
@@ -131,15 +130,8 @@ class GLUEDataFrameBase(Mapping):
                 col += 1
         data = np.round(data, 1)
 
-        # Merge the data header with the data. Also, convert float nan to text,
-        # so that it is possible to save to an Excel file.
-        dataf = [data_header, data_header3, data_header2]
-        if np.isnan(data).any():
-            m, n = np.shape(data)
-            for i in range(m):
-                dataf.append(['nan' if np.isnan(x) else x for x in data[i, :]])
-        else:
-            dataf.extend(data.tolist())
+        # Merge the data header with the data.
+        dataf = [data_header, data_header3, data_header2, data]
 
         return dataf
 
@@ -163,7 +155,7 @@ class GLUEDataFrameBase(Mapping):
         data = np.round(data, 2)
 
         # Merge the data header with the data.
-        dataf.extend(nan_as_text_tolist(data))
+        dataf.append(data)
 
         return dataf
 
@@ -330,17 +322,11 @@ def calcul_dly_budget(data, glue_limits):
 
         # We extend the time and date arrays.
         times2add = np.arange(deltat) + times[-1] + 1
-        years2add = []
-        months2add = []
-        days2add = []
-        for time_ in times2add:
-            date = xldate_as_tuple(time_, 0)
-            years2add.append(date[0])
-            months2add.append(date[1])
-            days2add.append(date[2])
+        dates2add = xldates_to_datetimeindex(times2add)
         times = np.hstack([times, times2add])
-        years = np.hstack([years, years2add])
-        months = np.hstack([months, months2add])
+        years = np.hstack([years, dates2add.year.values])
+        months = np.hstack([months, dates2add.month.values])
+        days = np.hstack([days, dates2add.day.values])
 
     return {'recharge': glue_rechg_dly,
             'evapo': glue_evapo_dly,
@@ -84,9 +84,9 @@ class RechgEvalWorker(QObject):
         # Setup weather data.
 
         self.wxdset = wxdset
-        self.ETP = self.wxdset.data['PET'].values
-        self.PTOT = self.wxdset.data['Ptot'].values
-        self.TAVG = self.wxdset.data['Tavg'].values
+        self.ETP = self.wxdset['PET'].values
+        self.PTOT = self.wxdset['Ptot'].values
+        self.TAVG = self.wxdset['Tavg'].values
         self.tweatr = self.wxdset.get_xldates() + self.deltat
         # We introduce a time lag here to take into account the travel time
         # through the unsaturated zone.
@@ -218,12 +218,12 @@ class RechgEvalWorker(QObject):
         glue_rawdata['water levels']['time'] = self.twlvl
         glue_rawdata['water levels']['observed'] = self.wlobs
 
-        glue_rawdata['Weather'] = {'Tmax': self.wxdset.data['Tmax'].values,
-                                   'Tmin': self.wxdset.data['Tmin'].values,
-                                   'Tavg': self.wxdset.data['Tavg'].values,
-                                   'Ptot': self.wxdset.data['Ptot'].values,
-                                   'Rain': self.wxdset.data['Rain'].values,
-                                   'PET': self.wxdset.data['PET'].values}
+        glue_rawdata['Weather'] = {'Tmax': self.wxdset['Tmax'].values,
+                                   'Tmin': self.wxdset['Tmin'].values,
+                                   'Tavg': self.wxdset['Tavg'].values,
+                                   'Ptot': self.wxdset['Ptot'].values,
+                                   'Rain': self.wxdset['Rain'].values,
+                                   'PET': self.wxdset['PET'].values}
 
         # Save the water levels simulated with the mrc, as well as and values
         # of the parameters that characterized this mrc.
@@ -239,9 +239,9 @@ class RechgEvalWorker(QObject):
         glue_rawdata['etr'] = set_evapo
         glue_rawdata['ru'] = set_runoff
         glue_rawdata['Time'] = self.wxdset.get_xldates()
-        glue_rawdata['Year'] = self.wxdset.data.index.year.values
-        glue_rawdata['Month'] = self.wxdset.data.index.month.values
-        glue_rawdata['Day'] = self.wxdset.data.index.day.values
+        glue_rawdata['Year'] = self.wxdset.index.year.values
+        glue_rawdata['Month'] = self.wxdset.index.month.values
+        glue_rawdata['Day'] = self.wxdset.index.day.values
 
         # Save infos about the piezometric station.
 
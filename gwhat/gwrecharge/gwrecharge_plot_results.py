@@ -33,6 +33,8 @@ from PyQt5.QtWidgets import (
 from gwhat.utils import icons
 from gwhat.utils.icons import QToolButtonNormal, QToolButtonSmall
 from gwhat.common.utils import find_unique_filename
+from gwhat.utils.mplhelpers import is_vector_format, rasterized_dense_artists
+from gwhat.utils.qthelpers import get_rasterize_dpi
 from gwhat.mplFigViewer3 import ImageViewer
 from gwhat.widgets.buttons import LangToolButton, ToolBarWidget
 from gwhat.widgets.layout import VSep
@@ -725,12 +727,28 @@ class FigManagerBase(QWidget):
             ftype = ftype.replace('*', '')
             fname = fname if fname.endswith(ftype) else fname + ftype
             self.savefig_dir = osp.dirname(fname)
-            self.save_figure_tofile(fname)
 
-    def save_figure_tofile(self, fname):
-        """Save the figure to fname."""
+            # The dense data layers are rasterized only in the SVG format,
+            # where this makes the files smaller.
+            rasterize_dpi = None
+            if fname.lower().endswith('.svg'):
+                rasterize_dpi, ok = get_rasterize_dpi(self)
+                if not ok:
+                    return
+            self.save_figure_tofile(fname, rasterize_dpi)
+
+    def save_figure_tofile(self, fname, rasterize_dpi=None):
+        """
+        Save the figure to fname. If rasterize_dpi is not None, the dense
+        data layers are rasterized at rasterize_dpi when saving in a
+        vector format.
+        """
         try:
-            self.figcanvas.figure.savefig(fname)
+            if rasterize_dpi is None or not is_vector_format(fname):
+                self.figcanvas.figure.savefig(fname)
+            else:
+                with rasterized_dense_artists(self.figcanvas.figure):
+                    self.figcanvas.figure.savefig(fname, dpi=rasterize_dpi)
         except PermissionError:
             msg = "The file is in use by another application or user."
             QMessageBox.warning(self, 'Warning', msg, QMessageBox.Ok)
@@ -12,9 +12,12 @@
 # -----------------------------------------------------------------------------
 
 # ---- Standard library imports
-from calendar import monthrange
+from concurrent.futures import ProcessPoolExecutor
+import os
+import os.path as osp
 
 # ---- Third party imports
+import h5py
 import numpy as np
 import matplotlib as mpl
 from matplotlib.patches import Rectangle
@@ -28,8 +31,12 @@ from xlrd.xldate import xldate_from_date_tuple
 from xlrd import xldate_as_tuple
 
 # ---- Local imports
-from gwhat.utils.dates import datetimeindex_to_xldates
+from gwhat.utils.dates import (
+    datetimeindex_to_xldates, xldates_to_datetimeindex)
+from gwhat.utils.math import minmax_downsample
+from gwhat.utils.mplhelpers import is_vector_format, rasterized_dense_artists
 from gwhat.common.utils import calc_dist_from_coord
+from gwhat.projet.reader_projet import WLDataFrameHDF5, WXDataFrameHDF5
 from gwhat.config.colors import ColorsManager
 
 mpl.rc('font', **{'family': 'sans-serif', 'sans-serif': ['Arial']})
@@ -131,6 +138,13 @@ class Hydrograph(Figure):
         self.label_font_size = 14
         self.date_labels_pattern = 2
         self._figframe_lw = 0
+        self._xticks_labels_offsets = {}
+
+        # The water level data are downsampled so that only the points that
+        # are required to render them faithfully at this resolution, in
+        # dots per inch, are plotted.
+        self.downsample_dpi = 300
+        self._waterlvl_data = {}
 
         # Waterlvl & Meteo Obj :
 
@@ -150,6 +164,7 @@ class Hydrograph(Figure):
         # Bin Redistributed Weather :
 
         self.bTIME = np.array([])
+        self.bWIDTH = np.array([])
         self.bTMAX = np.array([])
         self.bPTOT = np.array([])
         self.bRAIN = np.array([])
@@ -160,6 +175,14 @@ class Hydrograph(Figure):
         #   2: 1 month;
         #   3: 1 year;
 
+        # The binned weather data and the geometry of their step plots
+        # are cached for each bin width. The cache is cleared when the
+        # weather dataset or its time index changes, for example when new
+        # data are appended to the dataset.
+        self._weather_bins = {}
+        self._weather_bins_wxdset = None
+        self._weather_bins_index = None
+
         self.NMissPtot = []
 
     @property
@@ -173,6 +196,8 @@ class Hydrograph(Figure):
 
     def set_meteo_on(self, x):
         """Set whether the meteo data are plotted or not."""
+        if bool(x) == self.__meteo_on:
+            return
         self.meteo_on = x
         if self.__isHydrographExists:
             self.ax3.set_visible(self.meteo_on)
@@ -191,6 +216,8 @@ class Hydrograph(Figure):
 
     def set_glue_wl_on(self, x):
         """Set whether the glue water levels data are plotted or not."""
+        if bool(x) == self.__glue_wl_on:
+            return
         self.glue_wl_on = x
         if self.__isHydrographExists:
             self.draw_glue_wl()
@@ -209,6 +236,8 @@ class Hydrograph(Figure):
 
     def set_mrc_wl_on(self, x):
         """Set whether the mrc water levels data must plotted or not."""
+        if bool(x) == self.__mrc_wl_on:
+            return
         self.mrc_wl_on = x
         if self.__isHydrographExists:
             self.draw_mrc_wl()
@@ -218,6 +247,8 @@ class Hydrograph(Figure):
         """
         Set the line thickness of the frame that encloses the entire figure.
         """
+        if x == self._figframe_lw:
+            return
         self._figframe_lw = x
         self.setup_figure_frame()
 
@@ -241,6 +272,26 @@ class Hydrograph(Figure):
     def set_wldset(self, wldset):
         self.wldset = wldset
 
+    def set_layout(self, layout):
+        """
+        Set the layout of the hydrograph from a layout dict as saved in the
+        project hdf5 file.
+        """
+        for key in ['TIMEmin', 'TIMEmax', 'date_labels_pattern', 'WLscale',
+                    'WLmin', 'NZGrid', 'RAINscale', 'bwidth_indx',
+                    'datemode', 'language', 'fwidth', 'fheight', 'va_ratio',
+                    'trend_line']:
+            setattr(self, key, layout[key])
+        self.WLdatum = ['mbgs', 'masl'].index(layout['WLdatum'])
+        self.isLegend = layout['legend_on']
+        self.isGraphTitle = layout['title_on']
+        self.set_meteo_on(layout['meteo_on'])
+        self.set_glue_wl_on(layout['glue_wl_on'])
+        self.set_mrc_wl_on(layout['mrc_wl_on'])
+        self.set_figframe_lw(layout['figframe_lw'])
+        for key, rgb in layout['colors'].items():
+            self.colorsDB.RGB[key] = rgb
+
     def set_wxdset(self, wxdset):
         self.wxdset = wxdset
 
@@ -255,10 +306,23 @@ class Hydrograph(Figure):
         self.__isHydrographExists = False
         super(Hydrograph, self).clf(*args, **kargs)
 
-    def savefig(self, fname):
-        """Matplotlib override to set frameon when saving."""
-        super(Hydrograph, self).savefig(fname, frameon=True, facecolor='white',
-                                        edgecolor='black')
+    def savefig(self, fname, rasterize_dpi=None):
+        """
+        Matplotlib override to set frameon when saving.
+
+        If rasterize_dpi is not None and the figure is saved in a vector
+        format, the dense data layers of the figure, such as the water
+        levels and the weather bars, are rasterized at rasterize_dpi while
+        the axes, texts and legend are kept as vectors.
+        """
+        kwargs = {'frameon': True, 'facecolor': 'white',
+                  'edgecolor': 'black'}
+        if rasterize_dpi is None or not is_vector_format(fname):
+            super(Hydrograph, self).savefig(fname, **kwargs)
+        else:
+            with rasterized_dense_artists(self):
+                super(Hydrograph, self).savefig(
+                    fname, dpi=rasterize_dpi, **kwargs)
 
     def generate_hydrograph(self, wxdset=None, wldset=None):
         wxdset = self.wxdset if wxdset is None else wxdset
@@ -271,17 +335,25 @@ class Hydrograph(Figure):
 
         # Assign Weather Data.
         if self.wxdset is None:
+            self._weather_bins = {}
+            self._weather_bins_wxdset = None
+            self._weather_bins_index = None
             self.name_meteo = ''
             self.TIMEmeteo = np.array([])
             self.TMAX = np.array([])
             self.PTOT = np.array([])
             self.RAIN = np.array([])
         else:
+            if (wxdset is not self._weather_bins_wxdset or
+                    wxdset.index is not self._weather_bins_index):
+                self._weather_bins = {}
+                self._weather_bins_wxdset = wxdset
+                self._weather_bins_index = wxdset.index
             self.name_meteo = wxdset.metadata['Station Name']
-            self.TIMEmeteo = datetimeindex_to_xldates(wxdset.data.index)
-            self.TMAX = wxdset.data['Tmax'].values
-            self.PTOT = wxdset.data['Ptot'].values
-            self.RAIN = wxdset.data['Rain'].values
+            self.TIMEmeteo = datetimeindex_to_xldates(wxdset.index)
+            self.TMAX = wxdset['Tmax'].values
+            self.PTOT = wxdset['Ptot'].values
+            self.RAIN = wxdset['Rain'].values
 
         # Resample Data in Bins :
 
@@ -416,6 +488,8 @@ class Hydrograph(Figure):
         # Predicted GLUE water levels
         self.glue_plt, = self.ax2.plot([], [])
 
+        self.ax2.callbacks.connect(
+            'xlim_changed', lambda ax: self.downsample_waterlvl())
         self.draw_waterlvl()
         self.draw_glue_wl()
         self.draw_mrc_wl()
@@ -513,8 +587,52 @@ class Hydrograph(Figure):
         self.draw_ylabels()
         self.setup_legend()
 
+        self._page_setup = self._get_page_setup()
         self.__isHydrographExists = True
 
+    def _get_page_setup(self):
+        """
+        Return the values of the page setup options that were used to
+        layout the figure.
+        """
+        return {'fwidth': self.fwidth,
+                'fheight': self.fheight,
+                'va_ratio': self.va_ratio,
+                'trend_line': self.trend_line,
+                'isLegend': self.isLegend,
+                'isGraphTitle': self.isGraphTitle,
+                'meteo_on': self.meteo_on}
+
+    def update_page_setup(self):
+        """
+        Update only the parts of the figure that are affected by the changes
+        made to the page setup options since the figure was last updated.
+        """
+        if not self.__isHydrographExists:
+            return
+        old_setup = self._page_setup
+        new_setup = self._get_page_setup()
+        self._page_setup = new_setup
+        changed = [key for key in new_setup if
+                   new_setup[key] != old_setup[key]]
+
+        # The margins depend on the size of the figure and on whether the
+        # title, the legend or the weather data are shown.
+        has_header = ['isGraphTitle', 'isLegend']
+        if (any(key in changed for key in
+                ['fwidth', 'fheight', 'va_ratio', 'meteo_on']) or
+                any(old_setup[key] for key in has_header) !=
+                any(new_setup[key] for key in has_header)):
+            self.update_fig_size()
+            self.downsample_waterlvl()
+        if 'trend_line' in changed:
+            self.draw_waterlvl()
+        if 'isGraphTitle' in changed or 'meteo_on' in changed:
+            self.draw_figure_title()
+        if any(key in changed for key in
+               ['trend_line', 'isLegend', 'meteo_on']):
+            self.setup_legend()
+
     def setup_legend(self):
         """Setup the legend of the graph."""
         if self.isLegend == 1:
@@ -591,7 +709,12 @@ class Hydrograph(Figure):
         self.l1_ax2.set_color(self.colorsDB.rgb['WL solid'])
         self.l2_ax2.set_color(self.colorsDB.rgb['WL data'])
         self.h_WLmes.set_color(self.colorsDB.rgb['WL obs'])
-        self.draw_weather()
+
+        # The weather data do not need to be drawn again.
+        if self.meteo_on:
+            self.PTOT_bar.set_color(self.colorsDB.rgb['Snow'])
+            self.RAIN_bar.set_color(self.colorsDB.rgb['Rain'])
+            self.l1_ax4.set_facecolor(self.colorsDB.rgb['Tair'])
         self.setup_legend()
 
     def update_fig_size(self):
@@ -796,44 +919,65 @@ class Hydrograph(Figure):
 
         return date0, date1
 
-    def resample_bin(self):  # ================================================
-
-        # day; week; month; year
-        self.bwidth = [1, 7, 30, 365][self.bwidth_indx]
-        bwidth = self.bwidth
-
-        if self.bwidth_indx == 0:  # daily
-
-            self.bTIME = np.copy(self.TIMEmeteo)
-            self.bTMAX = np.copy(self.TMAX)
-            self.bPTOT = np.copy(self.PTOT)
-            self.bRAIN = np.copy(self.RAIN)
-        else:
-            self.bTIME = self.bin_sum(self.TIMEmeteo, bwidth) / bwidth
-            self.bTMAX = self.bin_sum(self.TMAX, bwidth) / bwidth
-            self.bPTOT = self.bin_sum(self.PTOT, bwidth)
-            self.bRAIN = self.bin_sum(self.RAIN, bwidth)
-
-#        elif self.bwidth_indx == 4 : # monthly
-#            print('option not yet available, kept default of 1 day')
-#
-#        elif self.bwidth_indx == 5 : # yearly
-#            print('option not yet available, kept default of 1 day')
+    def resample_bin(self):
+        """
+        Resample the daily weather data in calendar bins of one day, week,
+        month or year, according to the value of bwidth_indx.
 
-    def bin_sum(self, x, bwidth):  # ==========================================
+        The binned data are cached for each bin width, so that they are
+        computed only once for a given weather dataset.
         """
-        Sum data x over bins of width "bwidth" starting at indice 0 of x.
-        If there is residual data at the end because of the last bin being not
-        complete, data are rejected and removed from the reshaped series.
+        if self.bwidth_indx not in self._weather_bins:
+            self._weather_bins[self.bwidth_indx] = self._calc_weather_bins(
+                self.bwidth_indx)
+        bins = self._weather_bins[self.bwidth_indx]
+        self.bTIME = bins['time']
+        self.bWIDTH = bins['width']
+        self.bTMAX = bins['Tmax']
+        self.bPTOT = bins['Ptot']
+        self.bRAIN = bins['Rain']
+
+    def _calc_weather_bins(self, bwidth_indx):
         """
+        Sum the daily precipitation and average the daily maximum air
+        temperature over calendar weeks, months or years in a single
+        vectorized pass.
 
-        bwidth = int(bwidth)
-        nbin = int(np.floor(len(x) / bwidth))
-
-        bheight = x[:nbin*bwidth].reshape(nbin, bwidth)
-        bheight = np.sum(bheight, axis=1)
-
-        return bheight
+        The time of each bin is the center of its calendar period and the
+        bins that are only partially covered by the data are kept.
+        """
+        time = np.asarray(self.TIMEmeteo, dtype=float)
+        if bwidth_indx == 0 or len(time) == 0:
+            return {'time': time, 'width': np.ones(len(time)),
+                    'Tmax': np.asarray(self.TMAX, dtype=float),
+                    'Ptot': np.asarray(self.PTOT, dtype=float),
+                    'Rain': np.asarray(self.RAIN, dtype=float)}
+
+        # Weeks start on Monday, as in pandas.
+        freq = [None, 'W', 'M', 'Y'][bwidth_indx]
+        periods = xldates_to_datetimeindex(np.floor(time)).to_period(freq)
+        codes, uniques = pd.factorize(periods, sort=True)
+        nbin = len(uniques)
+
+        # The data of a given day are centered on its numerical date, so
+        # the bins start half a day before the first day of their period.
+        tstart = datetimeindex_to_xldates(uniques.start_time) - 0.5
+        tend = datetimeindex_to_xldates((uniques + 1).start_time) - 0.5
+
+        bins = {'time': (tstart + tend) / 2, 'width': tend - tstart}
+        for key, values in [('Ptot', self.PTOT), ('Rain', self.RAIN)]:
+            values = np.asarray(values, dtype=float)
+            bins[key] = np.bincount(
+                codes, weights=np.nan_to_num(values), minlength=nbin)
+
+        tmax = np.asarray(self.TMAX, dtype=float)
+        isvalid = ~np.isnan(tmax)
+        count = np.bincount(codes[isvalid], minlength=nbin)
+        tsum = np.bincount(
+            codes[isvalid], weights=tmax[isvalid], minlength=nbin)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bins['Tmax'] = tsum / count
+        return bins
 
     # ---- Drawing data methods
 
@@ -877,14 +1021,14 @@ class Hydrograph(Figure):
         else:  # mbgs -> yaxis is inverted
             water_lvl = self.wldset['WL']
 
+        self._waterlvl_data = {}
         if self.trend_line == 1:
             tfilt, wlfilt = filt_data(time, water_lvl, self.trend_MAW)
-            self.l1_ax2.set_data(tfilt, wlfilt)
-            self.l2_ax2.set_data(time, water_lvl)
-
+            self._waterlvl_data[self.l1_ax2] = (tfilt, wlfilt)
+            self._waterlvl_data[self.l2_ax2] = (time, water_lvl)
         else:
-            self.l1_ax2.set_data(time, water_lvl)
-            self.l2_ax2.set_data([], [])
+            self._waterlvl_data[self.l1_ax2] = (time, water_lvl)
+            self._waterlvl_data[self.l2_ax2] = ([], [])
 
         # ---- Manual Measures
 
@@ -893,7 +1037,53 @@ class Hydrograph(Figure):
             if self.WLdatum == 1:
                 # The datum is meter above see level.
                 wl_meas = self.wldset['Elevation'] - wl_meas
-            self.h_WLmes.set_data(time_wl_meas, wl_meas)
+            self._waterlvl_data[self.h_WLmes] = (time_wl_meas, wl_meas)
+
+        self.downsample_waterlvl()
+
+    def downsample_waterlvl(self):
+        """
+        Plot only the water level data that are required to render them
+        faithfully for the current time scale and figure size.
+        """
+        npixels = (self.ax2.get_position().width * self.get_figwidth() *
+                   max(self.dpi, self.downsample_dpi))
+        for artist, (time, water_lvl) in self._waterlvl_data.items():
+            time = np.asarray(time)
+            water_lvl = np.asarray(water_lvl)
+            indexes = minmax_downsample(
+                time, water_lvl, self.TIMEmin, self.TIMEmax, npixels)
+            artist.set_data(time[indexes], water_lvl[indexes])
+
+    def _calc_weather_geometry(self):
+        """
+        Compute the vertices of the precipitation bars and of the air
+        temperature step plot for the whole binned weather dataset.
+        """
+        nbin = len(self.bTIME)
+        n = self.bWIDTH / 2.
+        f = 0.85  # Space between individual bar.
+
+        precip_time = np.zeros(nbin * 4)
+        precip_time[0::4] = self.bTIME - n * f
+        precip_time[1::4] = self.bTIME - n * f
+        precip_time[2::4] = self.bTIME + n * f
+        precip_time[3::4] = self.bTIME + n * f
+
+        geometry = {'precip_time': precip_time}
+        for key, values in [('Ptot', self.bPTOT), ('Rain', self.bRAIN)]:
+            values4x = np.zeros(nbin * 4)
+            values4x[1::4] = values
+            values4x[2::4] = values
+            geometry[key] = values4x
+
+        tair_time = np.zeros(nbin * 2)
+        tair_time[0::2] = self.bTIME - n
+        tair_time[1::2] = self.bTIME + n
+        geometry['tair_time'] = tair_time
+        geometry['Tmax'] = np.repeat(self.bTMAX, 2)
+
+        return geometry
 
     def draw_weather(self):
         """
@@ -908,59 +1098,31 @@ class Hydrograph(Figure):
         # For performance purposes, only the data that fit within the limits
         # of the x axis limits are plotted.
 
-        istart = np.where(self.bTIME > self.TIMEmin)[0]
-        if len(istart) == 0:
-            istart = 0
-        else:
-            istart = istart[0]
-            if istart > 0:
-                istart += -1
-
-        iend = np.where(self.bTIME < self.TIMEmax)[0]
-        if len(iend) == 0:
-            iend = 0
-        else:
-            iend = iend[-1]
-            if iend < len(self.bTIME):
-                iend += 1
+        istart = max(np.searchsorted(self.bTIME, self.TIMEmin, 'right') - 1, 0)
+        iend = min(np.searchsorted(self.bTIME, self.TIMEmax, 'left') + 1,
+                   len(self.bTIME))
 
-        time = self.bTIME[istart:iend]
-        Tmax = self.bTMAX[istart:iend]
-        Ptot = self.bPTOT[istart:iend]
-        Rain = self.bRAIN[istart:iend]
+        # The geometry of the step plots is computed once for the whole
+        # dataset and cached for each bin width.
+        bins = self._weather_bins[self.bwidth_indx]
+        if 'geometry' not in bins:
+            bins['geometry'] = self._calc_weather_geometry()
+        geometry = bins['geometry']
 
         # ------------------------------------------------------ PLOT PRECIP --
 
-        TIME2X = np.zeros(len(time) * 4)
-        Ptot2X = np.zeros(len(time) * 4)
-        Rain2X = np.zeros(len(time) * 4)
-
-        n = self.bwidth / 2.
-        f = 0.85  # Space between individual bar.
-
-        TIME2X[0::4] = time - n * f
-        TIME2X[1::4] = time - n * f
-        TIME2X[2::4] = time + n * f
-        TIME2X[3::4] = time + n * f
-
-        Ptot2X[0::4] = 0
-        Ptot2X[1::4] = Ptot
-        Ptot2X[2::4] = Ptot
-        Ptot2X[3::4] = 0
-
-        Rain2X[0::4] = 0
-        Rain2X[1::4] = Rain
-        Rain2X[2::4] = Rain
-        Rain2X[3::4] = 0
+        TIME4X = geometry['precip_time'][4*istart:4*iend]
+        Ptot4X = geometry['Ptot'][4*istart:4*iend]
+        Rain4X = geometry['Rain'][4*istart:4*iend]
 
         self.PTOT_bar.remove()
         self.RAIN_bar.remove()
 
-        self.PTOT_bar = self.ax3.fill_between(TIME2X, 0., Ptot2X,
+        self.PTOT_bar = self.ax3.fill_between(TIME4X, 0., Ptot4X,
                                               color=self.colorsDB.rgb['Snow'],
                                               linewidth=0.0)
 
-        self.RAIN_bar = self.ax3.fill_between(TIME2X, 0., Rain2X,
+        self.RAIN_bar = self.ax3.fill_between(TIME4X, 0., Rain4X,
                                               color=self.colorsDB.rgb['Rain'],
                                               linewidth=0.0)
 
@@ -968,14 +1130,8 @@ class Hydrograph(Figure):
 
         # ---------------------------------------------------- PLOT AIR TEMP --
 
-        TIME2X = np.zeros(len(time)*2)
-        Tmax2X = np.zeros(len(time)*2)
-
-        n = self.bwidth / 2.
-        TIME2X[0:2*len(time)-1:2] = time - n
-        TIME2X[1:2*len(time):2] = time + n
-        Tmax2X[0:2*len(time)-1:2] = Tmax
-        Tmax2X[1:2*len(time):2] = Tmax
+        TIME2X = geometry['tair_time'][2*istart:2*iend]
+        Tmax2X = geometry['Tmax'][2*istart:2*iend]
 
         self.l1_ax4.remove()
         self.l1_ax4 = self.ax4.fill_between(TIME2X, 0., Tmax2X,
@@ -1143,23 +1299,34 @@ class Hydrograph(Figure):
                 axis='x', color=grid_color, linewidth=0.5, dashes=[1, 5],
                 dash_capstyle='butt')
 
-    def make_xticks_info(self):
-
-        # The strategy here is to:
-        # 1. render some random text ;
-        # 2. get the height of its bounding box ;
-        # 3. get the horizontal translation of the top-right corner after a
-        #    rotation of the bbox of 45 degrees ;
-        # 4. sclale the length calculated in step 3 to the height to width
-        #    ratio of the axe ;
-        # 5. convert the lenght calculated in axes coord. to the data coord.
-        #    system ;
-        # 6. remove the random text from the figure.
+    def get_xticks_labels_offset(self):
+        """
+        Return the horizontal offset, in axes coordinates, to apply to the
+        xticks labels so that the top-right corner of their bbox is aligned
+        with their tick once rotated by 45 degrees.
+
+        The strategy here is to:
+        1. render some random text ;
+        2. get the height of its bounding box ;
+        3. get the horizontal translation of the top-right corner after a
+           rotation of the bbox of 45 degrees ;
+        4. sclale the length calculated in step 3 to the height to width
+           ratio of the axe ;
+        5. remove the random text from the figure.
+
+        Since rendering text is expensive, the offset is cached for each
+        font size, dpi, figure size and axe position.
+        """
+        fontsize = 10
+        key = (fontsize, self.dpi, tuple(self.get_size_inches()),
+               tuple(self.ax1.get_position().bounds))
+        if key in self._xticks_labels_offsets:
+            return self._xticks_labels_offsets[key]
 
         # Random text bbox height :
 
-        dummytxt = self.ax1.text(0.5, 0.5, 'some_dummy_text', fontsize=10,
-                                 ha='right', va='top',
+        dummytxt = self.ax1.text(0.5, 0.5, 'some_dummy_text',
+                                 fontsize=fontsize, ha='right', va='top',
                                  transform=self.ax1.transAxes)
 
         renderer = self.canvas.get_renderer()
@@ -1175,49 +1342,60 @@ class Hydrograph(Figure):
         bbox = self.ax1.get_window_extent(renderer)  # in pixels
         bbox = bbox.transformed(self.dpi_scale_trans.inverted())  # in inches
 
-        sdx = dx * bbox.height / bbox.width
-        sdx *= (self.TIMEmax - self.TIMEmin + 1)
-
         dummytxt.remove()
 
-        # Transform to data coord :
-
-        month_names = LabelDatabase(self.language).month_names
-
-        xticks_labels_offset = sdx
-
-        xticks_labels = []
-        xticks_position = []
-        xticks_labels_position = []
-        xticks_minor_position = []
-
-        i = 0
-        next_xtick_pos = self.TIMEmin
-        while True:
-            datetuple = xldate_as_tuple(next_xtick_pos, 0)
-            year = datetuple[0]
-            month = datetuple[1]
-            month_range = monthrange(year, month)[1]
-
-            xticks_minor_position.append(next_xtick_pos)
-            if i % self.date_labels_pattern == 0:
-                xticks_position.append(next_xtick_pos)
-                xticks_labels_position.append(
-                    next_xtick_pos + xticks_labels_offset)
-                if self.datemode.lower() == 'month':
-                    xticks_labels.append("{} '{}".format(
-                        month_names[month - 1], str(year)[-2:]))
-                elif self.datemode.lower() == 'year':
-                    xticks_labels.append("%d" % year)
-
-            if self.datemode.lower() == 'month':
-                next_xtick_pos = next_xtick_pos + month_range
-            elif self.datemode.lower() == 'year':
-                next_xtick_pos = xldate_from_date_tuple((year + 1, 1, 1), 0)
-
-            if next_xtick_pos > self.TIMEmax:
-                break
-            i += 1
+        self._xticks_labels_offsets[key] = dx * bbox.height / bbox.width
+        return self._xticks_labels_offsets[key]
+
+    def make_xticks_info(self):
+        """
+        Return the positions of the major and minor xticks and the positions
+        and text of the xticks labels for the current time scale.
+        """
+        # Transform the offset of the labels to data coord :
+        xticks_labels_offset = (self.get_xticks_labels_offset() *
+                                (self.TIMEmax - self.TIMEmin + 1))
+
+        # Calculate the positions of the ticks with numpy calendar
+        # arithmetic. Note that Excel numerical dates are counted in days
+        # from 1899-12-30 for dates after 1900-03-01.
+        xlorigin = np.datetime64('1899-12-30', 'D')
+        date0 = xlorigin + np.timedelta64(int(np.floor(self.TIMEmin)), 'D')
+        date1 = xlorigin + np.timedelta64(int(np.floor(self.TIMEmax)), 'D')
+        if self.datemode.lower() == 'month':
+            month0 = date0.astype('datetime64[M]')
+            months = np.arange(month0, date1.astype('datetime64[M]') + 1)
+            dayoffset = self.TIMEmin - (
+                month0.astype('datetime64[D]') - xlorigin).astype(float)
+            positions = ((months.astype('datetime64[D]') - xlorigin)
+                         .astype(float) + dayoffset)
+            years = months.astype('datetime64[Y]').astype(int) + 1970
+            monthidx = months.astype(int) % 12
+        elif self.datemode.lower() == 'year':
+            years = np.arange(date0.astype('datetime64[Y]'),
+                              date1.astype('datetime64[Y]') + 1)
+            positions = (years[1:].astype('datetime64[D]') - xlorigin
+                         ).astype(float)
+            positions = np.hstack([self.TIMEmin, positions])
+            years = years.astype(int) + 1970
+        keep = positions <= self.TIMEmax
+        positions = positions[keep]
+        years = years[keep]
+
+        xticks_minor_position = positions.tolist()
+        xticks_position = positions[::self.date_labels_pattern].tolist()
+        xticks_labels_position = (
+            positions[::self.date_labels_pattern] + xticks_labels_offset
+            ).tolist()
+        if self.datemode.lower() == 'month':
+            month_names = LabelDatabase(self.language).month_names
+            xticks_labels = [
+                "{} '{}".format(month_names[month], str(year)[-2:]) for
+                year, month in zip(years[::self.date_labels_pattern],
+                                   monthidx[keep][::self.date_labels_pattern])]
+        else:
+            xticks_labels = [
+                "%d" % year for year in years[::self.date_labels_pattern]]
 
         return (xticks_position, xticks_labels_position, xticks_labels,
                 xticks_minor_position)
@@ -1244,6 +1422,101 @@ def filt_data(time, waterlvl, N):
     return tf, wlf
 
 
+def _export_hydrograph(filename, wldset_name, wxdset_name, fname,
+                       rasterize_dpi=None):
+    """
+    Render the hydrograph of a water level dataset of the project hdf5 file
+    with the layout saved in the project and save it to fname.
+    """
+    with h5py.File(filename, mode='r') as db:
+        wldset = WLDataFrameHDF5(db['wldsets/%s' % wldset_name])
+        wxdset = (None if wxdset_name is None else
+                  WXDataFrameHDF5(db['wxdsets/%s' % wxdset_name]))
+
+        hydrograph = Hydrograph()
+        hydrograph.set_wldset(wldset)
+        hydrograph.set_wxdset(wxdset)
+        hydrograph.gluedf = wldset.get_glue_at(-1)
+
+        layout = wldset.get_layout()
+        if layout is not None:
+            hydrograph.set_layout(layout)
+        else:
+            # Fit the water levels and time in the layout, as it is done
+            # in the GUI by default.
+            hydrograph.best_fit_waterlvl()
+            hydrograph.best_fit_time(wldset.xldates)
+
+        hydrograph.generate_hydrograph()
+        hydrograph.savefig(fname, rasterize_dpi)
+    return fname
+
+
+def export_hydrographs_for_project(project, dirname, fext='.pdf',
+                                   names=None, max_workers=None,
+                                   rasterize_dpi=None):
+    """
+    Render and save the hydrographs of the water level datasets of a
+    project using the layout saved for each dataset in the project.
+
+    The hydrographs are rendered in parallel in separate processes with
+    the Agg backend. Each figure is saved in dirname as
+    'hydrograph_<dataset name><fext>', where fext is the extension of a
+    file format supported by matplotlib, for example '.pdf' or '.png'.
+    All the water level datasets of the project are processed if no name
+    is provided. If rasterize_dpi is not None, the dense data layers of
+    the figures saved in a vector format are rasterized at rasterize_dpi.
+
+    Return the list of the files that were saved.
+    """
+    names = project.wldsets if names is None else names
+    if not osp.exists(dirname):
+        os.makedirs(dirname)
+
+    # Get the weather dataset to use for each water level dataset and make
+    # sure that the older datasets are compatible with the newer format,
+    # so that they can then be read from a read-only file by the workers.
+    jobs = []
+    wxdsets = project.wxdsets
+    for name in names:
+        wldset = project.get_wldset(name)
+        if wldset is None:
+            continue
+        wldset.require_groups()
+        layout = wldset.get_layout()
+        if layout is not None and layout['wxdset'] in wxdsets:
+            wxdset_name = layout['wxdset']
+        elif len(wxdsets):
+            # Use the closest weather station, as it is done in the GUI.
+            dist = calc_dist_from_coord(
+                wldset['Latitude'], wldset['Longitude'],
+                project.get_wxdsets_lat(), project.get_wxdsets_lon())
+            wxdset_name = wxdsets[np.argmin(dist)]
+        else:
+            wxdset_name = None
+        if wxdset_name is not None:
+            project.get_wxdset(wxdset_name)
+        jobs.append((name, wxdset_name,
+                     osp.join(dirname, 'hydrograph_{}{}'.format(name, fext))))
+
+    # The project file needs to be closed so that it can be opened in
+    # read-only mode by the workers.
+    filename = project.filename
+    project.close()
+    print('Exporting the hydrographs of {} wells...'.format(len(jobs)))
+    try:
+        with ProcessPoolExecutor(max_workers) as executor:
+            futures = [executor.submit(_export_hydrograph, filename, *job,
+                                       rasterize_dpi=rasterize_dpi)
+                       for job in jobs]
+            fnames = [future.result() for future in futures]
+    finally:
+        project.load_projet(filename)
+    print('{} hydrographs exported to {}'.format(len(fnames), dirname))
+
+    return fnames
+
+
 if __name__ == '__main__':
     from PyQt5.QtWidgets import QApplication
     import sys
@@ -14,7 +14,7 @@ from numpy import pi, sin, cos, arccos, arcsin
 import pandas as pd
 
 
-def calcul_thornthwaite(Tavg, latitude):
+def calcul_thornthwaite(Tavg, latitude, Tavg_heat_index=None):
     """
     Calcul reference potential evapotranspiration, PET0(mm/d) with
     the method of Thornwaite (1948).
@@ -27,6 +27,11 @@ def calcul_thornthwaite(Tavg, latitude):
     latitude: float
         The latitude in decimal degrees where we want to calculate the
         evapotranspiration.
+    Tavg_heat_index: :class:`pandas.Series`
+        A pandas time series containing the average daily air temperatures
+        in Celcius from which the heat index is calculated. This is useful
+        to calculate the evapotranspiration over a period that is shorter
+        than the period of record of a station. Tavg is used if None.
 
     Returns
     -------
@@ -38,7 +43,9 @@ def calcul_thornthwaite(Tavg, latitude):
         for estimating daily reference evapotranspiration. Agricultural Water
         Management, 66, 251-257.
     """
-    Ta = Tavg.groupby(Tavg.index.month).mean()
+    if Tavg_heat_index is None:
+        Tavg_heat_index = Tavg
+    Ta = Tavg_heat_index.groupby(Tavg_heat_index.index.month).mean()
     Ta[Ta < 0] = 0
 
     I = np.sum((0.2 * Ta)**1.514)  # Heat index
@@ -18,7 +18,9 @@ import pandas as pd
 import pytest
 
 # ---- Local library imports
-from gwhat.meteo.weather_reader import WXDataFrame, read_weather_datafile
+from gwhat import __rootdir__
+from gwhat.meteo.weather_reader import (
+    WXDataFrame, read_weather_datafile, read_weather_log)
 
 
 @pytest.mark.parametrize(
@@ -66,6 +68,51 @@ def test_read_weather_datafile(filename):
     assert np.array_equal(expected_values, data.astype(str).values)
 
 
+def test_read_weather_datafile_fallback(tmp_path):
+    """
+    Test that the weather data are read with the slower Python parser when
+    the C parser of pandas fails and that the results are the same.
+    """
+    filename = osp.join(osp.dirname(__file__), 'basic_weather_datafile.csv')
+    with open(filename, 'r') as csvfile:
+        content = csvfile.read()
+    expected_metadata, expected_data = read_weather_datafile(filename)
+
+    # Add a value that cannot be converted to a numeric value.
+    filename = osp.join(tmp_path, 'weather_datafile_with_text.csv')
+    with open(filename, 'w') as csvfile:
+        csvfile.write(content.replace('2000,1,3,nan', '2000,1,3,text'))
+    metadata, data = read_weather_datafile(filename)
+    assert data.astype(str).equals(expected_data.astype(str))
+
+    # Add a row that is longer than the header and a trailing empty line.
+    filename = osp.join(tmp_path, 'weather_datafile_with_long_row.csv')
+    with open(filename, 'w') as csvfile:
+        csvfile.write(content.replace('2000,1,5,,,,,', '2000,1,5,,,,,,,\n'))
+    metadata, data = read_weather_datafile(filename)
+    assert data.astype(str).equals(expected_data.astype(str))
+    expected_metadata['filename'] = filename
+    assert metadata == expected_metadata
+
+
+def test_read_weather_log():
+    """
+    Test that the datetimes of the filled values of all the variables are
+    read as expected from a gapfill log file.
+    """
+    filled_indexes = read_weather_log(
+        osp.join(__rootdir__, 'tests', 'sample_weather_datafile.log'))
+
+    # The number of filled values must match the total number of missing
+    # values that are reported in the summary table of the log.
+    assert len(filled_indexes['Max Temp (deg C)']) == 517
+    assert len(filled_indexes['Min Temp (deg C)']) == 546
+    assert len(filled_indexes['Mean Temp (deg C)']) == 657
+    assert len(filled_indexes['Total Precip (mm)']) == 457
+    assert (filled_indexes['Max Temp (deg C)'][:2].strftime(
+        "%Y-%m-%d").tolist() == ['2000-02-01', '2000-02-02'])
+
+
 def test_init_wxdataframe_from_input_file():
     """
     Test that the WXDataFrame can be initiated properly from an input
@@ -183,5 +230,50 @@ def test_wxdata_monthly_yearly_normals():
     assert round(yearly_normals.loc['Tmin'], 1) == 1.7
 
 
+def test_wxdata_cached_aggregates_and_normals(mocker):
+    """
+    Test that the monthly and yearly values are computed only once and that
+    the normals computed from their prefix sums for a range of years are the
+    same as those computed directly from the monthly and yearly values.
+    """
+    wxdset = WXDataFrame(
+        osp.join(osp.dirname(__file__), "sample_weather_datafile.xlsx"))
+    spy = mocker.spy(pd, 'concat')
+
+    monthly = wxdset.get_monthly_values()
+    yearly = wxdset.get_yearly_values()
+    assert spy.call_count == 2
+    for year_range in [None, (2000, 2010), (2001, 2001), (2003, 2002)]:
+        wxdset.get_monthly_normals(year_range)
+        wxdset.get_yearly_normals(year_range)
+    assert spy.call_count == 2
+
+    # The cached values must not be modified by the caller.
+    monthly.insert(0, 'Year', 0)
+    assert 'Year' not in wxdset.get_monthly_values().columns
+
+    monthly = wxdset.get_monthly_values()
+    years = monthly.index.get_level_values(0)
+    year_range = (years.min() + 1, years.max())
+    expected = (monthly[(years >= year_range[0]) & (years <= year_range[1])]
+                .groupby(level='Month').mean())
+    normals = wxdset.get_monthly_normals(year_range)
+    assert list(normals.index) == list(expected.index)
+    assert list(normals.columns) == list(expected.columns)
+    np.testing.assert_allclose(normals.values, expected.values)
+
+    yearly = yearly.loc[year_range[0]:year_range[1]]
+    normals = wxdset.get_yearly_normals(year_range)
+    np.testing.assert_allclose(normals.values, yearly.mean().values)
+
+    # A year range without data should return no monthly normals.
+    assert len(wxdset.get_monthly_normals((1900, 1901))) == 0
+
+    # The cache must be updated when the data of the dataset are replaced.
+    wxdset.data = wxdset.data.copy()
+    wxdset.get_monthly_normals()
+    assert spy.call_count == 4
+
+
 if __name__ == "__main__":
     pytest.main(['-x', __file__, '-v', '-rw'])
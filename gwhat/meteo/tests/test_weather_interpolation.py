@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard library imports
+import os.path as osp
+
+# ---- Third party imports
+import numpy as np
+import pytest
+
+# ---- Local library imports
+from gwhat import __rootdir__
+from gwhat.common.utils import calc_dist_from_coord
+import gwhat.meteo.weather_interpolation as weather_interpolation
+from gwhat.meteo.weather_reader import WXDataFrame, METEO_VARIABLES
+from gwhat.meteo.weather_interpolation import WeatherInterpolator
+
+DATADIR = osp.join(__rootdir__, 'tests', 'data')
+WXFILENAMES = ["IBERVILLE (7023270)_2000-2015.out",
+               "L'ACADIE (702LED4)_2000-2015.out",
+               "MARIEVILLE (7024627)_2000-2015.out"]
+
+
+# ---- Pytest Fixtures
+@pytest.fixture(scope='module')
+def wxdsets():
+    return [WXDataFrame(osp.join(DATADIR, fname)) for fname in WXFILENAMES]
+
+
+# ---- Tests
+def test_interpolate_at_station(wxdsets):
+    """
+    Test that the weather data interpolated at the location of a station
+    are the data of that station.
+    """
+    interpolator = WeatherInterpolator(wxdsets)
+    for wxdset in wxdsets:
+        interp_wxdset = interpolator.get_wxdset(
+            wxdset.metadata['Latitude'], wxdset.metadata['Longitude'])
+        data = interp_wxdset.data.loc[wxdset.data.index, METEO_VARIABLES]
+        np.testing.assert_allclose(
+            data.values, wxdset.data[METEO_VARIABLES].values)
+        for var in METEO_VARIABLES:
+            assert set(interp_wxdset.missing_value_indexes[var]) == set(
+                wxdset.missing_value_indexes[var])
+
+
+def test_inverse_distance_weighting(wxdsets, mocker):
+    """
+    Test that the weather data are interpolated as expected with an inverse
+    distance weighting, that the weights are cached for each location and
+    that interpolating many locations at once gives the same results.
+    """
+    lat = np.mean([wxdset.metadata['Latitude'] for wxdset in wxdsets])
+    lon = np.mean([wxdset.metadata['Longitude'] for wxdset in wxdsets])
+    dist = np.array([calc_dist_from_coord(
+        lat, lon, wxdset.metadata['Latitude'], wxdset.metadata['Longitude'])
+        for wxdset in wxdsets])
+
+    interpolator = WeatherInterpolator(wxdsets, power=2)
+    data, _ = interpolator.interpolate(lat, lon)
+
+    weights = 1 / dist**2
+    for var in ['Ptot', 'Tavg']:
+        expected = sum(weights[j] * wxdset.data[var] for
+                       j, wxdset in enumerate(wxdsets)) / np.sum(weights)
+        expected = expected.dropna()
+        np.testing.assert_allclose(
+            data.loc[expected.index, var].values, expected.values)
+
+    spy = mocker.spy(weather_interpolation, 'calc_dist_from_coord')
+    coords = [(lat, lon)] + [
+        (wxdset.metadata['Latitude'] + 0.1, wxdset.metadata['Longitude'])
+        for wxdset in wxdsets]
+    results = interpolator.interpolate_many(coords)
+    assert spy.call_count == 3
+    assert results[0][0].equals(data)
+    for (lat, lon), (data, _) in zip(coords[1:], results[1:]):
+        assert interpolator.interpolate(lat, lon)[0].equals(data)
+    assert spy.call_count == 3
+
+
+def test_nearest_stations(wxdsets):
+    """
+    Test that only the data of the nearest station are used when the
+    number of nearest stations is set to 1.
+    """
+    interpolator = WeatherInterpolator(wxdsets, nearest=1)
+    wxdset = wxdsets[1]
+    lat = wxdset.metadata['Latitude'] + 0.01
+    lon = wxdset.metadata['Longitude'] - 0.01
+
+    weights = interpolator.get_weights(lat, lon)
+    assert list(weights) == [0, 1, 0]
+
+    data, _ = interpolator.interpolate(lat, lon)
+    np.testing.assert_allclose(
+        data.loc[wxdset.data.index, METEO_VARIABLES].values,
+        wxdset.data[METEO_VARIABLES].values)
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', __file__, '-v', '-rw'])
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Spatial interpolation of the daily weather data of several stations to
+arbitrary locations, such as the locations of groundwater observation wells.
+"""
+
+# ---- Third party imports
+import numpy as np
+import pandas as pd
+
+# ---- Local library imports
+from gwhat.common.utils import calc_dist_from_coord
+from gwhat.meteo.weather_reader import WXDataFrameBase, METEO_VARIABLES
+
+
+class WXDataFrameInterpolated(WXDataFrameBase):
+    """
+    A daily weather data frame that holds weather data interpolated from
+    the data of several weather stations.
+    """
+
+    def __init__(self, data, metadata, missing_value_indexes,
+                 *args, **kwargs):
+        super(WXDataFrameInterpolated, self).__init__(*args, **kwargs)
+        self.__load_dataset__(data, metadata, missing_value_indexes)
+
+    def __setitem__(self, key, value):
+        raise NotImplementedError
+
+    def __iter__(self):
+        raise NotImplementedError
+
+    def __len__(self, key):
+        raise NotImplementedError
+
+    def __load_dataset__(self, data, metadata, missing_value_indexes):
+        """Load the interpolated data and metadata."""
+        self.metadata.update(metadata)
+        self.data = data
+        self.missing_value_indexes = missing_value_indexes
+
+    @property
+    def name(self):
+        return self.metadata['Station Name']
+
+
+class WeatherInterpolator(object):
+    """
+    Interpolate the daily weather data of a set of weather stations to
+    arbitrary locations with an inverse distance weighting.
+
+    The daily values of each weather variable are stacked in a
+    stations x days matrix, so that the data of all the days of one or more
+    locations are interpolated in a single matrix product. The weights of
+    the stations are cached for each location.
+
+    Parameters
+    ----------
+    wxdsets : list of WXDataFrameBase
+        The weather datasets of the stations to interpolate from.
+    power : float
+        The power of the inverse distance weighting.
+    nearest : int
+        The number of nearest stations that are used to interpolate the
+        data of a location. All the stations are used if None.
+    """
+
+    def __init__(self, wxdsets, power=2, nearest=None):
+        self.power = power
+        self.nearest = nearest
+        self._weights = {}
+
+        self.names = [wxdset.metadata['Station Name'] for wxdset in wxdsets]
+        self.lat = np.array(
+            [wxdset.metadata['Latitude'] for wxdset in wxdsets], dtype=float)
+        self.lon = np.array(
+            [wxdset.metadata['Longitude'] for wxdset in wxdsets], dtype=float)
+        self.elev = np.array(
+            [wxdset.metadata['Elevation'] for wxdset in wxdsets], dtype=float)
+
+        # Stack the data of the stations in a variables x stations x days
+        # array on the union of the daily time indexes of the stations.
+        index = pd.DatetimeIndex([])
+        for wxdset in wxdsets:
+            index = index.union(wxdset.data.index)
+        self.index = index
+
+        self.values = np.full(
+            (len(METEO_VARIABLES), len(wxdsets), len(index)), np.nan)
+        self.observed = np.zeros(self.values.shape, dtype=bool)
+        for j, wxdset in enumerate(wxdsets):
+            indexer = index.get_indexer(wxdset.data.index)
+            self.values[:, j, indexer] = (
+                wxdset.data[METEO_VARIABLES].values.astype(float).T)
+            for i, var in enumerate(METEO_VARIABLES):
+                isobserved = ~np.isnan(self.values[i, j])
+                missing_idx = wxdset.missing_value_indexes.get(var)
+                if missing_idx is not None and len(missing_idx):
+                    indexer = index.get_indexer(missing_idx)
+                    isobserved[indexer[indexer >= 0]] = False
+                self.observed[i, j] = isobserved
+        self.isvalid = ~np.isnan(self.values)
+        self.values[~self.isvalid] = 0
+
+    def __len__(self):
+        return len(self.names)
+
+    def get_weights(self, lat, lon):
+        """
+        Return the normalized inverse distance weights of the stations for
+        the location at the specified latitude and longitude.
+        """
+        key = (float(lat), float(lon))
+        if key not in self._weights:
+            dist = calc_dist_from_coord(lat, lon, self.lat, self.lon)
+            if np.any(dist == 0):
+                # The location is at a station, so we use the data of
+                # that station only.
+                weights = (dist == 0).astype(float)
+            else:
+                weights = 1 / dist**self.power
+            if self.nearest is not None and self.nearest < len(dist):
+                weights[np.argsort(dist)[self.nearest:]] = 0
+            self._weights[key] = weights / np.sum(weights)
+        return self._weights[key]
+
+    def clear_weights_cache(self):
+        """Clear the weights cached for each location."""
+        self._weights = {}
+
+    def interpolate_many(self, coords):
+        """
+        Return the interpolated daily weather data, along with the
+        indexes of the days without observed data, for each location
+        in coords, a list of (latitude, longitude) tuples.
+        """
+        # Stack the weights of the locations in a locations x stations
+        # matrix and interpolate all locations in a single pass.
+        weights = np.array([self.get_weights(lat, lon) for
+                            lat, lon in coords]).reshape(-1, len(self))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = (np.matmul(weights, self.values) /
+                      np.matmul(weights, self.isvalid))
+        isobserved = np.matmul(weights > 0, self.observed)
+
+        results = []
+        for k in range(len(weights)):
+            data = pd.DataFrame(
+                values[:, k, :].T, index=self.index, columns=METEO_VARIABLES)
+            missing_value_indexes = {
+                var: self.index[~isobserved[i, k]] for
+                i, var in enumerate(METEO_VARIABLES)}
+            results.append((data, missing_value_indexes))
+        return results
+
+    def interpolate(self, lat, lon):
+        """
+        Return the interpolated daily weather data, along with the
+        indexes of the days without observed data, for the location at the
+        specified latitude and longitude.
+        """
+        return self.interpolate_many([(lat, lon)])[0]
+
+    def get_wxdset(self, lat, lon, name='Interpolated'):
+        """
+        Return a weather dataset with the daily weather data interpolated
+        at the specified latitude and longitude.
+        """
+        data, missing_value_indexes = self.interpolate(lat, lon)
+        weights = self.get_weights(lat, lon)
+        metadata = {
+            'Station Name': name,
+            'Station ID': '',
+            'Location': '',
+            'Latitude': lat,
+            'Longitude': lon,
+            'Elevation': float(np.sum(weights * self.elev))}
+        return WXDataFrameInterpolated(data, metadata, missing_value_indexes)
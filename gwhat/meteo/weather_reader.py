@@ -10,7 +10,6 @@
 
 # ---- Standard library imports
 import csv
-import datetime as dt
 import os
 import os.path as osp
 import re
@@ -24,12 +23,13 @@ import numpy as np
 import pandas as pd
 from pandas.errors import EmptyDataError
 import xlrd
-from xlrd.xldate import xldate_as_datetime
 
 # ---- Local library imports
 from gwhat.meteo.evapotranspiration import calcul_thornthwaite
 from gwhat.common.utils import save_content_to_file
-from gwhat.utils.math import nan_as_text_tolist
+from gwhat.utils.dates import datetimeindex_to_xldates
+from gwhat.utils.parsecache import (
+    is_parse_cache_enabled, load_from_parse_cache, save_to_parse_cache)
 from gwhat import __namever__
 
 
@@ -63,12 +63,22 @@ class WXDataFrameBase(Mapping):
         self.data = pd.DataFrame([], columns=METEO_VARIABLES)
         self.missing_value_indexes = {
             var: pd.DatetimeIndex([]) for var in METEO_VARIABLES}
+        self._aggregates = None
+
+    def __getitem__(self, key):
+        """Return the daily values of the specified weather variable."""
+        return self.data[key]
 
     @abstractmethod
     def __load_dataset__(self):
         """Loads the dataset and save it in a store."""
         pass
 
+    @property
+    def index(self):
+        """Return the datetime indexes of the daily weather data."""
+        return self.data.index
+
     def export_dataset_to_file(self, filename, time_frame):
         """
         Exports the dataset to file using a daily, monthly or yearly format.
@@ -108,7 +118,7 @@ class WXDataFrameBase(Mapping):
                     ]
         fcontent.append(
             [VARLABELS_MAP.get(col, col) for col in data.columns])
-        fcontent.extend(nan_as_text_tolist(data.values))
+        fcontent.append(data)
         save_content_to_file(filename, fcontent)
 
     def get_data_period(self):
@@ -116,16 +126,14 @@ class WXDataFrameBase(Mapping):
         Return the year range for which data are available for this
         dataset.
         """
-        return (self.data.index.min().year, self.data.index.max().year)
+        return (self.index.min().year, self.index.max().year)
 
     def get_xldates(self):
         """
         Return a numpy array containing the Excel numerical dates
         corresponding to the dates of the dataset.
         """
-        timedeltas = self.data.index - xldate_as_datetime(4000, 0)
-        xldates = timedeltas.total_seconds() / (3600 * 24) + 4000
-        return xldates.values
+        return datetimeindex_to_xldates(self.index)
 
     # ---- utilities
     def strftime(self):
@@ -133,71 +141,142 @@ class WXDataFrameBase(Mapping):
         Return a list of formatted strings corresponding to the datetime
         indexes of this dataset.
         """
-        return self.data.index.strftime("%Y-%m-%dT%H:%M:%S").values.tolist()
+        return self.index.strftime("%Y-%m-%dT%H:%M:%S").values.tolist()
 
     # ---- Monthly and yearly values
-    def get_monthly_values(self):
+    def _get_aggregates(self):
         """
-        Return the monthly mean or cummulative values for the weather
-        variables saved in this data frame.
+        Return the monthly and yearly values of the dataset, along with the
+        prefix sums over the years that are used to compute the normals.
+
+        These are computed only once for a given data frame and are cached.
+        Call clear_aggregates_cache if the data frame is modified in place.
         """
+        if (self._aggregates is not None and
+                self._aggregates['data'] is self.data):
+            return self._aggregates
+
         group = self.data.groupby(
             [self.data.index.year, self.data.index.month])
-        df = pd.concat(
+        monthly = pd.concat(
+            [group[['Ptot', 'Rain', 'Snow', 'PET']].sum(),
+             group[['Tmax', 'Tavg', 'Tmin']].mean()],
+            axis=1)
+        monthly.index.rename(['Year', 'Month'], inplace=True)
+
+        group = self.data.groupby(self.data.index.year)
+        yearly = pd.concat(
             [group[['Ptot', 'Rain', 'Snow', 'PET']].sum(),
              group[['Tmax', 'Tavg', 'Tmin']].mean()],
             axis=1)
-        df.index.rename(['Year', 'Month'], inplace=True)
-        return df
+        yearly.index.rename('Year', inplace=True)
+
+        # Stack the monthly values in a years x months x variables array
+        # and compute the prefix sums and counts of the monthly and yearly
+        # values over the years.
+        years = yearly.index.values
+        monthly_array = np.full(
+            (len(years), 12, len(monthly.columns)), np.nan)
+        monthly_array[
+            np.searchsorted(years, monthly.index.get_level_values(0)),
+            monthly.index.get_level_values(1) - 1] = monthly.values
+
+        def prefix_sums(values):
+            isvalid = ~np.isnan(values)
+            zeros = np.zeros((1,) + values.shape[1:])
+            return (
+                np.concatenate([zeros, np.cumsum(
+                    np.where(isvalid, values, 0), axis=0)]),
+                np.concatenate([zeros, np.cumsum(isvalid, axis=0)]))
+
+        self._aggregates = {
+            'data': self.data,
+            'monthly': monthly,
+            'yearly': yearly,
+            'years': years,
+            'monthly_prefix_sums': prefix_sums(monthly_array),
+            'yearly_prefix_sums': prefix_sums(yearly.values)}
+        return self._aggregates
+
+    def clear_aggregates_cache(self):
+        """Clear the cached monthly and yearly values of the dataset."""
+        self._aggregates = None
+
+    def get_monthly_values(self):
+        """
+        Return the monthly mean or cummulative values for the weather
+        variables saved in this data frame.
+        """
+        return self._get_aggregates()['monthly'].copy()
 
     def get_yearly_values(self):
         """
         Return the yearly mean or cummulative values for the weather
         variables saved in this data frame.
         """
-        group = self.data.groupby(self.data.index.year)
-        df = pd.concat(
-            [group[['Ptot', 'Rain', 'Snow', 'PET']].sum(),
-             group[['Tmax', 'Tavg', 'Tmin']].mean()],
-            axis=1)
-        df.index.rename('Year', inplace=True)
-        return df
+        return self._get_aggregates()['yearly'].copy()
 
     # ---- Normals
+    def _get_normals_from_prefix_sums(self, key, year_range):
+        """
+        Return the mean of the monthly or yearly values over year_range
+        computed from their prefix sums over the years, along with the
+        number of values used to compute the means.
+        """
+        aggregates = self._get_aggregates()
+        sums, counts = aggregates[key]
+        if year_range:
+            i0 = np.searchsorted(aggregates['years'], year_range[0], 'left')
+            i1 = np.searchsorted(aggregates['years'], year_range[1], 'right')
+            i1 = max(i0, i1)
+        else:
+            i0, i1 = 0, len(aggregates['years'])
+        count = counts[i1] - counts[i0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (sums[i1] - sums[i0]) / count, count
+
     def get_monthly_normals(self, year_range=None):
         """
         Return the monthly normals for the weather variables saved in this
         data frame.
         """
-        df = self.get_monthly_values()
-        if year_range:
-            df = df.loc[(df.index.get_level_values(0) >= year_range[0]) &
-                        (df.index.get_level_values(0) <= year_range[1])]
-        df = df.groupby(level=[1]).mean()
-        df.index.rename('Month', inplace=True)
-        return df
+        normals, count = self._get_normals_from_prefix_sums(
+            'monthly_prefix_sums', year_range)
+        df = pd.DataFrame(
+            normals, index=pd.Index(np.arange(1, 13), name='Month'),
+            columns=self._get_aggregates()['monthly'].columns)
+
+        # Months without any data in the year range are not included.
+        return df[count.max(axis=1) > 0]
 
     def get_yearly_normals(self, year_range=None):
         """
         Return the yearly normals for the weather variables saved in this
         data frame.
         """
-        df = self.get_yearly_values()
-        if year_range:
-            df = df.loc[(df.index >= year_range[0]) &
-                        (df.index <= year_range[1])]
-        return df.mean()
+        normals, count = self._get_normals_from_prefix_sums(
+            'yearly_prefix_sums', year_range)
+        return pd.Series(
+            normals, index=self._get_aggregates()['yearly'].columns)
 
 
 class WXDataFrame(WXDataFrameBase):
-    """A daily weather dataset container that loads its data from a file."""
+    """
+    A daily weather dataset container that loads its data from a file.
 
-    def __init__(self, filename, *args, **kwargs):
-        super(WXDataFrame, self).__init__(*args, **kwargs)
-        self.__load_dataset__(filename)
+    If use_cache is True, the parsed and post-processed data are read
+    from and saved to the binary parse cache. If use_cache is None, the
+    cache is used only if it is enabled in the configs.
+    """
 
-    def __getitem__(self, key):
-        raise NotImplementedError
+    def __init__(self, filename, *args, use_cache=None, **kwargs):
+        super(WXDataFrame, self).__init__(*args, **kwargs)
+        if use_cache is None:
+            use_cache = is_parse_cache_enabled()
+        if use_cache:
+            self.__load_dataset_from_cache__(filename)
+        else:
+            self.__load_dataset__(filename)
 
     def __setitem__(self, key, value):
         raise NotImplementedError
@@ -211,6 +290,29 @@ class WXDataFrame(WXDataFrameBase):
     def __str__(self):
         return self.data.__str__()
 
+    def __load_dataset_from_cache__(self, filename):
+        """
+        Loads the dataset from the parse cache if it is available, else
+        loads it from the file and saves it in the cache.
+        """
+        dependencies = (osp.splitext(filename)[0] + '.log',)
+        content = load_from_parse_cache(
+            'weather', filename, dependencies)
+        if content is not None:
+            print('Weather data for "%s" loaded from the cache.' %
+                  os.path.basename(filename))
+            self.metadata = content['metadata']
+            self.data = content['data']
+            self.missing_value_indexes = content['missing_value_indexes']
+        else:
+            self.__load_dataset__(filename)
+            save_to_parse_cache(
+                'weather', filename,
+                {'metadata': self.metadata,
+                 'data': self.data,
+                 'missing_value_indexes': self.missing_value_indexes},
+                dependencies)
+
     def __load_dataset__(self, filename):
         """Loads the dataset from a file and saves it in the store."""
         print('-' * 78)
@@ -228,10 +330,11 @@ class WXDataFrame(WXDataFrameBase):
                           ('Tmin', 'Min Temp (deg C)'),
                           ('Tavg', 'Mean Temp (deg C)'),
                           ('Ptot', 'Total Precip (mm)')]
+            filled_indexes = read_weather_log(finfo)
             for var, label in var_labels:
                 self.missing_value_indexes[var] = (
                     self.missing_value_indexes[var]
-                    .append(load_weather_log(finfo, label))
+                    .append(filled_indexes.get(label, pd.DatetimeIndex([])))
                     .drop_duplicates()
                     )
 
@@ -280,6 +383,10 @@ def read_weather_datafile(filename):
     """
     Read the weather data from the provided filename.
 
+    The numerical data of csv files are parsed in bulk with the C parser
+    of pandas. The slower Python parser is used only if this fails, for
+    example when the file contains rows that are longer than the header.
+
     Parameters
     ----------
     filename : str
@@ -296,17 +403,51 @@ def read_weather_datafile(filename):
     # Read the file.
     root, ext = osp.splitext(filename)
     if ext in ['.csv', '.out']:
+        # Only the rows of the header are read with the csv reader.
         with open(filename, 'r') as csvfile:
-            data = list(csv.reader(csvfile, delimiter=','))
+            i, columns = _read_weather_header(
+                csv.reader(csvfile, delimiter=','), metadata)
+        try:
+            data = _read_weather_csv_data(filename, i, columns)
+        except (ValueError, pd.errors.ParserError):
+            with open(filename, 'r') as csvfile:
+                data = list(csv.reader(csvfile, delimiter=','))
+            data = _format_weather_data(data[i + 1:], columns)
     elif ext in ['.xls', '.xlsx']:
         data = pd.read_excel(filename, dtype='str', header=None)
         data = data.values.tolist()
+        i, columns = _read_weather_header(data, metadata)
+        data = _format_weather_data(data[i + 1:], columns)
     else:
         raise ValueError("Supported file format are: ",
                          ['.csv', '.out', '.xls', '.xlsx'])
 
-    # Read the metadata and try to find the row where the
-    # numerical data begin.
+    # We now create the time indexes for the dataframe form the year,
+    # month, and day data.
+    data = data.set_index(pd.to_datetime(dict(
+        year=data['Year'], month=data['Month'], day=data['Day'])))
+    data = data.drop(labels=['Year', 'Month', 'Day'], axis=1)
+    data.index.names = ['Datetime']
+
+    # We print some comment if optional data was loaded from the file.
+    if 'PET' in data.columns:
+        print('Potential evapotranspiration imported from datafile.')
+    if 'Rain' in data.columns:
+        print('Rain data imported from datafile.')
+    if 'Snow' in data.columns:
+        print('Snow data imported from datafile.')
+
+    return metadata, data
+
+
+def _read_weather_header(rows, metadata):
+    """
+    Read the metadata from the rows of a weather datafile and find the
+    row where the numerical data begin.
+
+    Return the index of the row containing the labels of the data columns
+    and the labels of the data columns.
+    """
     header_regex_type = {
         'Station Name': (r'(stationname|name)', str),
         'Station ID': (r'(stationid|id|climateidentifier)', str),
@@ -314,7 +455,7 @@ def read_weather_datafile(filename):
         'Longitude': (r'(longitude)', float),
         'Location': (r'(location|province)', str),
         'Elevation': (r'(elevation|altitude)', float)}
-    for i, row in enumerate(data):
+    for i, row in enumerate(rows):
         if len(row) == 0 or pd.isnull(row[0]):
             continue
 
@@ -329,20 +470,21 @@ def read_weather_datafile(filename):
                     break
         else:
             if re.search(r'(year)', label, re.IGNORECASE):
-                break
-    else:
-        raise ValueError("Cannot find the beginning of the data.")
+                return i, row
+    raise ValueError("Cannot find the beginning of the data.")
 
-    # Extract and format the numerical data from the file.
-    data = pd.DataFrame(data[i + 1:], columns=data[i])
-    data = data.replace(r'(?i)^\s*$|nan|none', np.nan, regex=True)
-
-    # The data must contain the following columns :
-    # (1) Tmax, (2) Tavg, (3) Tmin, (4) Ptot.
-    # The dataframe can also have these optional columns:
-    # (5) Rain, (6) Snow, (7) PET
-    # The dataframe must use a datetime index.
 
+def _map_weather_columns(columns):
+    """
+    Return an ordered dict that maps the indexes of the columns of a
+    weather datafile to the names of the variables used in GWHAT.
+    Columns that are not recognized are not included.
+
+    The data must contain the following columns :
+    (1) Tmax, (2) Tavg, (3) Tmin, (4) Ptot.
+    The dataframe can also have these optional columns:
+    (5) Rain, (6) Snow, (7) PET
+    """
     column_names_regexes = OrderedDict([
         ('Year', r'(year)'),
         ('Month', r'(month)'),
@@ -354,14 +496,42 @@ def read_weather_datafile(filename):
         ('PET', r'(etp|evapo)'),
         ('Rain', r'(rain)'),
         ('Snow', r'(snow)')])
-    for i, column in enumerate(data.columns):
+    column_map = OrderedDict()
+    for i, column in enumerate(columns):
+        if pd.isnull(column):
+            continue
         column_ = column.replace(" ", "").replace("_", "")
         for key, regex in column_names_regexes.items():
             if re.search(regex, column_, re.IGNORECASE):
-                data = data.rename(columns={column: key})
+                column_map[i] = key
                 break
-        else:
-            data = data.drop([column], axis=1)
+    return column_map
+
+
+def _read_weather_csv_data(filename, i, columns):
+    """
+    Read the numerical data of a csv weather datafile in bulk with the
+    C parser of pandas, starting after the row i that contains the labels
+    of the data columns.
+    """
+    column_map = _map_weather_columns(columns)
+    data = pd.read_csv(
+        filename, sep=',', header=None, skiprows=i + 1, engine='c',
+        usecols=list(column_map.keys()),
+        dtype={index: 'float64' for index in column_map.keys()},
+        na_values=['none', 'None', 'NONE', 'NAN'], skipinitialspace=True)
+    return data.rename(columns=column_map)[list(column_map.values())]
+
+
+def _format_weather_data(data, columns):
+    """
+    Format the data of a weather datafile that were read as a list of
+    rows of strings.
+    """
+    column_map = _map_weather_columns(columns)
+    data = pd.DataFrame(data, columns=range(len(columns)))
+    data = data[list(column_map.keys())].rename(columns=column_map)
+    data = data.replace(r'(?i)^\s*$|nan|none', np.nan, regex=True)
 
     for col in data.columns:
         try:
@@ -370,49 +540,47 @@ def read_weather_datafile(filename):
             data[col] = pd.to_numeric(data[col], errors='coerce')
             print("Some {} data could not be converted to numeric value"
                   .format(col))
+    return data
 
-    # We now create the time indexes for the dataframe form the year,
-    # month, and day data.
-    data = data.set_index(pd.to_datetime(dict(
-        year=data['Year'], month=data['Month'], day=data['Day'])))
-    data = data.drop(labels=['Year', 'Month', 'Day'], axis=1)
-    data.index.names = ['Datetime']
 
-    # We print some comment if optional data was loaded from the file.
-    if 'PET' in data.columns:
-        print('Potential evapotranspiration imported from datafile.')
-    if 'Rain' in data.columns:
-        print('Rain data imported from datafile.')
-    if 'Snow' in data.columns:
-        print('Snow data imported from datafile.')
-
-    return metadata, data
-
-
-def open_weather_log(fname):
+def read_weather_log(fname):
     """
-    Open the csv file and try to guess the delimiter.
-    Return None if this fails.
+    Read the detailed report of a gapfill log file in a single pass and
+    return a dict with the datetime indexes of the filled values for each
+    of the variables listed in the report.
+
+    The delimiter of the file is guessed from its first line. Return an
+    empty dict if the file is not formatted correctly.
     """
+    with open(fname, 'r') as f:
+        first_line = f.readline()
     for dlm in [',', '\t']:
-        with open(fname, 'r') as f:
-            reader = list(csv.reader(f, delimiter=dlm))
-            if reader[0][0] == 'Station Name':
-                return reader[36:]
+        if first_line.split(dlm)[0].strip() == 'Station Name':
+            break
     else:
-        return None
-
-
-def load_weather_log(fname, varname):
-    reader = open_weather_log(fname)
-    datetimes = []
-    for i in range(len(reader)):
-        if reader[i][0] == varname:
-            year = int(float(reader[i][1]))
-            month = int(float(reader[i][2]))
-            day = int(float(reader[i][3]))
-            datetimes.append(dt.datetime(year, month, day))
-    return pd.DatetimeIndex(datetimes)
+        return {}
+
+    try:
+        report = pd.read_csv(
+            fname, sep=dlm, header=None, skiprows=36, usecols=[0, 1, 2, 3],
+            names=['variable', 'year', 'month', 'day'], engine='c',
+            dtype={'variable': str})
+    except EmptyDataError:
+        return {}
+    except pd.errors.ParserError:
+        # The rows of the report are not all of the same length.
+        with open(fname, 'r') as f:
+            report = pd.DataFrame(
+                [row[:4] for row in csv.reader(f, delimiter=dlm)][36:],
+                columns=['variable', 'year', 'month', 'day'])
+    report = report.dropna()
+
+    datetimes = pd.to_datetime(dict(
+        year=report['year'].astype(float).astype(int),
+        month=report['month'].astype(float).astype(int),
+        day=report['day'].astype(float).astype(int)))
+    return {variable: pd.DatetimeIndex(group.values) for
+            variable, group in datetimes.groupby(report['variable'].values)}
 
 
 # ----- Base functions: secondary variables
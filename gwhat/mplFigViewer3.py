@@ -13,12 +13,26 @@
 # Tookit by Trolltech AS, licensed under the terms of the GNU General Public
 # License version 2.0 as published by the Free Software Foundation.
 
+# ---- Standard library imports
+from collections import OrderedDict
+from math import ceil, log2
+
+# ---- Third party imports
 from PyQt5.QtCore import Qt, pyqtSignal, QEvent, QRect
 from PyQt5.QtGui import QImage, QPixmap, QPainter
 from PyQt5.QtWidgets import QFrame, QScrollArea, QApplication, QWidget
 
 
 class FigureCanvas(QFrame):
+    """
+    A frame that paints a matplotlib figure from a pyramid of rasterized
+    images of increasing resolution.
+
+    The figure is rasterized at the resolution that is required for the
+    current zoom level only when needed. The painted image is split in tiles
+    of fixed size, that are scaled to the display resolution only when they
+    become visible and that are kept in a least recently used cache.
+    """
 
     def __init__(self, parent=None):
         super(FigureCanvas, self).__init__(parent)
@@ -27,12 +41,26 @@ class FigureCanvas(QFrame):
         self.setMidLineWidth(1)
         self.setStyleSheet("background-color: white")
 
-        self.img = []
-        self.qpix_buff = []
+        self.tile_size = 256
+        self.max_tiles = 256
+        self.max_level = 2
 
-    def load_mpl_figure(self, mplfig, view_dpi):
+        self.mplfig = None
+        self.view_dpi = 150
+        self.fwidth = 0
+        self.fheight = 0
+        self.levels = {}
+        self.tiles = OrderedDict()
 
-        self.qpix_buff = []
+    def load_mpl_figure(self, mplfig, view_dpi):
+        """
+        Load the matplotlib figure and rasterize it at the view_dpi
+        resolution. The images at higher resolutions and the tiles are
+        discarded and will be produced again only when needed.
+        """
+        self.mplfig = mplfig
+        self.view_dpi = view_dpi
+        self.tiles.clear()
 
         # ---------------------------------------------------- figure size ----
 
@@ -40,6 +68,11 @@ class FigureCanvas(QFrame):
         self.fwidth = bbox.width
         self.fheight = bbox.height
 
+        self.levels = {0: self.render_mpl_figure(view_dpi)}
+
+    def render_mpl_figure(self, dpi):
+        """Rasterize the matplotlib figure at the specified dpi."""
+
         # ------------------------------------------ save figure to buffer ----
 
         # http://stackoverflow.com/questions/8598673/
@@ -49,17 +82,18 @@ class FigureCanvas(QFrame):
         # http://stackoverflow.com/questions/1300908/
         # load-blob-image-data-into-qpixmap
 
-        # Scale dpi of figure to view_dpi
+        # Scale dpi of figure to dpi
 
+        mplfig = self.mplfig
         orig_fig_dpi = mplfig.get_dpi()
-        mplfig.dpi = view_dpi
+        mplfig.dpi = dpi
 
         # Propagate changes to renderer :
 
         mplfig.canvas.draw()
         renderer = mplfig.canvas.get_renderer()
         orig_ren_dpi = renderer.dpi
-        renderer.dpi = view_dpi
+        renderer.dpi = dpi
 
         # Generate img buffer :
 
@@ -72,15 +106,63 @@ class FigureCanvas(QFrame):
         renderer.dpi = orig_ren_dpi
         mplfig.dpi = orig_fig_dpi
 
-        # Convert buffer to QPixmap :
+        # Convert buffer to QImage. Note that rgbSwapped returns a copy of
+        # the image, so that it does not depend on the buffer of the
+        # matplotlib canvas.
 
-        self.img = QImage(imgbuf, imgwidth, imgheight, QImage.Format_ARGB32)
-        self.img = QImage.rgbSwapped(self.img)
-        self.img = QPixmap(self.img)
+        img = QImage(imgbuf, imgwidth, imgheight, QImage.Format_ARGB32)
+        return QImage.rgbSwapped(img)
+
+    def get_level(self, width):
+        """
+        Return the index of the image of the pyramid with the lowest
+        resolution that can be displayed at the specified width without
+        being upscaled, rasterizing it first if needed.
+        """
+        base_width = self.levels[0].width()
+        if width <= base_width:
+            level = 0
+        else:
+            level = min(ceil(log2(width / base_width)), self.max_level)
+        if level not in self.levels:
+            self.levels[level] = self.render_mpl_figure(
+                self.view_dpi * 2**level)
+        return level
+
+    def get_tile(self, width, height, i, j):
+        """
+        Return the pixmap of the tile at row i and column j of the image
+        displayed at the specified width and height.
+        """
+        key = (width, height, i, j)
+        if key in self.tiles:
+            self.tiles.move_to_end(key)
+            return self.tiles[key]
+
+        img = self.levels[self.get_level(width)]
+        fx = img.width() / width
+        fy = img.height() / height
+
+        x0 = j * self.tile_size
+        y0 = i * self.tile_size
+        x1 = min(x0 + self.tile_size, width)
+        y1 = min(y0 + self.tile_size, height)
+        src_rect = QRect(int(x0 * fx), int(y0 * fy),
+                         max(int(x1 * fx) - int(x0 * fx), 1),
+                         max(int(y1 * fy) - int(y0 * fy), 1))
+        tile = QPixmap(img.copy(src_rect).scaled(
+            x1 - x0, y1 - y0, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+
+        self.tiles[key] = tile
+        while len(self.tiles) > self.max_tiles:
+            self.tiles.popitem(last=False)
+        return tile
 
     def paintEvent(self, event):
         """Qt method override to paint a custom image on the Widget."""
         super(FigureCanvas, self).paintEvent(event)
+        if not self.levels:
+            return
 
         qp = QPainter()
         qp.begin(self)
@@ -91,24 +173,22 @@ class FigureCanvas(QFrame):
         rect = QRect(0 + fw, 0 + fw,
                      self.size().width() - 2 * fw,
                      self.size().height() - 2 * fw)
-
-        # Check/update image buffer :
-
-        qpix2print = None
-        for qpix in self.qpix_buff:
-            if qpix.size().width() == rect.width():
-                qpix2print = qpix
-                break
-
-        if qpix2print is None:
-            qpix2print = self.img.scaledToWidth(
-                rect.width(), mode=Qt.SmoothTransformation)
-            self.qpix_buff.append(qpix2print)
-
-        # Draw pixmap :
-
-#        qp.setRenderHint(QPainter.Antialiasing, True)
-        qp.drawPixmap(rect, qpix2print)
+        width = rect.width()
+        height = rect.height()
+
+        # Paint only the tiles that intersect the region to update :
+
+        region = event.rect().intersected(rect).translated(-fw, -fw)
+        if width > 0 and height > 0 and not region.isEmpty():
+            jmin = region.left() // self.tile_size
+            jmax = min(region.right(), width - 1) // self.tile_size
+            imin = region.top() // self.tile_size
+            imax = min(region.bottom(), height - 1) // self.tile_size
+            for i in range(imin, imax + 1):
+                for j in range(jmin, jmax + 1):
+                    qp.drawPixmap(fw + j * self.tile_size,
+                                  fw + i * self.tile_size,
+                                  self.get_tile(width, height, i, j))
 
         qp.end()
 
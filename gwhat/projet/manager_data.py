@@ -32,9 +32,14 @@ from gwhat.common.utils import calc_dist_from_coord
 from gwhat.projet.reader_waterlvl import WLDataFrame
 from gwhat.projet.reader_projet import INVALID_CHARS, is_dsetname_valid
 from gwhat.meteo.weather_reader import WXDataFrame
+from gwhat.meteo.weather_interpolation import WeatherInterpolator
 from gwhat.widgets.buttons import ToolBarWidget
 from gwhat.widgets.spinboxes import StrSpinBox
 
+# The name of the weather dataset interpolated from all the weather
+# datasets of the project at the location of the current well.
+INTERPOLATED_WXDSET = 'Interpolated at well'
+
 
 class DataManager(QWidget):
 
@@ -50,6 +55,7 @@ class DataManager(QWidget):
 
         self._wldset = None
         self._wxdset = None
+        self._wxinterpolator = None
 
         self.setWindowFlags(Qt.Window)
         self.setWindowIcon(icons.get_icon('master'))
@@ -185,6 +191,7 @@ class DataManager(QWidget):
         self._projet = projet
         self._wldset = None
         self._wxdset = None
+        self._wxinterpolator = None
         if projet is not None:
             self.update_wldsets(projet.get_last_opened_wldset())
             self.update_wxdsets(projet.get_last_opened_wxdset())
@@ -301,6 +308,10 @@ class DataManager(QWidget):
         QApplication.processEvents()
         self.update_wldset_info()
         self.wldsetChanged.emit(self.get_current_wldset())
+        if self.wxdsets_cbox.currentText() == INTERPOLATED_WXDSET:
+            # The weather data need to be interpolated at the location of
+            # the new well.
+            self.wxdset_changed()
 
     def get_current_wldset(self):
         """Return the currently selected water level dataset."""
@@ -338,6 +349,23 @@ class DataManager(QWidget):
                 "<font color=black>Water level dataset <i>{}</i> deleted "
                 "successfully.</font>").format(dsetname))
 
+    def delete_wldsets_outliers(self, **kwargs):
+        """
+        Delete the spikes and flat lines of all the water level datasets of
+        the project and return a dict with the datasets, so that the deleted
+        outliers can be reviewed and either undone or commited.
+
+        The outliers of the current water level dataset are deleted in the
+        dataset that is held by this manager, so that they are shown in the
+        tools that use it. The keyword arguments are passed to
+        WLDataFrameBase.find_outliers.
+        """
+        wldset = self.get_current_wldset()
+        wldsets = self.projet.delete_wldsets_outliers(
+            None if wldset is None else {wldset.name: wldset}, **kwargs)
+        self.wldset_changed()
+        return wldsets
+
     # ---- WX Dataset
     @property
     def wxdsets(self):
@@ -390,9 +418,12 @@ class DataManager(QWidget):
         print("done")
 
     def update_wxdsets(self, name=None, silent=False):
+        self._wxinterpolator = None
         self.wxdsets_cbox.blockSignals(True)
         self.wxdsets_cbox.clear()
         self.wxdsets_cbox.addItems(self.projet.wxdsets)
+        if len(self.projet.wxdsets) > 1:
+            self.wxdsets_cbox.addItem(INTERPOLATED_WXDSET)
         if name:
             self.wxdsets_cbox.setCurrentIndex(self.wxdsets_cbox.findText(name))
         self.wxdsets_cbox.blockSignals(False)
@@ -422,6 +453,9 @@ class DataManager(QWidget):
         """Delete the currently selected weather dataset."""
         if self.wxdsets_cbox.count() > 0:
             dsetname = self.wxdsets_cbox.currentText()
+            if dsetname == INTERPOLATED_WXDSET:
+                # The interpolated dataset is not saved in the project.
+                return
             if self._confirm_before_deleting_dset:
                 reply, dont_show_again = self.confirm_del_dataset(
                     dsetname, 'weather')
@@ -443,10 +477,27 @@ class DataManager(QWidget):
             self._wxdset = None
         else:
             cbox_text = self.wxdsets_cbox.currentText()
-            if self._wxdset is None or self._wxdset.name != cbox_text:
+            if cbox_text == INTERPOLATED_WXDSET:
+                wldset = self.get_current_wldset()
+                if (self._wxdset is None or
+                        self._wxdset.name != cbox_text or
+                        wldset is None or
+                        self._wxdset.metadata['Latitude'] !=
+                        wldset['Latitude'] or
+                        self._wxdset.metadata['Longitude'] !=
+                        wldset['Longitude']):
+                    self._wxdset = self.get_interpolated_wxdset()
+            elif self._wxdset is None or self._wxdset.name != cbox_text:
                 self._wxdset = self.projet.get_wxdset(cbox_text)
         return self._wxdset
 
+    def is_wxdset_selectable(self, name):
+        """
+        Return whether the weather dataset with the specified name can be
+        selected in the data manager.
+        """
+        return name is not None and self.wxdsets_cbox.findText(name) != -1
+
     def set_current_wxdset(self, name):
         """Set the current weather dataset from its name."""
         self.wxdsets_cbox.blockSignals(True)
@@ -470,6 +521,36 @@ class DataManager(QWidget):
         self.set_current_wxdset(closest_station)
         return closest_station
 
+    def get_interpolator(self, power=2, nearest=None):
+        """
+        Return an interpolator of the daily weather data of all the weather
+        datasets of the project. The interpolator is cached until the
+        weather datasets of the project change.
+        """
+        if self.wxdataset_count() == 0:
+            return None
+        if (self._wxinterpolator is None or
+                self._wxinterpolator.power != power or
+                self._wxinterpolator.nearest != nearest):
+            self._wxinterpolator = WeatherInterpolator(
+                self.projet.get_wxdsets(), power, nearest)
+        return self._wxinterpolator
+
+    def get_interpolated_wxdset(self, power=2, nearest=None):
+        """
+        Return a weather dataset with the daily weather data of all the
+        weather datasets of the project interpolated at the location of the
+        groundwater observation well with an inverse distance weighting.
+
+        This dataset can be selected in the data manager with the other
+        weather datasets when the project contains more than one of them.
+        """
+        if self._wldset is None or self.wxdataset_count() == 0:
+            return None
+        return self.get_interpolator(power, nearest).get_wxdset(
+            self._wldset['Latitude'], self._wldset['Longitude'],
+            name=INTERPOLATED_WXDSET)
+
     def show_weather_normals(self):
         """Show the weather normals for the current weather dataset."""
         if self.get_current_wxdset() is None:
@@ -11,7 +11,9 @@ from __future__ import division, unicode_literals
 # ---- Standard library imports
 import os
 import os.path as osp
+from collections.abc import Mapping
 from shutil import copyfile
+import warnings
 
 # ---- Third party imports
 import h5py
@@ -21,14 +23,22 @@ import datetime
 
 # ---- Local library imports
 from gwhat.meteo.weather_reader import WXDataFrameBase, METEO_VARIABLES
-from gwhat.projet.reader_waterlvl import WLDataFrameBase, WLDataset
+from gwhat.meteo.evapotranspiration import calcul_thornthwaite
+from gwhat.projet.reader_waterlvl import (
+    WLDataFrameBase, WLDataset, find_waterlvl_measures_file,
+    init_waterlvl_measures, read_waterlvl_measures)
 from gwhat.gwrecharge.glue import GLUEDataFrameBase
 from gwhat.common.utils import save_content_to_file
-from gwhat.utils.math import nan_as_text_tolist, calcul_rmse
-from gwhat.utils.dates import xldates_to_datetimeindex, xldates_to_strftimes
+from gwhat.utils.math import calcul_rmse, find_index_ranges
+from gwhat.utils.dates import (
+    datetimeindex_to_xldates, xldates_to_datetimeindex, xldates_to_strftimes)
 
 INVALID_CHARS = ['\\', '/', ':', '*', '?', '"', '<', '>', '|']
 
+# The changed water level values that are separated by this number of
+# unchanged values or less are written to the project in a single block.
+COMMIT_MAXGAP = 1024
+
 
 class ProjetReader(object):
     def __init__(self, filename):
@@ -229,14 +239,15 @@ class ProjetReader(object):
             # Water level data
             grp.create_dataset(
                 'Time',
-                data=np.array(df['Time'], dtype=h5py.special_dtype(vlen=str)))
+                data=np.array(df['Time'], dtype=h5py.special_dtype(vlen=str)),
+                maxshape=(None,))
             # See http://docs.h5py.org/en/latest/strings.html as to why this
             # is necessary to do this in order to save a list of strings in
             # a dataset with h5py.
 
-            grp.create_dataset('WL', data=np.copy(df['WL']))
-            grp.create_dataset('BP', data=np.copy(df['BP']))
-            grp.create_dataset('ET', data=np.copy(df['ET']))
+            grp.create_dataset('WL', data=np.copy(df['WL']), maxshape=(None,))
+            grp.create_dataset('BP', data=np.copy(df['BP']), maxshape=(None,))
+            grp.create_dataset('ET', data=np.copy(df['ET']), maxshape=(None,))
 
             # Piezometric well info
             grp.attrs['filename'] = df['filename']
@@ -274,6 +285,11 @@ class ProjetReader(object):
             mmeas.create_dataset('Time', data=np.array([]), maxshape=(None,))
             mmeas.create_dataset('WL', data=np.array([]), maxshape=(None,))
 
+            # The manual measurements need to be imported again to
+            # include those of the new dataset.
+            if 'wlmeas_signature' in self.db['wldsets'].attrs:
+                del self.db['wldsets'].attrs['wlmeas_signature']
+
             self.db.flush()
 
             print('New dataset created sucessfully')
@@ -283,6 +299,61 @@ class ProjetReader(object):
 
         return WLDataFrameHDF5(grp)
 
+    def import_wlmeas(self, filename):
+        """
+        Import the water level manual measurements of all the water level
+        datasets of the project from the specified file in a single pass.
+
+        The measurements are imported only if the file was modified, or if
+        water level datasets were added to the project, since the last
+        import. Return whether the measurements were imported.
+        """
+        # An empty file with a header is created if the file does not
+        # exist. Nothing else is read or written if the file and the water
+        # level datasets did not change since the last import.
+        init_waterlvl_measures(osp.dirname(filename))
+        fname = find_waterlvl_measures_file(filename)
+        stat = os.stat(fname)
+        signature = repr((osp.abspath(fname), stat.st_mtime_ns, stat.st_size))
+        grp = self.db['wldsets']
+        if grp.attrs.get('wlmeas_signature', '') == signature:
+            return False
+
+        print('Importing manual water level measurements from "{}"...'
+              .format(osp.basename(fname)), end=' ')
+        measures = read_waterlvl_measures(fname)
+        for name in self.wldsets:
+            time, wl = measures.get(
+                grp[name].attrs['Well'], (np.array([]), np.array([])))
+            save_wlmeas(grp[name], time, wl)
+        grp.attrs['wlmeas_signature'] = signature
+        self.db.flush()
+        print('done')
+        return True
+
+    def delete_wldsets_outliers(self, wldsets=None, **kwargs):
+        """
+        Delete the spikes and flat lines that are found in the water level
+        data of all the datasets of the project.
+
+        Return a dict with the water level datasets of the project, so that
+        the deleted outliers can be reviewed and either undone or commited.
+        The outliers are deleted in the datasets of wldsets, a dict of the
+        water level datasets of the project that are already opened, if
+        any, so that their pending changes are not lost. The keyword
+        arguments are passed to WLDataFrameBase.find_outliers.
+        """
+        wldsets = {} if wldsets is None else dict(wldsets)
+        for name in self.wldsets:
+            if name not in wldsets:
+                wldsets[name] = WLDataFrameHDF5(self.db['wldsets/%s' % name])
+            outliers = wldsets[name].delete_outliers(**kwargs)
+            print('{} spikes and {} flat line values deleted and {} steps '
+                  'found in "{}".'.format(len(outliers['spikes']),
+                                          len(outliers['flatlines']),
+                                          len(outliers['steps']), name))
+        return wldsets
+
     def del_wldset(self, name):
         """Delete the specified water level dataset."""
         del self.db['wldsets/%s' % name]
@@ -319,6 +390,14 @@ class ProjetReader(object):
         name = self.db['wxdsets'].attrs['last_opened']
         return None if name == 'None' else name
 
+    def get_wxdsets(self):
+        """
+        Return a list of all the weather datasets stored in the project
+        without changing the last opened weather dataset.
+        """
+        return [WXDataFrameHDF5(self.db['wxdsets/%s' % name]) for
+                name in self.wxdsets]
+
     def get_wxdset(self, name):
         """
         Return the weather dataset corresponding to the provided name.
@@ -350,7 +429,7 @@ class ProjetReader(object):
         # Save time.
         strtimes = np.array(
             wxdset.strftime(), dtype=h5py.special_dtype(vlen=str))
-        grp.create_dataset('Time', data=strtimes)
+        grp.create_dataset('Time', data=strtimes, maxshape=(None,))
         # See http://docs.h5py.org/en/latest/strings.html as to why this
         # is necessary to do this in order to save a list of strings in
         # a dataset with h5py.
@@ -358,27 +437,71 @@ class ProjetReader(object):
         # Save timeseries data
         for variable in METEO_VARIABLES:
             grp.create_dataset(
-                variable, data=np.copy(wxdset.data[variable].values))
+                variable, data=np.copy(wxdset.data[variable].values),
+                maxshape=(None,))
 
         # Save times where data was missing.
         for variable in METEO_VARIABLES:
-            datetimeindex = wxdset.missing_value_indexes[variable]
-            strtimes = np.array(
-                datetimeindex.strftime("%Y-%m-%dT%H:%M:%S").values.tolist(),
-                dtype=h5py.special_dtype(vlen=str)
-                )
-            grp.create_dataset(
-                'Missing {}'.format(variable), data=strtimes)
+            save_missing_value_mask(
+                grp, variable, wxdset.data.index,
+                wxdset.missing_value_indexes[variable])
 
         print('Dataset {} created sucessfully.'.format(name))
         self.db.flush()
 
+    def append_wxdset(self, name, wxdset):
+        """
+        Append to the weather dataset of the project with the specified name
+        the daily weather data of wxdset that are more recent than the data
+        already saved in the project. Return the number of days that were
+        appended to the dataset.
+        """
+        return WXDataFrameHDF5(
+            self.db['wxdsets/%s' % name]).append_weather_data(wxdset)
+
     def del_wxdset(self, name):
         """Delete the specified weather dataset."""
         del self.db['wxdsets/%s' % name]
         self.db.flush()
 
 
+def save_wlmeas(group, time, wl):
+    """
+    Overwrite the water level manual measurements saved in the group of a
+    water level dataset.
+    """
+    try:
+        group['manual/Time'].resize(np.shape(time))
+        group['manual/Time'][:] = time
+        group['manual/WL'].resize(np.shape(wl))
+        group['manual/WL'][:] = wl
+    except (TypeError, KeyError):
+        if 'manual' in group:
+            del group['manual']
+        mmeas = group.create_group('manual')
+        mmeas.create_dataset('Time', data=time, maxshape=(None,))
+        mmeas.create_dataset('WL', data=wl, maxshape=(None,))
+
+
+def extend_dataset(group, name, values, nrows):
+    """
+    Write values in the dataset name of the group starting at the row
+    nrows, resizing the dataset as needed.
+    """
+    dset = group[name]
+    if dset.maxshape[0] is not None:
+        # Datasets saved with older versions of GWHAT are not
+        # resizable, so they need to be recreated once.
+        data = dset[...]
+        dtype = dset.dtype
+        del group[name]
+        dset = group.create_dataset(
+            name, data=data, dtype=dtype, maxshape=(None,))
+    dset.resize((nrows + len(values),))
+    dset[nrows:] = values
+    return dset
+
+
 class WLDataFrameHDF5(WLDataFrameBase):
     """
     This is a wrapper around the h5py group that is used to store
@@ -393,17 +516,13 @@ class WLDataFrameHDF5(WLDataFrameBase):
 
     def __load_dataset__(self, hdf5group):
         self.dset = hdf5group
-        self._undo_stack = []
+        self._clear_undo_stack()
 
-        columns = []
-        data = []
+        data = {}
         for colname in ['Time', 'WL', 'BP', 'ET']:
-            if len(self.dset[colname][...]):
-                data.append(self.dset[colname][...])
-                columns.append(colname)
-        data = np.vstack(tuple(data)).transpose()
-        columns = tuple(columns)
-        self._dataf = WLDataset(data, columns)
+            if len(self.dset[colname]):
+                data[colname] = self.dset[colname][...]
+        self._dataf = WLDataset(data, list(data.keys()))
 
         # Make older datasets compatible with newer format.
         if isinstance(self.dset['Time'][0], (int, float)):
@@ -431,6 +550,19 @@ class WLDataFrameHDF5(WLDataFrameBase):
             self.dset.create_group('glue')
             self.dset.file.flush()
 
+    def require_groups(self):
+        """
+        Create the groups of the manual measurements and of the mrc results
+        of this dataset if they do not exist yet.
+
+        These groups are otherwise only created when they are first
+        accessed, which is not possible if the project file is opened
+        in read-only mode.
+        """
+        self.dset.require_group('manual')
+        self._require_mrc_group()
+        self.dset.file.flush()
+
     def __getitem__(self, key):
         if key in list(self.dset.attrs.keys()):
             return self.dset.attrs[key]
@@ -447,26 +579,106 @@ class WLDataFrameHDF5(WLDataFrameBase):
 
     # ---- Water levels
     def commit(self):
-        """Commit the changes made to the water level data to the project."""
+        """
+        Commit the changes made to the water level data to the project.
+
+        Only the ranges of the water level data that were changed since the
+        last commit are written to the project.
+        """
         if self.has_uncommited_changes:
-            self.dset['WL'][:] = np.copy(self.waterlevels)
+            waterlevels = self.waterlevels
+            for start, stop in find_index_ranges(
+                    self.get_changed_indexes(), maxgap=COMMIT_MAXGAP):
+                self.dset['WL'][start:stop] = waterlevels[start:stop]
             self.dset.file.flush()
-            self._undo_stack = []
+            self._clear_undo_stack()
             print('Changes commited successfully.')
 
+    def clear_all_changes(self):
+        """
+        Clear all changes that were made to the water level data since the
+        last commit.
+        """
+        # The water level values are read back from the project, since the
+        # oldest changes may no longer be in the undo stack.
+        for start, stop in find_index_ranges(
+                self.get_changed_indexes(), maxgap=COMMIT_MAXGAP):
+            self._dataf['WL'].iloc[start:stop] = self.dset['WL'][start:stop]
+        self._clear_undo_stack()
+
+    def append_waterlevels(self, df):
+        """
+        Append to this dataset the water level data of df, a water level
+        dataset read from a data file, that are more recent than the data
+        already saved in this dataset.
+
+        The records of df that are within the period of the data already
+        saved in this dataset are dropped and the existing values are kept.
+        A warning is issued for those whose timestamp is not in this dataset.
+        The datasets of the project are extended in place, so that the
+        results of the MRC, BRF and GLUE saved for this dataset are
+        preserved. Return the number of records that were appended to this
+        dataset.
+        """
+        newdata = df.data[['WL', 'BP', 'ET']]
+        newdata = newdata[~newdata.index.duplicated(keep='first')]
+        if len(self._dataf):
+            # Only the records that are more recent than the existing data
+            # are appended, so that the indexes of the data saved for the
+            # MRC and the BRF remain valid.
+            isold = newdata.index <= self._dataf.index.max()
+            nold = np.sum(~newdata.index[isold].isin(self._dataf.index))
+            newdata = newdata[~isold]
+            if nold:
+                warnings.warn(
+                    "{} records were not appended to \"{}\" because they "
+                    "are within the period of the existing data."
+                    .format(nold, self.name))
+        newdata = newdata.sort_index()
+        if not len(newdata):
+            return 0
+
+        print('Appending {} records to "{}"...'.format(
+            len(newdata), self.name), end=' ')
+        nrows = len(self.dset['Time'])
+        self._extend_dataset(
+            'Time', np.array(newdata.index.strftime("%Y-%m-%dT%H:%M:%S"),
+                             dtype=h5py.special_dtype(vlen=str)),
+            nrows)
+        for colname in ['WL', 'BP', 'ET']:
+            self._extend_dataset(colname, newdata[colname].values, nrows)
+        self.dset.file.flush()
+
+        dataf = pd.concat(
+            [self._dataf[['WL', 'BP', 'ET']], newdata], sort=False)
+        data = {'Time': datetimeindex_to_xldates(dataf.index)}
+        for colname in ['WL', 'BP', 'ET']:
+            data[colname] = dataf[colname].values
+        self._dataf = WLDataset(data, list(data.keys()))
+        if self._changed is not None:
+            self._changed = np.hstack(
+                [self._changed, np.zeros(len(newdata), dtype=bool)])
+        print('done')
+        return len(newdata)
+
+    def _extend_dataset(self, colname, values, nrows):
+        """
+        Extend the dataset colname, that holds nrows of data, with values.
+        """
+        if len(self.dset[colname]) == 0 and nrows > 0:
+            if np.all(np.isnan(values)):
+                # We keep the dataset empty since there is still no
+                # data available for this variable.
+                return
+            del self.dset[colname]
+            self.dset.create_dataset(
+                colname, data=np.full(nrows, np.nan), maxshape=(None,))
+        extend_dataset(self.dset, colname, values, nrows)
+
     # ---- Manual measurements
     def set_wlmeas(self, time, wl):
         """Overwrite the water level measurements for this dataset."""
-        try:
-            self.dset['manual/Time'].resize(np.shape(time))
-            self.dset['manual/Time'][:] = time
-            self.dset['manual/WL'].resize(np.shape(wl))
-            self.dset['manual/WL'][:] = wl
-        except TypeError:
-            del self.dset['manual']
-            mmeas = self.dset.create_group('manual')
-            mmeas.create_dataset('Time', data=time, maxshape=(None,))
-            mmeas.create_dataset('WL', data=wl, maxshape=(None,))
+        save_wlmeas(self.dset, time, wl)
         self.dset.file.flush()
 
     def get_wlmeas(self):
@@ -489,12 +701,45 @@ class WLDataFrameHDF5(WLDataFrameBase):
         self.dset['mrc/recess'].resize(np.shape(recess))
         self.dset['mrc/recess'][:] = recess
 
+        # The confidence intervals of a previous MRC are no longer valid.
+        if 'params_ci' in self.dset['mrc']:
+            del self.dset['mrc/params_ci']
+
         self.dset['mrc'].attrs['exists'] = 1
 
         self.dset.file.flush()
 
+    def set_mrc_ci(self, params_ci, nboot, confidence):
+        """
+        Save the confidence intervals of the mrc parameters, as estimated
+        with a bootstrap, to the hdf5 project file.
+        """
+        if 'params_ci' in self.dset['mrc']:
+            del self.dset['mrc/params_ci']
+        self.dset['mrc'].create_dataset(
+            'params_ci', data=np.array(params_ci), dtype='float64')
+        self.dset['mrc/params_ci'].attrs['nboot'] = nboot
+        self.dset['mrc/params_ci'].attrs['confidence'] = confidence
+        self.dset.file.flush()
+
+    def get_mrc_ci(self):
+        """
+        Return the confidence intervals of the mrc parameters as
+        [[Amin, Amax], [Bmin, Bmax]] and the confidence level, or None if
+        they were not computed for the mrc saved in the project.
+        """
+        if not self.mrc_exists() or 'params_ci' not in self.dset['mrc']:
+            return None, None
+        return (self.dset['mrc/params_ci'][...],
+                self.dset['mrc/params_ci'].attrs['confidence'])
+
     def mrc_exists(self):
         """Return whether a mrc results is saved in the hdf5 project file."""
+        self._require_mrc_group()
+        return bool(self.dset['mrc'].attrs['exists'])
+
+    def _require_mrc_group(self):
+        """Create the group of the mrc results if it does not exist."""
         if 'mrc' not in list(self.dset.keys()):
             mrc = self.dset.create_group('mrc')
             mrc.attrs['exists'] = 0
@@ -505,7 +750,6 @@ class WLDataFrameHDF5(WLDataFrameBase):
                                dtype='float64', maxshape=(None,))
             mrc.create_dataset('time', data=np.array([]),
                                dtype='float64', maxshape=(None,))
-        return bool(self.dset['mrc'].attrs['exists'])
 
     def save_mrc_tofile(self, filename):
         """Save the master recession curve results to a file."""
@@ -524,7 +768,17 @@ class WLDataFrameHDF5(WLDataFrameBase):
             ['dh/dt(mm/d) = -%f*h(mbgs) + %f' % (A, B)],
             ['A (1/d)', A],
             ['B (m/d)', B],
-            ['RMSE (m)', calcul_rmse(self['WL'], self['mrc/recess'])],
+            ['RMSE (m)', calcul_rmse(self['WL'], self['mrc/recess'])]])
+
+        params_ci, confidence = self.get_mrc_ci()
+        if params_ci is not None:
+            confidence = round(confidence * 100)
+            fcontent.extend([
+                ['A %d%% CI (1/d)' % confidence] + list(params_ci[0]),
+                ['B %d%% CI (m/d)' % confidence] + list(params_ci[1])
+                ])
+
+        fcontent.extend([
             [''],
             ['Observed and Predicted Water Level'],
             ['Time', 'hrecess(mbgs)', 'hobs(mbgs)']
@@ -532,8 +786,7 @@ class WLDataFrameHDF5(WLDataFrameBase):
 
         # Format the observed and simulated data.
         data = np.vstack([self['Time'], self['WL'], self['mrc/recess']])
-        data = nan_as_text_tolist(np.array(data).transpose())
-        fcontent.extend(data)
+        fcontent.append(np.array(data).transpose())
 
         save_content_to_file(filename, fcontent)
 
@@ -747,7 +1000,7 @@ class WLDataFrameHDF5(WLDataFrameBase):
             []
             ]
         fcontent.append(list(databrf.columns))
-        fcontent.extend(nan_as_text_tolist(databrf.values))
+        fcontent.append(databrf)
 
         save_content_to_file(filename, fcontent)
 
@@ -805,6 +1058,76 @@ class WLDataFrameHDF5(WLDataFrameBase):
         return layout
 
 
+def save_missing_value_mask(group, variable, datetimeindex, missing_idx):
+    """
+    Save the times where data was missing for the specified variable in
+    the group as a boolean mask aligned with datetimeindex and packed
+    into bits.
+    """
+    key = 'Missing {}'.format(variable)
+    if key in group.keys():
+        del group[key]
+    mask = datetimeindex.isin(missing_idx)
+    group.create_dataset(key, data=np.packbits(mask), maxshape=(None,))
+
+
+def load_missing_value_mask(group, variable, datetimeindex):
+    """
+    Return the times where data was missing for the specified variable
+    from the packed boolean mask saved in the group.
+    """
+    packed_mask = group['Missing {}'.format(variable)][:]
+    mask = np.unpackbits(packed_mask)[:len(datetimeindex)].astype(bool)
+    return datetimeindex[mask]
+
+
+def extend_missing_value_mask(group, variable, nrows, mask):
+    """
+    Extend the packed boolean mask of the times where data was missing for
+    the specified variable, that is aligned with nrows of data, with mask.
+    """
+    # Only the last byte of the saved mask, which may be partially
+    # filled, needs to be packed again with the new values.
+    key = 'Missing {}'.format(variable)
+    start = nrows // 8
+    head = np.unpackbits(group[key][start:start + 1])[:nrows % 8]
+    extend_dataset(
+        group, key, np.packbits(np.hstack([head.astype(bool), mask])), start)
+
+
+class MissingValueIndexesHDF5(Mapping):
+    """
+    A mapping of the times where data was missing for each variable of a
+    weather dataset that are read from the project on first access.
+    """
+
+    def __init__(self, wxdset):
+        self._wxdset = wxdset
+        self._indexes = {}
+        self._nrows = len(wxdset.dataset['Time'])
+
+    def __getitem__(self, variable):
+        nrows = len(self._wxdset.dataset['Time'])
+        if nrows != self._nrows:
+            # Data were appended to the dataset in the project since the
+            # indexes were read.
+            self._indexes = {}
+            self._nrows = nrows
+        if variable not in self._indexes:
+            if 'Missing {}'.format(variable) not in self._wxdset.dataset:
+                raise KeyError(variable)
+            self._indexes[variable] = (
+                self._wxdset.load_missing_value_index(variable))
+        return self._indexes[variable]
+
+    def __iter__(self):
+        return (variable for variable in METEO_VARIABLES if
+                'Missing {}'.format(variable) in self._wxdset.dataset)
+
+    def __len__(self):
+        return len(list(iter(self)))
+
+
 class WXDataFrameHDF5(WXDataFrameBase):
     """
     This is a wrapper around the h5py group to read the weather data
@@ -816,7 +1139,11 @@ class WXDataFrameHDF5(WXDataFrameBase):
         self.__load_dataset__(dataset)
 
     def __getitem__(self, key):
-        raise NotImplementedError
+        """Return the daily values of the specified weather variable."""
+        if key not in METEO_VARIABLES:
+            raise KeyError(key)
+        self.load_variable(key)
+        return self._data[key]
 
     def __setitem__(self, key, value):
         raise NotImplementedError
@@ -868,7 +1195,7 @@ class WXDataFrameHDF5(WXDataFrameBase):
         for variable in METEO_VARIABLES:
             key = 'Missing {}'.format(variable)
             if (key in dataset.keys() and len(dataset[key]) > 0 and
-                    isinstance(dataset[key][0], (int, float))):
+                    dataset[key].dtype.kind in ('f', 'i')):
                 print(("Saving missing {} data time as ISO date strings "
                        "instead of Excel dates...").format(variable),
                       end=' ')
@@ -898,22 +1225,149 @@ class WXDataFrameHDF5(WXDataFrameBase):
         for key in dataset.attrs.keys():
             self.metadata[key] = dataset.attrs[key]
 
-        # Get and format the timeseries data.
-        self.data = pd.DataFrame(
-            [],
-            columns=METEO_VARIABLES,
-            index=pd.to_datetime(dataset['Time'], infer_datetime_format=True)
-            )
+        # The timeseries data and the missing value time indexes are read
+        # from the project only when they are first accessed.
+        self._data = None
+        self.missing_value_indexes = MissingValueIndexesHDF5(self)
+
+    def _get_data_frame(self):
+        """
+        Return the data frame of the weather variables that were read so
+        far from the project.
+        """
+        if (self._data is not None and
+                len(self._data) != len(self.dataset['Time'])):
+            # Data were appended to the dataset in the project, possibly
+            # through another wrapper, since the data were read, so they
+            # need to be read again.
+            self._data = None
+            self.clear_aggregates_cache()
+        if self._data is None:
+            self._data = pd.DataFrame(
+                [],
+                index=pd.to_datetime(
+                    self.dataset['Time'], infer_datetime_format=True)
+                )
+        return self._data
+
+    @property
+    def index(self):
+        """Return the datetime indexes of the daily weather data."""
+        return self._get_data_frame().index
+
+    @property
+    def data(self):
+        """
+        Return a data frame with the daily values of all weather variables.
+        """
         for variable in METEO_VARIABLES:
-            self.data[variable] = np.copy(dataset[variable])
+            self.load_variable(variable)
+        if list(self._data.columns) != METEO_VARIABLES:
+            self._data = self._data[METEO_VARIABLES].copy()
+        return self._data
 
-        # Get and format the missing value time indexes.
-        self.missing_value_indexes = {}
+    @data.setter
+    def data(self, x):
+        self._data = x
+
+    def load_variable(self, variable):
+        """
+        Read the daily values of the specified weather variable from the
+        project if they were not read already.
+        """
+        data = self._get_data_frame()
+        if variable not in data.columns:
+            data[variable] = np.copy(self.dataset[variable])
+
+    def load_missing_value_index(self, variable):
+        """
+        Read the times where data was missing for the specified variable
+        from the project.
+        """
+        key = 'Missing {}'.format(variable)
+        if self.dataset[key].dtype.kind != 'u':
+            # The missing value time indexes were previously saved
+            # as lists of ISO date strings. To convert to the new format,
+            # we save them as packed boolean masks aligned with the
+            # time axis of the dataset.
+            print(("Saving missing {} data time as a packed boolean "
+                   "mask instead of ISO date strings...").format(
+                       variable), end=' ')
+            save_missing_value_mask(
+                self.dataset, variable, self.index,
+                pd.to_datetime(self.dataset[key][:],
+                               infer_datetime_format=True))
+            self.dataset.file.flush()
+            print('done')
+        return load_missing_value_mask(self.dataset, variable, self.index)
+
+    def append_weather_data(self, wxdset):
+        """
+        Append to this dataset the daily weather data of wxdset that are
+        more recent than the data already saved in the project.
+
+        The days without data between the two datasets are filled as in
+        WXDataFrame and flagged as missing. Only the potential
+        evapotranspiration of the years with new data is calculated again
+        with the method of Thornthwaite. Return the number of days that
+        were appended to this dataset.
+        """
+        index = self.index
+        nrows = len(index)
+        newdata = wxdset.data[METEO_VARIABLES]
+        newdata = newdata[newdata.index > index[-1]]
+        if not len(newdata):
+            return 0
+
+        # Make the daily time series continuous with the existing data.
+        newindex = pd.date_range(
+            index[-1] + pd.Timedelta(days=1), newdata.index[-1], freq='D')
+        print('Appending {} days to "{}"...'.format(
+            len(newindex), self.name), end=' ')
+        isgap = ~newindex.isin(newdata.index)
+        newdata = newdata.reindex(newindex)
+        for var in ['Tmax', 'Tavg', 'Tmin']:
+            lastvalue = pd.Series(
+                self.dataset[var][nrows - 1:], index=index[nrows - 1:])
+            newdata[var] = (pd.concat([lastvalue, newdata[var]])
+                            .interpolate().iloc[1:])
+        newdata = newdata.fillna(0)
+
+        # Calculate the potential evapotranspiration of the years with
+        # new data, using the heat index of the whole period of record.
+        i0 = index.searchsorted(pd.Timestamp(newindex[0].year, 1, 1))
+        Tavg = pd.concat([pd.Series(self.dataset['Tavg'][...], index=index),
+                          newdata['Tavg']])
+        PET = calcul_thornthwaite(
+            Tavg.iloc[i0:], self.metadata['Latitude'], Tavg).values
+        self.dataset['PET'][i0:] = PET[:nrows - i0]
+        newdata['PET'] = PET[nrows - i0:]
+
+        # Save the new data and the times where data was missing.
+        extend_dataset(
+            self.dataset, 'Time',
+            np.array(newindex.strftime("%Y-%m-%dT%H:%M:%S"),
+                     dtype=h5py.special_dtype(vlen=str)),
+            nrows)
         for variable in METEO_VARIABLES:
-            key = 'Missing {}'.format(variable)
-            if key in dataset.keys():
-                self.missing_value_indexes[variable] = pd.to_datetime(
-                    dataset[key][:], infer_datetime_format=True)
+            extend_dataset(
+                self.dataset, variable, newdata[variable].values, nrows)
+
+            if self.dataset['Missing {}'.format(variable)].dtype.kind != 'u':
+                self.load_missing_value_index(variable)
+            missing_idx = wxdset.missing_value_indexes.get(
+                variable, pd.DatetimeIndex([]))
+            extend_missing_value_mask(
+                self.dataset, variable, nrows,
+                newindex.isin(missing_idx) | isgap)
+        self.dataset.file.flush()
+
+        # The data will be read again from the project when needed.
+        self._data = None
+        self.missing_value_indexes = MissingValueIndexesHDF5(self)
+        self.clear_aggregates_cache()
+        print('done')
+        return len(newindex)
 
     @property
     def name(self):
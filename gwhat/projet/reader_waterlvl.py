@@ -19,15 +19,25 @@ from collections.abc import Mapping
 # ---- Third party imports
 import numpy as np
 import pandas as pd
+from pandas.errors import EmptyDataError
 import xlrd
 from xlrd.xldate import xldate_from_datetime_tuple
 from xlrd import xldate_as_tuple
 
 # ---- Local library imports
 from gwhat.common.utils import save_content_to_csv
+from gwhat.utils.dates import (
+    datetimeindex_to_xldates, xldates_to_datetimeindex)
+from gwhat.utils.outliers import find_flatlines, find_spikes, find_steps
+from gwhat.utils.parsecache import (
+    is_parse_cache_enabled, load_from_parse_cache, save_to_parse_cache)
 
 FILE_EXTS = ['.csv', '.xls', '.xlsx']
 
+# The maximum size in bytes of the old water level values and indexes that
+# are kept in memory to undo the changes made to a water level dataset.
+UNDO_STACK_MAXSIZE = 128 * 1024**2
+
 
 # ---- Read and Load Water Level Datafiles
 INDEX = 'Time'
@@ -80,7 +90,8 @@ class WLDataset(EmptyWLDataset):
             if colname == INDEX:
                 pass
             elif colname in self.columns:
-                self[colname] = pd.to_numeric(self[colname], errors='coerce')
+                self[colname] = pd.to_numeric(
+                    self[colname], errors='coerce').astype('float64')
             else:
                 print('WARNING: no "%s" data found in the datafile.' % colname)
 
@@ -90,9 +101,8 @@ class WLDataset(EmptyWLDataset):
             try:
                 # We assume first that the dates are stored in the
                 # Excel numeric format.
-                datetimes = self['Time'].astype('float64', errors='raise')
-                datetimes = pd.to_datetime(datetimes.apply(
-                    lambda date: xlrd.xldate.xldate_as_datetime(date, 0)))
+                datetimes = xldates_to_datetimeindex(
+                    self['Time'].astype('float64', errors='raise').values)
             except ValueError:
                 try:
                     # Try converting the strings to datetime objects.
@@ -116,7 +126,10 @@ class WLDataset(EmptyWLDataset):
 
 
 def open_water_level_datafile(filename):
-    """Open a water level data file and return the data."""
+    """
+    Open a water level data file and yield the rows of its header, up to
+    and including the row with the labels of the data columns.
+    """
     root, ext = os.path.splitext(filename)
     if ext not in FILE_EXTS:
         raise ValueError("Supported file format are: ", FILE_EXTS)
@@ -126,26 +139,23 @@ def open_water_level_datafile(filename):
 
     if ext == '.csv':
         with open(filename, 'r', encoding='utf8') as f:
-            data = list(csv.reader(f, delimiter=','))
+            # We parse the lines one at a time, so that the index of the
+            # rows matches the line numbers of the file.
+            for line in f:
+                yield next(csv.reader([line], delimiter=','), [])
     elif ext in ['.xls', '.xlsx']:
         with xlrd.open_workbook(filename, on_demand=True) as wb:
             sheet = wb.sheet_by_index(0)
-            data = [sheet.row_values(rowx, start_colx=0, end_colx=None) for
-                    rowx in range(sheet.nrows)]
+            for rowx in range(sheet.nrows):
+                yield sheet.row_values(rowx, start_colx=0, end_colx=None)
 
-    return data
 
-
-def read_water_level_datafile(filename):
+def read_water_level_header(reader):
     """
-    Load a water level dataset from a csv or an Excel file and format the
-    data in a Pandas dataframe with the dates used as index.
+    Read the metadata from the rows of the header of a water level data
+    file and return them, along with the index of the row with the labels
+    of the data columns and the labels themselves.
     """
-    if filename is None or not osp.exists(filename):
-        return None
-    reader = open_water_level_datafile(filename)
-
-    # Fetch the metadata from the header.
     header = deepcopy(HEADER)
     for i, row in enumerate(reader):
         if not len(row):
@@ -163,13 +173,85 @@ def read_water_level_datafile(filename):
                 break
         else:
             if re.search(COL_REGEX[INDEX], label, re.IGNORECASE):
+                return header, i, row
+    return None
+
+
+def map_water_level_columns(columns):
+    """
+    Return a dictionary that maps the name of the water level data columns
+    to the index of the corresponding column in the data file.
+    """
+    colmap = {}
+    for colx, column in enumerate(columns):
+        str_ = str(column).replace(" ", "").replace("_", "")
+        for colname, regex in COL_REGEX.items():
+            if re.search(regex, str_, re.IGNORECASE):
+                colmap[colname] = colx
                 break
+    return colmap
+
+
+def read_water_level_data(filename, skiprows, colmap):
+    """
+    Read the data block of a water level data file, that starts after
+    skiprows rows, and return a dictionary with the data of each column
+    in colmap.
+
+    The data of csv files are parsed with the pandas C engine. The columns
+    of Excel files are read directly from the sheet.
+    """
+    root, ext = os.path.splitext(filename)
+    colnames = sorted(colmap, key=colmap.get)
+    if not colnames:
+        return {}
+    if ext == '.csv':
+        try:
+            df = pd.read_csv(
+                filename, skiprows=skiprows, header=None, engine='c',
+                usecols=[colmap[colname] for colname in colnames],
+                encoding='utf8', skipinitialspace=True)
+        except ValueError:
+            # The data block is empty or its rows do not have all the
+            # same number of fields, so we read it with the csv module.
+            with open(filename, 'r', encoding='utf8') as f:
+                rows = list(csv.reader(f, delimiter=','))[skiprows:]
+            return {colname: np.array(
+                    [row[colmap[colname]] if len(row) > colmap[colname]
+                     else '' for row in rows], dtype=object)
+                    for colname in colnames}
+        return {colname: df[colmap[colname]].values for colname in colnames}
     else:
+        with xlrd.open_workbook(filename, on_demand=True) as wb:
+            sheet = wb.sheet_by_index(0)
+            return {colname: np.array(sheet.col_values(
+                    colmap[colname], start_rowx=skiprows, end_rowx=None),
+                    dtype=object) for colname in colnames}
+
+
+def read_water_level_datafile(filename):
+    """
+    Load a water level dataset from a csv or an Excel file and format the
+    data in a Pandas dataframe with the dates used as index.
+    """
+    if filename is None or not osp.exists(filename):
+        return None
+
+    # Fetch the metadata from the header.
+    reader = open_water_level_datafile(filename)
+    try:
+        result = read_water_level_header(reader)
+    finally:
+        reader.close()
+    if result is None:
         print("ERROR: the water level datafile is not formatted correctly.")
         return None
+    header, i, columns = result
 
-    # Cast the data into a Pandas dataframe.
-    dataf = WLDataset(reader[i+1:], columns=row)
+    # Read the data and cast them into a Pandas dataframe.
+    colmap = map_water_level_columns(columns)
+    data = read_water_level_data(filename, i + 1, colmap)
+    dataf = WLDataset(data, columns=list(data.keys()))
 
     # Add the metadata to the dataframe.
     for key in header.keys():
@@ -198,54 +280,71 @@ def init_waterlvl_measures(dirname):
         save_content_to_csv(fname, fcontent)
 
 
-def load_waterlvl_measures(filename, well):
+def find_waterlvl_measures_file(filename):
     """
-    Load and read the water level manual measurements from the specified
-    resource file for the specified well.
+    Return the path of the water level manual measurements file, trying
+    all the supported extensions if filename has none, or None if the file
+    does not exist.
     """
-    print('Loading manual water level measures for well %s...' % well, end=" ")
-    time_mes, wl_mes = np.array([]), np.array([])
-    # Determine the extension of the file.
     root, ext = os.path.splitext(filename)
     exts = [ext] if ext in FILE_EXTS else FILE_EXTS
     for ext in exts:
-        filename = root+ext
-        if os.path.exists(root+ext):
-            break
-    else:
-        # The file does not exists, so we generate an empty file with
-        # a header.
-        print("none")
-        init_waterlvl_measures(os.path.dirname(root))
-        return time_mes, wl_mes
-
-    # Open and read the file.
-    if ext == '.csv':
-        with open(filename, 'r') as f:
-            reader = np.array(list(csv.reader(f, delimiter=',')))
-            data = np.array(reader[1:])
+        if os.path.exists(root + ext):
+            return root + ext
+    return None
 
-            well_name = np.array(data[:, 0]).astype('str')
-            time = np.array(data[:, 1]).astype('float')
-            wl = np.array(data[:, 2]).astype('float')
 
+def read_waterlvl_measures(filename):
+    """
+    Read the water level manual measurements of all wells from the
+    specified file in a single pass and return a dictionary with the
+    times and water levels of the measurements of each well.
+    """
+    root, ext = os.path.splitext(filename)
+    if ext == '.csv':
+        try:
+            df = pd.read_csv(filename, usecols=[0, 1, 2], dtype={0: str},
+                             encoding='utf8')
+        except EmptyDataError:
+            return {}
+        well_name = df.iloc[:, 0].fillna('').values.astype('str')
+        time = pd.to_numeric(df.iloc[:, 1], errors='coerce').values
+        wl = pd.to_numeric(df.iloc[:, 2], errors='coerce').values
     elif ext in ['.xlsx', '.xls']:
         with xlrd.open_workbook(filename) as wb:
             sheet = wb.sheet_by_index(0)
+            well_name = np.array(
+                sheet.col_values(0, start_rowx=1)).astype('str')
+            time = np.array(sheet.col_values(1, start_rowx=1)).astype('float')
+            wl = np.array(sheet.col_values(2, start_rowx=1)).astype('float')
+    else:
+        raise ValueError("Supported file format are: ", FILE_EXTS)
 
-            well_name = sheet.col_values(0, start_rowx=1, end_rowx=None)
-            time = sheet.col_values(1, start_rowx=1, end_rowx=None)
-            wl = sheet.col_values(2, start_rowx=1, end_rowx=None)
+    # Split the measurements by well, keeping the order in which they
+    # are saved in the file.
+    order = np.argsort(well_name, kind='mergesort')
+    wells, starts = np.unique(well_name[order], return_index=True)
+    return {well: (time[indexes], wl[indexes]) for well, indexes in
+            zip(wells, np.split(order, starts[1:]))}
 
-            well_name = np.array(well_name).astype('str')
-            time = np.array(time).astype('float')
-            wl = np.array(wl).astype('float')
 
-    if len(well_name) > 0:
-        rowx = np.where(well_name == well)[0]
-        if len(rowx) > 0:
-            wl_mes = wl[rowx]
-            time_mes = time[rowx]
+def load_waterlvl_measures(filename, well):
+    """
+    Load and read the water level manual measurements from the specified
+    resource file for the specified well.
+    """
+    print('Loading manual water level measures for well %s...' % well, end=" ")
+    time_mes, wl_mes = np.array([]), np.array([])
+    fname = find_waterlvl_measures_file(filename)
+    if fname is None:
+        # The file does not exists, so we generate an empty file with
+        # a header.
+        print("none")
+        init_waterlvl_measures(os.path.dirname(filename))
+        return time_mes, wl_mes
+
+    time_mes, wl_mes = read_waterlvl_measures(fname).get(
+        well, (time_mes, wl_mes))
     print("done")
 
     return time_mes, wl_mes
@@ -282,8 +381,8 @@ class WLDataFrameBase(Mapping):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.dset = None
-        self._undo_stack = []
         self._dataf = EmptyWLDataset()
+        self._clear_undo_stack()
 
     def __load_dataset__(self):
         """Loads the dataset and save it in a store."""
@@ -311,10 +410,8 @@ class WLDataFrameBase(Mapping):
         """
         if 'XLDATES' not in self._dataf.columns:
             print('Converting datetimes to xldates...', end=' ')
-            timedeltas = (
-                self._dataf.index - xlrd.xldate.xldate_as_datetime(4000, 0))
-            self._dataf['XLDATES'] = (
-                timedeltas.total_seconds()/(3600 * 24) + 4000)
+            self._dataf['XLDATES'] = datetimeindex_to_xldates(
+                self._dataf.index)
             print('done')
         return self._dataf['XLDATES'].values
 
@@ -336,7 +433,24 @@ class WLDataFrameBase(Mapping):
         """"
         Return whether there is uncommited changes to the water level data.
         """
-        return bool(len(self._undo_stack))
+        return self._changed is not None
+
+    @property
+    def can_undo(self):
+        """
+        Return whether there is changes to the water level data that can
+        be undone one at a time with undo.
+        """
+        return len(self._undo_stack) > 0
+
+    def get_changed_indexes(self):
+        """
+        Return the indexes of the water level data that were changed since
+        the last commit.
+        """
+        if self._changed is None:
+            return np.array([], dtype=int)
+        return np.flatnonzero(self._changed)
 
     def commit(self):
         """Commit the changes made to the water level data to the project."""
@@ -344,43 +458,135 @@ class WLDataFrameBase(Mapping):
 
     def undo(self):
         """Undo the last changes made to the water level data."""
-        if self.has_uncommited_changes:
-            changes = self._undo_stack.pop(-1)
-            self._dataf['WL'][changes.index] = changes
+        if len(self._undo_stack):
+            indexes, values = self._undo_stack.pop(-1)
+            self._undo_stack_size -= indexes.nbytes + values.nbytes
+            self._dataf['WL'].iloc[indexes] = values
+            if not len(self._undo_stack) and not self._undo_stack_truncated:
+                self._changed = None
 
     def clear_all_changes(self):
         """
         Clear all changes that were made to the water level data since the
         last commit.
         """
-        while self.has_uncommited_changes:
+        if self._undo_stack_truncated:
+            # The oldest changes are no longer in the undo stack, so the
+            # water levels are restored from the values that were saved
+            # when the stack was first truncated.
+            indexes = self.get_changed_indexes()
+            self._dataf['WL'].iloc[indexes] = (
+                self._original_waterlevels[indexes])
+            self._clear_undo_stack()
+        while len(self._undo_stack):
             self.undo()
 
     def delete_waterlevels_at(self, indexes):
         """Delete the water level data at the specified indexes."""
         if len(indexes):
+            indexes = np.unique(np.asarray(indexes, dtype=int))
             self._add_to_undo_stack(indexes)
             self._dataf['WL'].iloc[indexes] = np.nan
 
+    # ---- Quality assurance
+    def find_outliers(self, spike_window=25, spike_threshold=6,
+                      spike_min_amplitude=None, flatline_length=24,
+                      flatline_resolution=None, step_window=12,
+                      step_threshold=0.1):
+        """
+        Return a dict with the indexes of the spikes, flat lines and steps
+        that are found in the water level data.
+
+        See the find_spikes, find_flatlines and find_steps functions of the
+        gwhat.utils.outliers module for a description of the parameters.
+        """
+        waterlevels = self.waterlevels
+        return {
+            'spikes': find_spikes(
+                waterlevels, spike_window, spike_threshold,
+                spike_min_amplitude),
+            'flatlines': find_flatlines(
+                waterlevels, flatline_length, flatline_resolution),
+            'steps': find_steps(waterlevels, step_window, step_threshold)}
+
+    def delete_outliers(self, **kwargs):
+        """
+        Delete the spikes and flat lines that are found in the water level
+        data and return the indexes of the spikes, flat lines and steps.
+
+        The steps are only reported to be reviewed, since the sharp rises
+        caused by recharge events are also found as steps and deleting the
+        first value of a step would not correct the shift of the levels.
+        The outliers are deleted with delete_waterlevels_at, so that they
+        can be reviewed and either undone or commited afterwards. The
+        keyword arguments are passed to find_outliers.
+        """
+        outliers = self.find_outliers(**kwargs)
+        self.delete_waterlevels_at(
+            np.hstack([outliers['spikes'], outliers['flatlines']]))
+        return outliers
+
     def _add_to_undo_stack(self, indexes):
         """
         Store the old water level values at the specified indexes in a stack
         before changing or deleting them. This allow to undo or cancel any
         changes made to the water level data before commiting them.
+
+        The oldest changes are dropped from the stack when its size exceeds
+        UNDO_STACK_MAXSIZE, so that these changes can no longer be undone
+        one at a time. A copy of the water levels as they were before any
+        change is then kept, so that all changes can still be cleared.
         """
         if len(indexes):
-            self._undo_stack.append(self._dataf['WL'].iloc[indexes].copy())
+            indexes = np.asarray(indexes, dtype=int)
+            values = self.waterlevels[indexes]
+            self._undo_stack.append((indexes, values))
+            self._undo_stack_size += indexes.nbytes + values.nbytes
+            if (self._undo_stack_size > UNDO_STACK_MAXSIZE and
+                    not self._undo_stack_truncated):
+                self._original_waterlevels = self.waterlevels.copy()
+                for oldindexes, oldvalues in reversed(self._undo_stack):
+                    self._original_waterlevels[oldindexes] = oldvalues
+            while (self._undo_stack_size > UNDO_STACK_MAXSIZE and
+                   len(self._undo_stack) > 1):
+                oldindexes, oldvalues = self._undo_stack.pop(0)
+                self._undo_stack_size -= oldindexes.nbytes + oldvalues.nbytes
+                self._undo_stack_truncated = True
+
+            if self._changed is None:
+                self._changed = np.zeros(len(self._dataf), dtype=bool)
+            self._changed[indexes] = True
+
+    def _clear_undo_stack(self):
+        """
+        Clear the stack of the old water level values and forget about the
+        changes made to the water level data since the last commit.
+        """
+        self._undo_stack = []
+        self._undo_stack_size = 0
+        self._undo_stack_truncated = False
+        self._original_waterlevels = None
+        self._changed = None
 
 
 class WLDataFrame(WLDataFrameBase):
     """
     A water level dataset container that loads its data from a csv
     or an Excel file.
+
+    If use_cache is True, the parsed data are read from and saved to the
+    binary parse cache. If use_cache is None, the cache is used only if
+    it is enabled in the configs.
     """
 
-    def __init__(self, filename, *args, **kwargs):
+    def __init__(self, filename, *args, use_cache=None, **kwargs):
         super().__init__(*args, **kwargs)
-        self.__load_dataset__(filename)
+        if use_cache is None:
+            use_cache = is_parse_cache_enabled()
+        if use_cache:
+            self.__load_dataset_from_cache__(filename)
+        else:
+            self.__load_dataset__(filename)
 
     def __getitem__(self, key):
         """Returns the value saved in the store at key."""
@@ -395,6 +601,30 @@ class WLDataFrame(WLDataFrameBase):
 
         return self.dset.__getitem__(key)
 
+    def __load_dataset_from_cache__(self, filename):
+        """
+        Loads the dataset from the parse cache if it is available, else
+        loads it from the file and saves it in the cache.
+        """
+        content = load_from_parse_cache('water level', filename)
+        if content is not None:
+            print('Water level data for "%s" loaded from the cache.' %
+                  osp.basename(filename))
+            # The metadata are stored as attributes of the dataframe, which
+            # are not pickled with it.
+            self._dataf = content['data']
+            for key, value in content['header'].items():
+                setattr(self._dataf, key, value)
+            self._dataf.filename = filename
+        else:
+            self.__load_dataset__(filename)
+            if self._dataf is not None:
+                save_to_parse_cache(
+                    'water level', filename,
+                    {'data': self._dataf,
+                     'header': {key: getattr(self._dataf, key) for
+                                key in HEADER.keys()}})
+
     def __load_dataset__(self, filename):
         """Loads the dataset from a file and saves it in the store."""
         self._dataf = read_water_level_datafile(filename)
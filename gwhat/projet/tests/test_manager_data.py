@@ -13,6 +13,7 @@ import os
 import os.path as osp
 
 # ---- Third Party Libraries Imports
+import numpy as np
 import pytest
 from PyQt5.QtCore import Qt
 
@@ -22,7 +23,7 @@ from gwhat.meteo.weather_reader import WXDataFrame
 from gwhat.projet.reader_waterlvl import WLDataFrame
 from gwhat.projet.reader_projet import ProjetReader
 from gwhat.projet.manager_data import (DataManager, QFileDialog, QMessageBox,
-                                       QCheckBox)
+                                       QCheckBox, INTERPOLATED_WXDSET)
 
 DATADIR = osp.join(osp.dirname(osp.realpath(__file__)), 'data')
 WXFILENAME = osp.join(DATADIR, 'sample_weather_datafile.csv')
@@ -249,6 +250,26 @@ def test_delete_waterlevel_data(datamanager, mocker, qtbot):
     assert mock_exec_.call_count == 2
 
 
+def test_delete_wldsets_outliers(datamanager):
+    """
+    Test that the outliers of the current water level dataset are deleted
+    in the dataset that is held by the data manager.
+    """
+    datamanager.new_wldset_imported('wldset1', WLDataFrame(WLFILENAME))
+    datamanager.new_wldset_imported('wldset2', WLDataFrame(WLFILENAME))
+    wldset = datamanager.get_current_wldset()
+    wldset.data.loc[wldset.data.index[7], 'WL'] += 2
+
+    emitted = []
+    datamanager.wldsetChanged.connect(emitted.append)
+    wldsets = datamanager.delete_wldsets_outliers()
+    assert sorted(wldsets.keys()) == ['wldset1', 'wldset2']
+    assert wldsets[wldset.name] is wldset
+    assert emitted == [wldset]
+    assert datamanager.get_current_wldset() is wldset
+    np.testing.assert_array_equal(wldset.get_changed_indexes(), [7])
+
+
 def test_last_opened_datasets(qtbot, projectpath):
     """
     Test that the data manager recall correctly the water level and weather
@@ -290,6 +311,69 @@ def test_last_opened_datasets(qtbot, projectpath):
     assert datamanager2.get_current_wxdset().name == 'wxdset2'
 
 
+def test_get_interpolated_wxdset(datamanager):
+    """
+    Test that the data manager returns the weather data of the project
+    interpolated at the location of the current water level dataset.
+    """
+    assert datamanager.get_interpolated_wxdset() is None
+
+    datamanager.new_wldset_imported('wldset1', WLDataFrame(WLFILENAME))
+    for name in ['wxdset1', 'wxdset2']:
+        datamanager.new_wxdset_imported(name, WXDataFrame(WXFILENAME))
+    datamanager.set_current_wxdset('wxdset1')
+
+    wxdset = datamanager.get_interpolated_wxdset()
+    assert wxdset.name == INTERPOLATED_WXDSET
+    assert wxdset.data.equals(datamanager.get_current_wxdset().data)
+
+    # The interpolator should be cached until the weather datasets of the
+    # project change.
+    interpolator = datamanager.get_interpolator()
+    assert datamanager.get_interpolator() is interpolator
+    assert len(interpolator) == 2
+    assert datamanager.get_current_wxdset().name == 'wxdset1'
+    datamanager.new_wxdset_imported('wxdset3', WXDataFrame(WXFILENAME))
+    assert datamanager.get_interpolator() is not interpolator
+
+
+def test_select_interpolated_wxdset(datamanager):
+    """
+    Test that the weather data interpolated at the location of the current
+    water level dataset can be selected in the data manager.
+    """
+    for name in ['wldset1', 'wldset2']:
+        datamanager.new_wldset_imported(name, WLDataFrame(WLFILENAME))
+    datamanager.new_wxdset_imported('wxdset1', WXDataFrame(WXFILENAME))
+    assert not datamanager.is_wxdset_selectable(INTERPOLATED_WXDSET)
+    datamanager.new_wxdset_imported('wxdset2', WXDataFrame(WXFILENAME))
+    assert datamanager.is_wxdset_selectable(INTERPOLATED_WXDSET)
+    assert datamanager.wxdsets == ['wxdset1', 'wxdset2']
+
+    datamanager.set_current_wldset('wldset1')
+    datamanager.set_current_wxdset(INTERPOLATED_WXDSET)
+    wxdset = datamanager.get_current_wxdset()
+    assert wxdset.name == INTERPOLATED_WXDSET
+    assert wxdset.data.equals(datamanager.projet.get_wxdset('wxdset1').data)
+    assert datamanager.get_current_wxdset() is wxdset
+
+    # The weather data are interpolated again when the current water level
+    # dataset changes to a well at another location.
+    datamanager.projet.db['wldsets/wldset2'].attrs['Latitude'] += 1
+    emitted = []
+    datamanager.wxdsetChanged.connect(emitted.append)
+    datamanager.set_current_wldset('wldset2')
+    assert len(emitted) == 1
+    wxdset2 = datamanager.get_current_wxdset()
+    assert wxdset2 is not wxdset
+    assert wxdset2.metadata['Latitude'] == (
+        datamanager.get_current_wldset()['Latitude'])
+
+    # The interpolated dataset cannot be deleted.
+    datamanager.del_current_wxdset()
+    assert datamanager.wxdsets == ['wxdset1', 'wxdset2']
+
+
 # ---- Tests ExportWeatherButton
 def test_export_yearly_monthly_daily(datamanager, mocker, qtbot, tmp_path):
     """
@@ -0,0 +1,422 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+# ---- Standard library imports
+import os
+import os.path as osp
+
+# ---- Third party imports
+import h5py
+import numpy as np
+import pandas as pd
+import pytest
+
+# ---- Local imports
+from gwhat import __rootdir__
+from gwhat.common.utils import save_content_to_csv
+from gwhat.meteo.evapotranspiration import calcul_thornthwaite
+from gwhat.meteo.weather_reader import WXDataFrame, METEO_VARIABLES
+import gwhat.projet.reader_projet as reader_projet
+from gwhat.projet.reader_projet import ProjetReader, WLDataFrameHDF5
+import gwhat.projet.reader_waterlvl as reader_waterlvl
+from gwhat.projet.reader_waterlvl import WLDataFrame, WLDataset
+
+WXFILENAME = osp.join(
+    __rootdir__, 'tests', 'data', "IBERVILLE (7023270)_2000-2015.out")
+WLFILENAME = osp.join(
+    __rootdir__, 'tests', 'data', 'sample_water_level_datafile.csv')
+
+
+# ---- Pytest Fixtures
+@pytest.fixture
+def project(tmp_path):
+    project = ProjetReader(osp.join(str(tmp_path), 'test_reader_projet.gwt'))
+    yield project
+    project.close()
+
+
+# ---- Tests
+def test_save_missing_value_indexes(project):
+    """
+    Test that the missing value indexes of weather datasets are saved in
+    the project as packed boolean masks and read back as expected.
+    """
+    wxdset = WXDataFrame(WXFILENAME)
+    assert len(wxdset.missing_value_indexes['Ptot']) > 0
+    project.add_wxdset('IBERVILLE', wxdset)
+
+    grp = project.db['wxdsets/IBERVILLE']
+    for variable in METEO_VARIABLES:
+        dset = grp['Missing {}'.format(variable)]
+        assert dset.dtype == np.uint8
+        assert len(dset) == int(np.ceil(len(wxdset.data) / 8))
+
+    wxdset2 = project.get_wxdset('IBERVILLE')
+    for variable in METEO_VARIABLES:
+        assert wxdset2.missing_value_indexes[variable].equals(
+            wxdset.missing_value_indexes[variable])
+
+
+def test_migrate_missing_value_indexes(project):
+    """
+    Test that the missing value indexes saved as ISO date strings in older
+    projects are converted to packed boolean masks.
+    """
+    wxdset = WXDataFrame(WXFILENAME)
+    project.add_wxdset('IBERVILLE', wxdset)
+
+    # Save the missing value indexes in the older format.
+    grp = project.db['wxdsets/IBERVILLE']
+    for variable in METEO_VARIABLES:
+        key = 'Missing {}'.format(variable)
+        del grp[key]
+        grp.create_dataset(key, data=np.array(
+            wxdset.missing_value_indexes[variable].strftime(
+                "%Y-%m-%dT%H:%M:%S").values.tolist(),
+            dtype=h5py.special_dtype(vlen=str)))
+
+    # The missing value indexes are converted to the new format when they
+    # are first read from the project.
+    wxdset2 = project.get_wxdset('IBERVILLE')
+    for variable in METEO_VARIABLES:
+        assert grp['Missing {}'.format(variable)].dtype != np.uint8
+        assert wxdset2.missing_value_indexes[variable].equals(
+            wxdset.missing_value_indexes[variable])
+        assert grp['Missing {}'.format(variable)].dtype == np.uint8
+
+
+def test_lazy_load_weather_variables(project, mocker):
+    """
+    Test that the weather variables and missing value indexes of the
+    weather datasets are read from the project only when first accessed.
+    """
+    wxdset = WXDataFrame(WXFILENAME)
+    project.add_wxdset('IBERVILLE', wxdset)
+
+    wxdset2 = project.get_wxdset('IBERVILLE')
+    spy = mocker.spy(wxdset2, 'load_missing_value_index')
+    assert wxdset2._data is None
+
+    assert wxdset2.index.equals(wxdset.data.index)
+    np.testing.assert_array_equal(wxdset2['Ptot'], wxdset.data['Ptot'])
+    np.testing.assert_array_equal(wxdset2['Tmax'], wxdset.data['Tmax'])
+    assert list(wxdset2._data.columns) == ['Ptot', 'Tmax']
+    with pytest.raises(KeyError):
+        wxdset2['Time']
+
+    assert wxdset2.missing_value_indexes['Ptot'].equals(
+        wxdset.missing_value_indexes['Ptot'])
+    wxdset2.missing_value_indexes['Ptot']
+    assert spy.call_count == 1
+    assert list(wxdset2.missing_value_indexes) == METEO_VARIABLES
+
+    # Accessing the data frame should read all the variables.
+    assert wxdset2.data.equals(wxdset.data[METEO_VARIABLES])
+    assert wxdset2.data is wxdset2.data
+
+
+def test_import_wlmeas(project, tmp_path, mocker, capsys):
+    """
+    Test that the manual measurements of all the wells of a project are
+    imported from a shared file in a single pass and only when needed.
+    """
+    wldset = WLDataFrame(WLFILENAME)
+    well = wldset['Well']
+    project.add_wldset('wldset1', wldset)
+
+    spy = mocker.spy(reader_projet, 'read_waterlvl_measures')
+    filename = osp.join(str(tmp_path), 'waterlvl_manual_measurements')
+
+    # The file does not exist yet, so an empty one should be created.
+    assert project.import_wlmeas(filename)
+    assert osp.exists(filename + '.csv')
+    assert len(project.get_wldset('wldset1').get_wlmeas()[0]) == 0
+
+    save_content_to_csv(filename + '.csv', [
+        ['Well_ID', 'Time (days)', 'Obs. (mbgs)'],
+        [well, 40623.54167, 1.43],
+        ['other well', 40700.5, 2.5],
+        [well, 40842.54167, 1.6]])
+    stat = os.stat(filename + '.csv')
+    os.utime(filename + '.csv',
+             ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert project.import_wlmeas(filename)
+    assert spy.call_count == 2
+
+    # Nothing should be read from the file or written to the project when
+    # the file did not change since the last import.
+    capsys.readouterr()
+    spy_save = mocker.spy(reader_projet, 'save_wlmeas')
+    spy_flush = mocker.spy(project.db, 'flush')
+    assert not project.import_wlmeas(filename)
+    assert spy.call_count == 2
+    assert spy_save.call_count == 0
+    assert spy_flush.call_count == 0
+    assert capsys.readouterr().out == ''
+
+    time, wl = project.get_wldset('wldset1').get_wlmeas()
+    np.testing.assert_array_equal(time, [40623.54167, 40842.54167])
+    np.testing.assert_array_equal(wl, [1.43, 1.6])
+
+    # The measurements must be imported again when a new dataset is added
+    # to the project.
+    project.add_wldset('wldset2', wldset)
+    assert project.import_wlmeas(filename)
+    assert spy.call_count == 3
+    time, wl = project.get_wldset('wldset2').get_wlmeas()
+    np.testing.assert_array_equal(wl, [1.43, 1.6])
+
+
+def test_require_wldset_groups(project):
+    """
+    Test that the groups of a water level dataset that are created on
+    first access can be created beforehand, so that the dataset can then
+    be read from a read-only project file.
+    """
+    project.add_wldset('dataset', WLDataFrame(WLFILENAME))
+    del project.db['wldsets/dataset/mrc']
+    wldset = project.get_wldset('dataset')
+    wldset.require_groups()
+
+    filename = project.filename
+    project.close()
+    with h5py.File(filename, mode='r') as db:
+        wldset = WLDataFrameHDF5(db['wldsets/dataset'])
+        assert not wldset.mrc_exists()
+        assert len(wldset.get_wlmeas()[0]) == 0
+    project.load_projet(filename)
+
+
+def test_append_waterlevels(project, tmp_path):
+    """
+    Test that the new records of a water level datafile are appended in
+    place to a water level dataset of the project.
+    """
+    with open(WLFILENAME, 'r', encoding='utf8') as f:
+        lines = f.readlines()
+    fullset = WLDataFrame(WLFILENAME)
+
+    # Add a dataset with the first half of the data and save a MRC for it.
+    wlfilename = osp.join(str(tmp_path), 'water_level_datafile.csv')
+    nrows = (len(lines) - 8) // 2
+    with open(wlfilename, 'w', encoding='utf8') as f:
+        f.writelines(lines[:8 + nrows])
+    project.add_wldset('dataset', WLDataFrame(wlfilename))
+    wldset = project.get_wldset('dataset')
+    wldset.set_mrc(1, 2, [0, 5], [1, 2, 3], [4, 5, 6])
+    assert len(wldset.data) == nrows
+
+    # Datasets saved with older versions are not resizable.
+    for colname in ['WL', 'BP', 'ET']:
+        data = wldset.dset[colname][...]
+        del wldset.dset[colname]
+        wldset.dset.create_dataset(colname, data=data)
+    assert wldset.dset['WL'].maxshape == (nrows,)
+
+    # Append the full dataset, whose first half overlaps with the data
+    # that are already saved in the project.
+    assert wldset.append_waterlevels(fullset) == len(fullset.data) - nrows
+    assert wldset.append_waterlevels(fullset) == 0
+    for wldset in [wldset, project.get_wldset('dataset')]:
+        assert isinstance(wldset.data, WLDataset)
+        assert wldset.dset['WL'].maxshape == (None,)
+        assert wldset.data.index.equals(fullset.data.index)
+        assert wldset.strftime == fullset.strftime
+        for colname in ['WL', 'BP', 'ET']:
+            np.testing.assert_array_equal(
+                wldset[colname], fullset[colname])
+            np.testing.assert_array_equal(
+                wldset.data[colname].values, fullset.data[colname].values)
+        assert wldset.mrc_exists()
+        np.testing.assert_array_equal(wldset['mrc/peak_indx'], [0, 5])
+
+    # The records that are within the period of the existing data, but
+    # whose timestamp is not in the dataset, are dropped with a warning.
+    fullset.data.index += pd.Timedelta(minutes=1)
+    with pytest.warns(UserWarning, match=str(len(fullset.data) - 1)):
+        assert wldset.append_waterlevels(fullset) == 1
+    assert wldset.data.index[-1] == fullset.data.index[-1]
+
+
+def test_append_weather_data(project, tmp_path):
+    """
+    Test that the new days of a weather datafile are appended in place to
+    a weather dataset of the project.
+    """
+    with open(WXFILENAME, 'r') as f:
+        # We drop the ETP column of the data, so that the potential
+        # evapotranspiration is calculated with the method of Thornthwaite.
+        lines = [line if i < 10 else line.rsplit(',', 1)[0] + '\n' for
+                 i, line in enumerate(f)]
+
+    # The data of the first file end on 2010-06-15 and those of the second
+    # file start on 2010-06-20.
+    filename1 = osp.join(str(tmp_path), 'weather_datafile_1.out')
+    with open(filename1, 'w') as f:
+        f.writelines(lines[:3830])
+    filename2 = osp.join(str(tmp_path), 'weather_datafile_2.out')
+    with open(filename2, 'w') as f:
+        f.writelines(lines[:11] + lines[3834:])
+    wxdset1 = WXDataFrame(filename1)
+    wxdset2 = WXDataFrame(filename2)
+    gap = pd.date_range('2010-06-16', '2010-06-19')
+
+    project.add_wxdset('IBERVILLE', wxdset1)
+
+    # Read some of the data of a weather dataset of the project before
+    # the new data are appended.
+    held = project.get_wxdset('IBERVILLE')
+    held['Tmax']
+    held.missing_value_indexes['Tmax']
+    held.get_monthly_values()
+
+    assert (project.append_wxdset('IBERVILLE', wxdset2) ==
+            len(gap) + len(wxdset2.index))
+    assert project.append_wxdset('IBERVILLE', wxdset2) == 0
+
+    wxdset = project.get_wxdset('IBERVILLE')
+    assert wxdset.index.equals(
+        wxdset1.index.append(gap).append(wxdset2.index))
+    for var in METEO_VARIABLES:
+        if var != 'PET':
+            np.testing.assert_array_equal(
+                wxdset[var].values[:len(wxdset1.index)],
+                wxdset1[var].values)
+            np.testing.assert_array_equal(
+                wxdset[var].values[-len(wxdset2.index):],
+                wxdset2[var].values)
+        expected = (wxdset1.missing_value_indexes[var]
+                    .append(gap)
+                    .append(wxdset2.missing_value_indexes[var]))
+        assert wxdset.missing_value_indexes[var].equals(
+            expected.sort_values())
+
+    # The missing data between the two datasets are filled as expected.
+    np.testing.assert_array_equal(wxdset['Ptot'][gap].values, 0)
+    np.testing.assert_allclose(
+        wxdset['Tavg'][gap].values, np.linspace(16.1, 23.3, 6)[1:-1])
+
+    # Only the potential evapotranspiration of 2010 and after is
+    # calculated again.
+    i0 = wxdset.index.searchsorted(pd.Timestamp('2010-01-01'))
+    np.testing.assert_array_equal(
+        wxdset['PET'].values[:i0], wxdset1['PET'].values[:i0])
+    np.testing.assert_allclose(
+        wxdset['PET'].values[i0:],
+        calcul_thornthwaite(wxdset['Tavg'][i0:], wxdset.metadata['Latitude'],
+                            wxdset['Tavg']).values)
+
+    # The weather dataset that existed before the new data were appended
+    # must read its data again from the project.
+    assert held.index.equals(wxdset.index)
+    for var in METEO_VARIABLES:
+        np.testing.assert_array_equal(held[var].values, wxdset[var].values)
+        assert held.missing_value_indexes[var].equals(
+            wxdset.missing_value_indexes[var])
+    assert held.get_monthly_values().equals(wxdset.get_monthly_values())
+
+
+def test_undo_and_commit_waterlevels_changes(project, monkeypatch):
+    """
+    Test that the changes made to the water level data of a dataset can be
+    undone and that only the changed values are written to the project
+    when they are committed.
+    """
+    project.add_wldset('dataset', WLDataFrame(WLFILENAME))
+    wldset = project.get_wldset('dataset')
+    expected = wldset.waterlevels.copy()
+    assert not wldset.has_uncommited_changes
+
+    wldset.delete_waterlevels_at([5, 3, 4])
+    wldset.delete_waterlevels_at([100])
+    assert wldset.has_uncommited_changes
+    np.testing.assert_array_equal(wldset.get_changed_indexes(), [3, 4, 5, 100])
+    wldset.undo()
+    assert np.isnan(wldset.waterlevels[3:6]).all()
+    assert wldset.waterlevels[100] == expected[100]
+    wldset.undo()
+    assert not wldset.has_uncommited_changes
+    np.testing.assert_array_equal(wldset.waterlevels, expected)
+
+    # Only the changed ranges of the water level data are written.
+    monkeypatch.setattr(reader_projet, 'COMMIT_MAXGAP', 10)
+    wldset.delete_waterlevels_at([3, 4, 5, 300])
+    wldset.dset['WL'][200] = -999
+    wldset.commit()
+    assert not wldset.has_uncommited_changes
+    expected[[3, 4, 5, 300]] = np.nan
+    expected_project = expected.copy()
+    expected_project[200] = -999
+    np.testing.assert_array_equal(wldset.waterlevels, expected)
+    np.testing.assert_array_equal(wldset.dset['WL'][...], expected_project)
+    wldset.dset['WL'][200] = expected[200]
+
+    # The oldest changes are dropped from the undo stack when it is full,
+    # but can still be cleared.
+    monkeypatch.setattr(reader_waterlvl, 'UNDO_STACK_MAXSIZE', 2000)
+    for i in range(30):
+        wldset.delete_waterlevels_at(np.arange(10) + 10 * i)
+    assert len(wldset._undo_stack) == 12
+    wldset.clear_all_changes()
+    assert not wldset.has_uncommited_changes
+    np.testing.assert_array_equal(wldset.waterlevels, expected)
+
+
+def test_delete_wldsets_outliers(project):
+    """
+    Test that the spikes and flat lines of all the water level datasets of
+    a project are deleted in batch, that the steps are only reported, and
+    that the changes can be reviewed and commited.
+    """
+    project.add_wldset('dataset 1', WLDataFrame(WLFILENAME))
+    project.add_wldset('dataset 2', WLDataFrame(WLFILENAME))
+    project.db['wldsets/dataset 1/WL'][100] += 2
+    expected = project.db['wldsets/dataset 1/WL'][...]
+
+    # Replace the data of the second dataset with a recharge event, which
+    # is a sharp rise followed by a slow recession.
+    time = np.arange(len(expected))
+    waterlevels = 3 - 0.001 * time
+    waterlevels[200:] += 0.25 * np.exp(-(time[200:] - 200) / 30)
+    project.db['wldsets/dataset 2/WL'][...] = waterlevels
+
+    # The first dataset is already opened and has pending changes.
+    held = project.get_wldset('dataset 1')
+    held.delete_waterlevels_at([5])
+
+    wldsets = project.delete_wldsets_outliers({'dataset 1': held})
+    assert sorted(wldsets.keys()) == ['dataset 1', 'dataset 2']
+    assert wldsets['dataset 1'] is held
+    for name, wldset in wldsets.items():
+        outliers = WLDataFrameHDF5(
+            project.db['wldsets/%s' % name]).find_outliers()
+        indexes = np.union1d(outliers['spikes'], outliers['flatlines'])
+        if name == 'dataset 1':
+            indexes = np.union1d(indexes, [5])
+        np.testing.assert_array_equal(wldset.get_changed_indexes(), indexes)
+        assert np.isnan(wldset.waterlevels[indexes]).all()
+    assert 100 in wldsets['dataset 1'].get_changed_indexes()
+    np.testing.assert_array_equal(
+        project.db['wldsets/dataset 1/WL'][...], expected)
+
+    # The recharge event is reported as a step, but is not deleted.
+    assert not wldsets['dataset 2'].has_uncommited_changes
+    outliers = wldsets['dataset 2'].find_outliers()
+    np.testing.assert_array_equal(outliers['steps'], [200])
+
+    # Undo the deletion of the outliers and commit the pending changes.
+    wldsets['dataset 1'].undo()
+    wldsets['dataset 1'].commit()
+    expected[5] = np.nan
+    np.testing.assert_array_equal(
+        project.get_wldset('dataset 1').waterlevels, expected)
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', __file__, '-v', '-rw'])
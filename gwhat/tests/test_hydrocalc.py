@@ -11,13 +11,16 @@ import os
 import os.path as osp
 
 # ---- Third Party Libraries Imports
+import numpy as np
 import pytest
 from PyQt5.QtCore import Qt
 
 # ---- Local Libraries Imports
 from gwhat.meteo.weather_reader import WXDataFrame
 from gwhat.projet.reader_waterlvl import WLDataFrame
-from gwhat.HydroCalc2 import WLCalc
+from gwhat.HydroCalc2 import (
+    WLCalc, find_mrc_recession_periods, calc_mrc_for_project, mrc_calc,
+    mrc_bootstrap)
 from gwhat.projet.manager_data import DataManager
 from gwhat.projet.reader_projet import ProjetReader
 
@@ -70,6 +73,124 @@ def test_hydrocalc_init(hydrocalc, mocker):
     assert hydrocalc
 
 
+def test_find_nearest_peak(hydrocalc):
+    """
+    Test that the nearest peak to the mouse cursor is found as expected
+    and that the display coordinates of the peaks are cached.
+    """
+    ax0 = hydrocalc.fig.axes[0]
+    hydrocalc.peak_indx = np.array([200, 10, 100, 300])
+    x = hydrocalc.time[hydrocalc.peak_indx] + (
+        hydrocalc.dt4xls2mpl * hydrocalc.dformat)
+    y = hydrocalc.water_lvl[hydrocalc.peak_indx]
+    xyt = ax0.transData.transform(np.column_stack((x, y)))
+
+    assert hydrocalc._find_nearest_peak(*xyt[2]) == 2
+    assert hydrocalc._find_nearest_peak(xyt[3, 0] + 5, xyt[3, 1] - 5) == 3
+    assert hydrocalc._find_nearest_peak(xyt[0, 0] + 20, xyt[0, 1]) is None
+    index = hydrocalc._peaks_display_index
+    assert index is not None
+
+    # The cached display coordinates should be reused until the limits
+    # of the graph change.
+    hydrocalc._find_nearest_peak(*xyt[1])
+    assert hydrocalc._peaks_display_index is index
+    ax0.set_xlim(x[1] - 10, x[1] + 10)
+    assert hydrocalc._peaks_display_index is None
+    xyt = ax0.transData.transform(np.column_stack((x, y)))
+    assert hydrocalc._find_nearest_peak(*xyt[1]) == 1
+
+
+def test_find_mrc_recession_periods():
+    """
+    Test that the recession periods are detected automatically as expected
+    from the water level data.
+    """
+    wldset = WLDataFrame(WLFILENAME)
+    time, wlvl = wldset.xldates, wldset.waterlevels
+
+    ipeak = find_mrc_recession_periods(time, wlvl)
+    assert len(ipeak) > 0
+    assert len(ipeak) % 2 == 0
+    assert np.all(np.diff(ipeak) > 0)
+    # WARNING: water levels are in mbgs, so they increase during recessions.
+    assert np.all(wlvl[ipeak[1::2]] > wlvl[ipeak[::2]])
+
+    # Assert that the minimum duration and amplitude are respected.
+    ipeak2 = find_mrc_recession_periods(
+        time, wlvl, min_duration=30, min_amplitude=0.2)
+    assert 0 < len(ipeak2) < len(ipeak)
+    assert np.all(time[ipeak2[1::2]] - time[ipeak2[::2]] >= 30)
+    assert np.all(wlvl[ipeak2[1::2]] - wlvl[ipeak2[::2]] >= 0.2)
+
+    # Assert that nan values are skipped.
+    wlvl = wlvl.copy()
+    wlvl[ipeak2[0]] = np.nan
+    ipeak3 = find_mrc_recession_periods(
+        time, wlvl, min_duration=30, min_amplitude=0.2)
+    assert not np.any(np.isnan(wlvl[ipeak3]))
+
+
+def test_calc_mrc_for_project(project):
+    """
+    Test that the MRC is computed and saved automatically for all the water
+    level datasets of a project.
+    """
+    results = calc_mrc_for_project(
+        project, min_duration=5, min_amplitude=0.05, max_workers=2)
+    assert list(results.keys()) == project.wldsets
+
+    for name in project.wldsets:
+        wldset = project.get_wldset(name)
+        assert wldset.mrc_exists()
+        A, B = wldset['mrc/params']
+        assert (A, B) == results[name][:2]
+        assert len(wldset['mrc/peak_indx']) > 0
+        assert len(wldset['mrc/recess']) == len(wldset.xldates)
+
+
+def test_mrc_bootstrap():
+    """
+    Test that the confidence intervals of the MRC parameters are computed
+    as expected with the bootstrap.
+    """
+    wldset = WLDataFrame(WLFILENAME)
+    time, wlvl = wldset.xldates, wldset.waterlevels
+    ipeak = find_mrc_recession_periods(
+        time, wlvl, min_duration=5, min_amplitude=0.05)
+    A, B, hp, RMSE = mrc_calc(time, wlvl, ipeak)
+
+    A_samples, B_samples, params_ci = mrc_bootstrap(
+        time, wlvl, ipeak, nboot=50, seed=4, max_workers=2)
+    assert len(A_samples) == len(B_samples) == 50
+    assert params_ci.shape == (2, 2)
+    assert params_ci[0, 0] <= A <= params_ci[0, 1]
+    assert params_ci[1, 0] <= B <= params_ci[1, 1]
+
+    # Assert that the results are reproducible with the same seed.
+    A_samples2, B_samples2, params_ci2 = mrc_bootstrap(
+        time, wlvl, ipeak, nboot=50, seed=4, max_workers=2)
+    assert np.array_equal(params_ci, params_ci2)
+
+
+def test_calc_mrc_for_project_with_bootstrap(project):
+    """
+    Test that the confidence intervals of the MRC parameters are saved in
+    the project and cleared when a new MRC is saved.
+    """
+    calc_mrc_for_project(
+        project, min_duration=5, min_amplitude=0.05, nboot=20,
+        max_workers=2)
+    wldset = project.get_wldset(project.wldsets[0])
+    params_ci, confidence = wldset.get_mrc_ci()
+    assert params_ci.shape == (2, 2)
+    assert confidence == 0.95
+
+    wldset.set_mrc(*wldset['mrc/params'], wldset['mrc/peak_indx'],
+                   wldset['mrc/time'], wldset['mrc/recess'])
+    assert wldset.get_mrc_ci() == (None, None)
+
+
 if __name__ == "__main__":
     pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
     # pytest.main()
@@ -11,16 +11,20 @@ import os
 import os.path as osp
 
 # ---- Third Party Libraries Imports
+import numpy as np
+import pandas as pd
 import pytest
 from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QInputDialog
 
 # ---- Local Libraries Imports
 from gwhat.meteo.weather_reader import WXDataFrame
 from gwhat.projet.reader_waterlvl import WLDataFrame
 from gwhat.HydroPrint2 import (HydroprintGUI, PageSetupWin, QFileDialog,
                                QMessageBox)
-from gwhat.projet.manager_data import DataManager
+from gwhat.projet.manager_data import DataManager, INTERPOLATED_WXDSET
 from gwhat.projet.reader_projet import ProjetReader
+from gwhat.hydrograph4 import export_hydrographs_for_project
 
 DATADIR = osp.join(osp.dirname(osp.realpath(__file__)), 'data')
 WXFILENAMES = (
@@ -130,6 +134,7 @@ def test_zoomin_zoomout(hydroprint):
 def test_save_hydrograph_fig(hydroprint, mocker, qtbot, projectpath):
     """Test saving the hydrograph figure to disk."""
     # Save the hydrograph in the pdf and svg format.
+    mocker.patch.object(QInputDialog, 'getInt', return_value=(0, True))
     for fformat in ['pdf', 'svg']:
         fname = os.path.join(projectpath, "test_hydrograph." + fformat)
         mocker.patch.object(
@@ -140,6 +145,39 @@ def test_save_hydrograph_fig(hydroprint, mocker, qtbot, projectpath):
         qtbot.waitUntil(lambda: os.path.exists(fname))
 
 
+def test_save_hydrograph_svg_rasterized(hydroprint, mocker, qtbot,
+                                        projectpath):
+    """
+    Test that the resolution of the rasterized data layers is asked only
+    when saving the hydrograph in the SVG format.
+    """
+    spy = mocker.spy(hydroprint.hydrograph, 'savefig')
+    getint = mocker.patch.object(
+        QInputDialog, 'getInt', return_value=(150, True))
+
+    fname = os.path.join(projectpath, "test_hydrograph_raster.pdf")
+    mocker.patch.object(
+        QFileDialog, 'getSaveFileName', return_value=(fname, '*.pdf'))
+    qtbot.mouseClick(hydroprint.btn_save, Qt.LeftButton)
+    assert getint.call_count == 0
+    assert spy.call_args[0] == (fname, None)
+
+    fname = os.path.join(projectpath, "test_hydrograph_raster.svg")
+    mocker.patch.object(
+        QFileDialog, 'getSaveFileName', return_value=(fname, '*.svg'))
+    qtbot.mouseClick(hydroprint.btn_save, Qt.LeftButton)
+    assert getint.call_count == 1
+    assert spy.call_args[0] == (fname, 150)
+    with open(fname) as f:
+        assert '<image' in f.read()
+
+    # The figure is not saved if the user cancels the dialog.
+    os.remove(fname)
+    getint.return_value = (150, False)
+    qtbot.mouseClick(hydroprint.btn_save, Qt.LeftButton)
+    assert not os.path.exists(fname)
+
+
 def test_graph_layout(hydroprint, mocker, qtbot):
     """Test saving and loading hydrograph layout to and from the project."""
     # Save the graph layout.
@@ -206,6 +244,159 @@ def test_graph_layout(hydroprint, mocker, qtbot):
     assert hydroprint.datum_widget.currentText() == 'Ground Surface'
 
 
+def test_page_setup_changed(hydroprint, mocker, qtbot):
+    """
+    Test that only the parts of the hydrograph that are affected by the
+    changes made to the page setup are updated.
+    """
+    hydrograph = hydroprint.hydrograph
+    pagesetup = hydroprint.page_setup_win
+    assert hydrograph.isHydrographExists is True
+    mocker.spy(hydrograph, 'generate_hydrograph')
+    mocker.spy(hydrograph, 'update_fig_size')
+    mocker.spy(hydrograph, 'draw_waterlvl')
+    mocker.spy(hydrograph, 'setup_legend')
+
+    # Hide the legend. The margins do not need to be updated because the
+    # title is still shown.
+    pagesetup.legend_on.set_value(False)
+    qtbot.mouseClick(pagesetup.btn_apply, Qt.LeftButton)
+    assert hydrograph.isLegend is False
+    assert hydrograph.setup_legend.call_count == 1
+    assert hydrograph.update_fig_size.call_count == 0
+    assert hydrograph.draw_waterlvl.call_count == 0
+
+    # Show the trend line.
+    pagesetup.wltrend_on.set_value(True)
+    qtbot.mouseClick(pagesetup.btn_apply, Qt.LeftButton)
+    assert hydrograph.draw_waterlvl.call_count == 1
+    assert hydrograph.update_fig_size.call_count == 0
+
+    # Change the size of the figure.
+    pagesetup.fwidth.setValue(12.5)
+    qtbot.mouseClick(pagesetup.btn_apply, Qt.LeftButton)
+    assert hydrograph.get_figwidth() == 12.5
+    assert hydrograph.update_fig_size.call_count == 1
+    assert hydrograph.draw_waterlvl.call_count == 1
+
+    assert hydrograph.generate_hydrograph.call_count == 0
+
+
+def test_weather_bins(hydroprint, mocker):
+    """
+    Test that the weather data are resampled in calendar bins and that the
+    binned data are cached for each bin width.
+    """
+    hydrograph = hydroprint.hydrograph
+    wxdset = hydrograph.wxdset
+    mocker.spy(hydrograph, '_calc_weather_bins')
+
+    # Resample the weather data in monthly bins.
+    hydroprint.qweather_bin.setCurrentIndex(2)
+    assert hydrograph._calc_weather_bins.call_count == 1
+    monthly = wxdset.data.groupby(
+        [wxdset.data.index.year, wxdset.data.index.month]).sum()
+    assert len(hydrograph.bTIME) == len(monthly)
+    assert np.allclose(hydrograph.bPTOT, monthly['Ptot'].values)
+    assert np.allclose(hydrograph.bRAIN, monthly['Rain'].values)
+    assert np.all(np.isin(hydrograph.bWIDTH, [28, 29, 30, 31]))
+
+    # Switch back to weekly bins, which were computed when the hydrograph
+    # was first generated. The weeks should start on Monday.
+    hydroprint.qweather_bin.setCurrentIndex(1)
+    assert hydrograph._calc_weather_bins.call_count == 1
+    assert np.all(hydrograph.bWIDTH == 7)
+    tstart = hydrograph.bTIME - 3.5
+    assert np.all(pd.to_datetime(
+        tstart + 0.5, unit='D', origin='1899-12-30').dayofweek == 0)
+    assert np.isclose(np.sum(hydrograph.bPTOT), wxdset.data['Ptot'].sum())
+
+    # Switch back to monthly bins. The cached data should be used.
+    hydroprint.qweather_bin.setCurrentIndex(2)
+    assert hydrograph._calc_weather_bins.call_count == 1
+    assert len(hydrograph.bTIME) == len(monthly)
+
+    # Resample the weather data in yearly bins.
+    hydroprint.qweather_bin.setCurrentIndex(3)
+    assert hydrograph._calc_weather_bins.call_count == 2
+    yearly = wxdset.data.groupby(wxdset.data.index.year).sum()
+    assert len(hydrograph.bTIME) == len(yearly)
+    assert np.allclose(hydrograph.bPTOT, yearly['Ptot'].values)
+    assert np.allclose(hydrograph.bRAIN, yearly['Rain'].values)
+    assert np.all(np.isin(hydrograph.bWIDTH, [365, 366]))
+
+
+def test_weather_bins_after_append(hydroprint, tmp_path):
+    """
+    Test that the binned weather data are calculated again when new data
+    are appended to the weather dataset of the hydrograph.
+    """
+    hydrograph = hydroprint.hydrograph
+    with open(WXFILENAMES[0], 'r') as f:
+        lines = f.readlines()
+    wxfilename = osp.join(str(tmp_path), 'weather_datafile.out')
+    with open(wxfilename, 'w') as f:
+        f.writelines(lines[:-365])
+    project = ProjetReader(osp.join(str(tmp_path), 'project.gwt'))
+    project.add_wxdset('IBERVILLE', WXDataFrame(wxfilename))
+    wxdset = project.get_wxdset('IBERVILLE')
+
+    hydrograph.generate_hydrograph(wxdset, hydrograph.wldset)
+    ptot = np.sum(hydrograph.bPTOT)
+    assert np.isclose(ptot, wxdset['Ptot'].sum())
+
+    # Append the data of the last year to the weather dataset.
+    assert project.append_wxdset('IBERVILLE', WXDataFrame(WXFILENAMES[0]))
+    hydrograph.generate_hydrograph(wxdset, hydrograph.wldset)
+    assert np.sum(hydrograph.bPTOT) > ptot
+    assert np.isclose(np.sum(hydrograph.bPTOT), wxdset['Ptot'].sum())
+    project.close()
+
+
+def test_make_xticks_info(hydroprint, mocker):
+    """
+    Test that the xticks are positioned on the first day of each month or
+    year and that the text metrics of the labels are cached.
+    """
+    hydrograph = hydroprint.hydrograph
+    hydrograph.TIMEmin = 36526  # 2000-01-01
+    hydrograph.TIMEmax = 40179  # 2010-01-01
+    hydrograph.date_labels_pattern = 12
+    mocker.spy(hydrograph.canvas, 'get_renderer')
+
+    hydrograph.datemode = 'month'
+    xticks, labels_pos, labels, minor_xticks = hydrograph.make_xticks_info()
+    assert len(minor_xticks) == 12 * 10 + 1
+    assert minor_xticks[:3] == [36526, 36526 + 31, 36526 + 31 + 29]
+    assert xticks == minor_xticks[::12]
+    assert labels[0] == "JAN '00"
+    assert labels[-1] == "JAN '10"
+
+    hydrograph.datemode = 'year'
+    hydrograph.date_labels_pattern = 1
+    xticks, labels_pos, labels, minor_xticks = hydrograph.make_xticks_info()
+    assert labels == [str(year) for year in range(2000, 2011)]
+    assert xticks[1] == 36526 + 366
+
+    # The metrics of the labels should have been calculated only once.
+    assert hydrograph.canvas.get_renderer.call_count <= 1
+
+
+def test_hydrograph_with_interpolated_wxdset(hydroprint):
+    """
+    Test that the hydrograph can be plotted with the weather data
+    interpolated at the location of the well.
+    """
+    hydroprint.dmngr.set_current_wxdset(INTERPOLATED_WXDSET)
+    wxdset = hydroprint.hydrograph.wxdset
+    assert wxdset.name == INTERPOLATED_WXDSET
+    assert wxdset.metadata['Latitude'] == hydroprint.wldset['Latitude']
+    assert hydroprint.hydrograph.isHydrographExists
+
+    hydroprint.dmngr.set_current_wxdset('MARIEVILLE')
+    assert hydroprint.hydrograph.wxdset.name == 'MARIEVILLE'
+
+
 def test_clear_hydrograph(hydroprint, mocker, tmp_path):
     """
     Test that the hydrograph is cleared correctly when the water level or
@@ -217,6 +408,47 @@ def test_clear_hydrograph(hydroprint, mocker, tmp_path):
     assert hydroprint.hydrograph.isHydrographExists is False
 
 
+def test_export_hydrographs_for_project(tmp_path):
+    """
+    Test that the hydrographs of all the wells of a project are exported
+    correctly in batch.
+    """
+    project = ProjetReader(osp.join(tmp_path, "project_test_export.gwt"))
+    for wxfilename in WXFILENAMES:
+        wxdset = WXDataFrame(wxfilename)
+        project.add_wxdset(wxdset.metadata['Station Name'], wxdset)
+    wldset = WLDataFrame(WLFILENAME)
+    project.add_wldset('well1', wldset)
+    project.add_wldset('well2', wldset)
+
+    # Save a layout for the second well.
+    layout = {'WLmin': 3.75, 'WLscale': 0.25, 'RAINscale': 20,
+              'fwidth': 8.5, 'fheight': 5, 'va_ratio': 0.2, 'NZGrid': 8,
+              'bwidth_indx': 2, 'date_labels_pattern': 2,
+              'datemode': 'Month', 'wxdset': 'IBERVILLE',
+              'TIMEmin': 41214, 'TIMEmax': 41609, 'WLdatum': 'mbgs',
+              'title_on': True, 'legend_on': True, 'language': 'french',
+              'trend_line': True, 'meteo_on': True, 'glue_wl_on': False,
+              'mrc_wl_on': False, 'figframe_lw': 0,
+              'colors': {'Rain': [0, 0, 255]}}
+    project.get_wldset('well2').save_layout(layout)
+
+    dirname = osp.join(tmp_path, 'hydrographs')
+    for fext in ['.pdf', '.png']:
+        fnames = export_hydrographs_for_project(
+            project, dirname, fext, max_workers=2)
+        assert fnames == [
+            osp.join(dirname, 'hydrograph_well1' + fext),
+            osp.join(dirname, 'hydrograph_well2' + fext)]
+        for fname in fnames:
+            assert osp.exists(fname)
+
+    # Assert that the project was reopened correctly.
+    assert project.wldsets == ['well1', 'well2']
+    assert project.get_wldset('well2').get_layout()['wxdset'] == 'IBERVILLE'
+    project.close()
+
+
 # ---- Test PageSetupWin
 def test_pagesetup_defaults(pagesetup):
     """Assert that the default values are as expected."""
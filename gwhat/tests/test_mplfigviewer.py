@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © 2014-2018 GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Third Party Libraries Imports
+import numpy as np
+import pytest
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# ---- Local Libraries Imports
+from gwhat.mplFigViewer3 import ImageViewer
+
+
+# ---- Pytest Fixtures
+@pytest.fixture
+def mplfig():
+    mplfig = Figure(figsize=(8, 6), dpi=100)
+    FigureCanvasAgg(mplfig)
+    ax = mplfig.add_subplot(111)
+    ax.plot(np.random.rand(1000))
+    return mplfig
+
+
+@pytest.fixture
+def imageviewer(mplfig, qtbot):
+    imageviewer = ImageViewer()
+    imageviewer.setFixedSize(400, 300)
+    imageviewer.load_mpl_figure(mplfig, view_dpi=50)
+    qtbot.addWidget(imageviewer)
+    imageviewer.show()
+    qtbot.waitExposed(imageviewer)
+    return imageviewer
+
+
+# ---- Tests
+def test_imageviewer_tiles(imageviewer, qtbot):
+    """
+    Test that only the visible tiles are produced and that the figure is
+    rasterized at a higher resolution only when zooming in.
+    """
+    canvas = imageviewer.imageCanvas
+    assert canvas.size().width() == 800
+    assert canvas.levels[0].width() == 400
+
+    # The figure is displayed at twice the resolution of the base image, so
+    # it must have been rasterized again at a higher resolution.
+    assert list(canvas.levels.keys()) == [0, 1]
+    assert canvas.levels[1].width() == 800
+
+    # Only the tiles that are visible in the scroll area are produced.
+    ntiles = len(canvas.tiles)
+    assert 0 < ntiles < 4 * 3
+
+    # Zooming out should not require to rasterize the figure again.
+    imageviewer.zoomOut()
+    imageviewer.zoomOut()
+    imageviewer.zoomOut()
+    imageviewer.zoomOut()
+    canvas.repaint()
+    assert list(canvas.levels.keys()) == [0, 1]
+    assert canvas.size().width() == int(800 / 1.2**3)
+
+    # Reloading the figure discards the tiles and the higher resolutions.
+    canvas.load_mpl_figure(canvas.mplfig, view_dpi=50)
+    assert len(canvas.tiles) == 0
+    assert list(canvas.levels.keys()) == [0]
+
+
+def test_imageviewer_tiles_cache_size(imageviewer):
+    """Test that the least recently used tiles are discarded."""
+    canvas = imageviewer.imageCanvas
+    canvas.max_tiles = 2
+    for i in range(2):
+        for j in range(4):
+            canvas.get_tile(800, 400, i, j)
+    assert list(canvas.tiles.keys()) == [(800, 400, 1, 2), (800, 400, 1, 3)]
+
+    # Assert the size of the tile at the bottom-right corner of the image.
+    tile = canvas.get_tile(800, 400, 1, 3)
+    assert tile.width() == 800 - 3 * canvas.tile_size
+    assert tile.height() == 400 - canvas.tile_size
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', __file__, '-v', '-rw'])
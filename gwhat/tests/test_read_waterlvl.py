@@ -20,8 +20,10 @@ import xlsxwriter
 # ---- Local library imports
 from gwhat.common.utils import (save_content_to_excel, save_content_to_csv,
                                 delete_file)
+import gwhat.projet.reader_waterlvl as reader_waterlvl
 from gwhat.projet.reader_waterlvl import (
-        load_waterlvl_measures, init_waterlvl_measures, WLDataFrame)
+        load_waterlvl_measures, init_waterlvl_measures, WLDataFrame,
+        read_waterlvl_measures)
 
 DATA = [['Well name = ', "êi!@':i*"],
         ['well id : ', '1234ABC'],
@@ -37,6 +39,8 @@ DATA = [['Well name = ', "êi!@':i*"],
         [41241.71875, 3.665277031, 10.33097437, 396.9950643]
         ]
 FILENAME = "water_level_datafile"
+SAMPLE_FILENAME = osp.join(
+    osp.dirname(__file__), 'data', 'sample_water_level_datafile.csv')
 
 
 # ---- Pytest Fixtures
@@ -81,6 +85,79 @@ def test_reading_waterlvl(datatmpdir, ext):
     assert np.abs(np.min(df.xldates - expected_results['Time'])) < 10e-6
 
 
+def test_reading_waterlvl_with_irregular_data(tmpdir):
+    """
+    Test that water level datafiles with dates saved as strings, missing
+    values and rows with a varying number of fields are read as expected
+    into float64 columns.
+    """
+    filename = osp.join(str(tmpdir), FILENAME + '.csv')
+    with open(filename, 'w', encoding='utf8') as f:
+        f.write("Well Name,Test Well\n"
+                "Latitude,45.36\n"
+                "\n"
+                "Date,WL(mbgs),BP(m),Comment\n"
+                "2012-11-29 16:45:00,3.5,10,ok\n"
+                "2012-11-29 17:00:00,,11\n"
+                "2012-11-29 17:15:00,3.75,12,ok,extra\n"
+                "2012-11-29 17:30:00,error,13,ok\n")
+    df = WLDataFrame(filename)
+
+    assert df['Well'] == 'Test Well'
+    assert df['Latitude'] == 45.36
+    assert df.data['WL'].dtype == np.float64
+    assert df.data['BP'].dtype == np.float64
+    assert df['Time'] == ['2012-11-29T16:45:00', '2012-11-29T17:00:00',
+                          '2012-11-29T17:15:00', '2012-11-29T17:30:00']
+    np.testing.assert_array_equal(df['WL'], [3.5, np.nan, 3.75, np.nan])
+    np.testing.assert_array_equal(df['BP'], [10, 11, 12, 13])
+    assert np.all(np.isnan(df['ET']))
+
+
+def test_delete_outliers_in_sample_data():
+    """
+    Test that no water level is deleted in a smooth record of daily water
+    levels, whose recession troughs and recharge rises are valid data.
+    """
+    wldset = WLDataFrame(SAMPLE_FILENAME)
+    expected = wldset.waterlevels.copy()
+    outliers = wldset.delete_outliers()
+    assert len(outliers['spikes']) == 0
+    assert len(outliers['flatlines']) == 0
+    assert not wldset.has_uncommited_changes
+    np.testing.assert_array_equal(wldset.waterlevels, expected)
+
+
+def test_clear_all_changes_when_undo_stack_is_truncated(monkeypatch):
+    """
+    Test that the changes made to the water level data of a dataset that
+    is not saved in a project can all be cleared, even after the oldest
+    changes were dropped from the undo stack.
+    """
+    monkeypatch.setattr(reader_waterlvl, 'UNDO_STACK_MAXSIZE', 2000)
+    wldset = WLDataFrame(SAMPLE_FILENAME)
+    expected = wldset.waterlevels.copy()
+    for i in range(30):
+        wldset.delete_waterlevels_at(np.arange(10) + 5 * i)
+    assert len(wldset._undo_stack) == 12
+    assert wldset.can_undo
+
+    # The changes that are still in the undo stack can be undone, but the
+    # oldest ones remain.
+    while wldset.can_undo:
+        wldset.undo()
+    assert wldset.has_uncommited_changes
+    np.testing.assert_array_equal(
+        wldset.get_changed_indexes(), np.arange(155))
+    assert np.all(np.isnan(wldset.waterlevels[:95]))
+    np.testing.assert_array_equal(wldset.waterlevels[95:], expected[95:])
+
+    wldset.clear_all_changes()
+    assert not wldset.has_uncommited_changes
+    assert not wldset.can_undo
+    np.testing.assert_array_equal(wldset.waterlevels, expected)
+
+
 # Test water_level_measurements.
 # -------------------------------
 
@@ -166,6 +243,41 @@ def test_load_waterlvl_measures_withxls():
     assert np.all(wl == np.array([3.75]))
 
 
+@pytest.mark.parametrize("ext", ['.csv', '.xls', '.xlsx'])
+def test_read_waterlvl_measures(tmpdir, ext):
+    """
+    Test that the manual measurements of all wells are read and split by
+    well in a single pass.
+    """
+    filename = osp.join(str(tmpdir), "waterlvl_manual_measurements" + ext)
+    if ext == '.csv':
+        save_content_to_csv(filename, WLMEAS)
+    else:
+        save_content_to_excel(filename, WLMEAS)
+
+    measures = read_waterlvl_measures(filename)
+    assert sorted(measures.keys()) == sorted(
+        ['Test', 'test', "é@#^'", 'test2'])
+    time, wl = measures['Test']
+    assert np.all(time == np.array([40623.54167, 40842.54167, 41065.54167]))
+    assert np.all(wl == np.array([1.43, 1.6, 1.57]))
+    time, wl = measures['test2']
+    assert np.all(time == np.array([41402.34375]))
+    assert np.all(wl == np.array([3.56]))
+
+
+def test_read_waterlvl_measures_unsupported_format(tmpdir):
+    """
+    Test that an error is raised when reading manual measurements from
+    a file format that is not supported.
+    """
+    filename = osp.join(str(tmpdir), "waterlvl_manual_measurements.txt")
+    with open(filename, 'w') as f:
+        f.write('Well_ID,Time (days),Obs. (mbgs)\n')
+    with pytest.raises(ValueError):
+        read_waterlvl_measures(filename)
+
+
 if __name__ == "__main__":
     pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
     # pytest.main()
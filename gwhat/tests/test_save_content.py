@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard library imports
+import csv
+import os.path as osp
+
+# ---- Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+import xlrd
+
+# ---- Local library imports
+import gwhat.common.utils as utils
+from gwhat.common.utils import save_content_to_file
+
+BLOCK = np.array([[1.5, np.nan, -3.25],
+                  [4.0, 5.125, np.nan],
+                  [7.5, 8.0, 9.0]])
+FCONTENT = [['Station Name', "êi!@':i*, Qc"],
+            ['Latitude', 45.36],
+            [],
+            ['A', 'B', 'C'],
+            BLOCK,
+            ['Year', 'Value'],
+            pd.DataFrame({'Year': [2000, 2001], 'Value': [np.nan, 2.5]})]
+EXPECTED = [['Station Name', "êi!@':i*, Qc"],
+            ['Latitude', 45.36],
+            [],
+            ['A', 'B', 'C'],
+            [1.5, 'nan', -3.25],
+            [4.0, 5.125, 'nan'],
+            [7.5, 8.0, 9.0],
+            ['Year', 'Value'],
+            [2000, 'nan'],
+            [2001, 2.5]]
+
+
+# ---- Tests
+@pytest.mark.parametrize("ext", ['.csv', '.tsv'])
+def test_save_content_to_csv(tmp_path, ext, mocker):
+    """
+    Test that rows and blocks of data are saved as expected in csv and tsv
+    files when the blocks are written in chunks.
+    """
+    mocker.patch.object(utils, 'CHUNKSIZE', 2)
+    filename = osp.join(str(tmp_path), 'content' + ext)
+    save_content_to_file(filename, FCONTENT)
+
+    with open(filename, 'r', encoding='utf8') as csvfile:
+        rows = list(csv.reader(
+            csvfile, delimiter='\t' if ext == '.tsv' else ','))
+    assert rows == [[str(x) for x in row] for row in EXPECTED]
+
+
+@pytest.mark.parametrize("ext", ['.xls', '.xlsx'])
+def test_save_content_to_excel(tmp_path, ext, mocker):
+    """
+    Test that rows and blocks of data are saved as expected in Excel files
+    when the blocks are written in chunks.
+    """
+    mocker.patch.object(utils, 'CHUNKSIZE', 2)
+    filename = osp.join(str(tmp_path), 'content' + ext)
+    save_content_to_file(filename, FCONTENT)
+
+    sheet = xlrd.open_workbook(filename).sheet_by_index(0)
+    assert sheet.nrows == len(EXPECTED)
+    for i, row in enumerate(EXPECTED):
+        assert sheet.row_values(i)[:len(row)] == row
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', __file__, '-v', '-rw'])
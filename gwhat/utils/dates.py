@@ -12,12 +12,20 @@
 import h5py
 import numpy as np
 import pandas as pd
-import xlrd
 from xlrd import xldate_as_tuple
-from xlrd.xldate import xldate_as_datetime
 from PyQt5.QtCore import QDate, QDateTime
 
 
+# Excel numerical dates in the 1900 date system are counted in days from
+# 1899-12-30 for dates after 1900-03-01 and from 1899-12-31 for earlier
+# dates, because Excel wrongly considers 1900 to be a leap year.
+XLDATE_ORIGIN = np.datetime64('1899-12-30', 'ns').astype('int64')
+XLDATE_LEAP_BUG = 60
+NS_PER_DAY = 86400 * 10**9
+NS_PER_MS = 10**6
+NAT = np.iinfo('int64').min
+
+
 def format_time_data(self, timedata):
     """
     Format a numpy array containing time data, either in a string or Excel
@@ -37,32 +45,45 @@ def format_time_data(self, timedata):
         except ValueError:
             print('WARNING: the dates are not formatted correctly.')
     else:
-        try:
-            # Try converting the Excel numeric dates to pandas
-            # datetime objects.
-            datetimes = pd.to_datetime(datetimes.apply(
-                lambda date: xlrd.xldate.xldate_as_datetime(date, 0)))
-        except Exception:
-            print('Warning: the dates are not formatted correctly.')
+        datetimes = xldates_to_datetimeindex(timedata)
     return datetimes
 
 
 def datetimeindex_to_xldates(datetimeindex):
     """
     Convert a datetime index to a numpy array of Excel numerical date format.
+
+    The conversion is done with integer arithmetic on the nanoseconds
+    elapsed since the origin of the Excel numerical dates. Missing dates
+    are converted to nan.
     """
-    timedeltas = datetimeindex - xldate_as_datetime(4000, 0)
-    xldates = timedeltas.total_seconds() / (3600 * 24) + 4000
-    return xldates.values
+    nanosecs = pd.DatetimeIndex(datetimeindex).asi8
+    xldates = (nanosecs - XLDATE_ORIGIN) / NS_PER_DAY
+    xldates[nanosecs == NAT] = np.nan
+    return xldates
 
 
 def xldates_to_datetimeindex(xldates):
     """
     Format a list or numpy array of Excel numeric dates into a
     pandas datetime index.
+
+    The dates are rounded to the millisecond, as is done by xlrd, and the
+    conversion is done with integer arithmetic on the nanoseconds elapsed
+    since the origin of the Excel numerical dates. Nan values are
+    converted to NaT.
     """
-    return pd.to_datetime(
-        [xlrd.xldate.xldate_as_datetime(xldate, 0) for xldate in xldates])
+    xldates = np.asarray(xldates, dtype='float64')
+    isnan = np.isnan(xldates)
+    xldates = np.where(isnan, 0, xldates)
+
+    days = np.trunc(xldates)
+    millisecs = np.round((xldates - days) * 86400000)
+    nanosecs = (XLDATE_ORIGIN + days.astype('int64') * NS_PER_DAY +
+                millisecs.astype('int64') * NS_PER_MS)
+    nanosecs[xldates < XLDATE_LEAP_BUG] += NS_PER_DAY
+    nanosecs[isnan] = NAT
+    return pd.DatetimeIndex(nanosecs)
 
 
 def xldates_to_strftimes(xldates):
@@ -61,3 +61,67 @@ def nan_as_text_tolist(arr):
     else:
         list_ = arr.tolist()
     return list_
+
+
+def minmax_downsample(x, y, xmin, xmax, npixels):
+    """
+    Return the indexes of the points of the time series x and y that need to
+    be plotted to render faithfully the data comprised between xmin and xmax
+    on npixels pixel columns.
+
+    For each pixel column, only the first, last, minimum and maximum values
+    are kept, as well as the first nan value if any, so that gaps in the data
+    are preserved. The point just before and just after the range are also
+    kept, so that the lines are drawn up to the edges of the axes. All the
+    points within the range are returned if there is not enough of them to
+    benefit from the downsampling. The values of x must be sorted in
+    ascending order.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    if len(x) == 0:
+        return np.array([], dtype=int)
+    if np.any(np.diff(x) < 0):
+        return np.arange(len(x))
+
+    istart = max(np.searchsorted(x, xmin, side='left') - 1, 0)
+    iend = min(np.searchsorted(x, xmax, side='right') + 1, len(x))
+    npixels = max(int(npixels), 1)
+    if iend - istart <= 4 * npixels or xmax <= xmin:
+        return np.arange(istart, iend)
+
+    # Assign each point to a pixel column. The points that are outside of
+    # the range are assigned to their own column on each side.
+    xs = x[istart:iend]
+    ys = y[istart:iend]
+    columns = np.floor((xs - xmin) / (xmax - xmin) * npixels).astype(int)
+    columns = np.clip(columns, -1, npixels)
+
+    # Since x is sorted, the points of a same column are contiguous.
+    starts = np.flatnonzero(np.r_[True, columns[1:] != columns[:-1]])
+    ends = np.r_[starts[1:], len(columns)] - 1
+
+    isnan = np.isnan(ys)
+    imin = np.lexsort((np.where(isnan, np.inf, ys), columns))[starts]
+    imax = np.lexsort((np.where(isnan, np.inf, -ys), columns))[starts]
+    inan = np.lexsort((~isnan, columns))[starts]
+
+    indexes = np.unique(np.hstack(
+        (starts, ends, imin[~isnan[imin]], imax[~isnan[imax]],
+         inan[isnan[inan]])))
+    return indexes + istart
+
+
+def find_index_ranges(indexes, maxgap=0):
+    """
+    Return the list of the (start, stop) ranges that cover the sorted
+    indexes. Consecutive ranges that are separated by maxgap indexes or
+    less are merged together.
+    """
+    indexes = np.asarray(indexes, dtype=int)
+    if len(indexes) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(indexes) > maxgap + 1)
+    starts = indexes[np.r_[0, breaks + 1]]
+    stops = indexes[np.r_[breaks, len(indexes) - 1]] + 1
+    return list(zip(starts.tolist(), stops.tolist()))
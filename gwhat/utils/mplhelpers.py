@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © 2014-2018 GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""Matplotlib utilities"""
+
+# ---- Standard library imports
+from contextlib import contextmanager
+import os.path as osp
+
+# ---- Third party imports
+from matplotlib.collections import Collection
+from matplotlib.lines import Line2D
+
+VECTOR_FORMATS = ['.pdf', '.svg', '.svgz', '.eps', '.ps']
+
+
+def is_vector_format(fname):
+    """Return whether fname is a file in a vector graphics format."""
+    return osp.splitext(fname)[1].lower() in VECTOR_FORMATS
+
+
+def count_artist_vertices(artist):
+    """Return the number of vertices of a line or a collection."""
+    if isinstance(artist, Line2D):
+        return len(artist.get_xdata())
+    elif isinstance(artist, Collection):
+        return sum(len(path.vertices) for path in artist.get_paths())
+    else:
+        return 0
+
+
+def find_dense_artists(figure, min_vertices=1000):
+    """
+    Return the lines and collections of the figure that have at least
+    min_vertices vertices.
+    """
+    return [artist for artist in figure.findobj(
+            lambda obj: isinstance(obj, (Line2D, Collection))) if
+            count_artist_vertices(artist) >= min_vertices]
+
+
+@contextmanager
+def rasterized_dense_artists(figure, min_vertices=1000):
+    """
+    A context manager to temporarily rasterize the dense lines and
+    collections of a figure, so that they are saved as images when the
+    figure is saved in a vector format. The axes, texts and legends are
+    still saved as vectors.
+    """
+    artists = find_dense_artists(figure, min_vertices)
+    rasterized = [artist.get_rasterized() for artist in artists]
+    for artist in artists:
+        artist.set_rasterized(True)
+    try:
+        yield artists
+    finally:
+        for artist, value in zip(artists, rasterized):
+            artist.set_rasterized(value)
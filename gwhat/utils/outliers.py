@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+Detection of the spikes, flat lines and steps in time series, such as
+those produced by faulty water level loggers.
+
+The nan values of the time series are ignored, so that the windows and
+run lengths are expressed in number of valid values. The rolling medians
+are calculated with pandas in O(n log w), where w is the size of the
+window.
+"""
+
+# ---- Third party imports
+import numpy as np
+import pandas as pd
+
+# The factor to scale the median absolute deviation to the standard
+# deviation of normally distributed data.
+MAD_SCALE = 1.4826
+
+
+def _rolling_median(x, window, center=False):
+    """Return the rolling median of x with the specified window size."""
+    return (pd.Series(x)
+            .rolling(window, center=center, min_periods=1)
+            .median()
+            .values)
+
+
+def _resolution(x):
+    """
+    Return the smallest change between consecutive values of x, which is
+    the resolution of the data for a time series recorded by a logger.
+    """
+    changes = np.abs(np.diff(x))
+    changes = changes[changes > 0]
+    return np.min(changes) if len(changes) else 0
+
+
+def find_spikes(values, window=25, threshold=6, min_amplitude=None):
+    """
+    Return the indexes of the values that deviate from the centered rolling
+    median of the time series by more than threshold times the scale of
+    the variations of the time series, and by more than min_amplitude.
+
+    The scale of the variations is the rolling median absolute deviation,
+    which is floored to the median absolute change between consecutive
+    values of the whole time series and to the resolution of the data, so
+    that the turning points of trending or quantized data are not taken
+    for spikes. If min_amplitude is None, it is taken as twice the
+    resolution of the data.
+    """
+    values = np.asarray(values, dtype=float)
+    valid = np.flatnonzero(~np.isnan(values))
+    x = values[valid]
+    if len(x) < 2:
+        return np.array([], dtype=int)
+
+    resolution = _resolution(x)
+    if min_amplitude is None:
+        min_amplitude = 2 * resolution
+
+    deviation = np.abs(x - _rolling_median(x, window, center=True))
+    mad = MAD_SCALE * np.maximum(
+        _rolling_median(deviation, window, center=True),
+        max(np.median(np.abs(np.diff(x))), resolution))
+    isspike = (deviation > threshold * mad) & (deviation > min_amplitude)
+    return valid[isspike]
+
+
+def find_flatlines(values, min_length=24, resolution=None):
+    """
+    Return the indexes of the values that repeat the previous value of the
+    time series within runs of at least min_length identical values. The
+    first value of each run is not included.
+
+    Only the runs that are left with a change larger than the resolution
+    of the data, as when a stuck logger catches up with the water levels,
+    are flagged, so that the plateaus of slowly varying data that are
+    quantized by the resolution of the logger are not flagged. The last
+    run of the time series is flagged if it is entered with such a change
+    instead, and a time series that is a single run, as when a logger is
+    stuck for the whole record, is flagged. If resolution is None, it is
+    taken as the smallest change between consecutive values of the time
+    series.
+    """
+    values = np.asarray(values, dtype=float)
+    valid = np.flatnonzero(~np.isnan(values))
+    x = values[valid]
+    if len(x) < 2:
+        return np.array([], dtype=int)
+
+    # Find the runs of identical consecutive values.
+    isstart = np.r_[True, x[1:] != x[:-1]]
+    starts = np.flatnonzero(isstart)
+    lengths = np.diff(np.r_[starts, len(x)])
+    runs = np.cumsum(isstart) - 1
+
+    # Find the runs that are left with a change larger than the resolution.
+    # A tolerance is used to account for the rounding errors of the values.
+    if len(starts) == 1:
+        isbigjump = np.array([True])
+    else:
+        jumps = np.abs(np.diff(x[starts]))
+        if resolution is None:
+            resolution = _resolution(x)
+        isbigjump = np.r_[jumps, jumps[-1]] > 1.5 * resolution
+
+    isflat = ((lengths >= min_length) & isbigjump)[runs] & ~isstart
+    return valid[isflat]
+
+
+def find_steps(values, window=12, threshold=0.1):
+    """
+    Return the indexes of the values where the time series abruptly shifts
+    to a new level. These are the values that differ from the previous
+    value by more than threshold, while the median of the window values
+    that start at these values differs from the median of the window values
+    that precede them by more than threshold in the same direction.
+
+    Note that the sharp rises of the water levels that are caused by
+    recharge events are also found by this method, so the steps should be
+    reviewed before the data are corrected.
+    """
+    values = np.asarray(values, dtype=float)
+    valid = np.flatnonzero(~np.isnan(values))
+    x = values[valid]
+    if len(x) < 2:
+        return np.array([], dtype=int)
+
+    # The medians of the windows that start at each value are those of the
+    # trailing windows that end window - 1 values later, except at the end
+    # of the series where the windows are truncated.
+    trailing_median = _rolling_median(x, window)
+    median_before = np.r_[np.nan, trailing_median[:-1]]
+    tail = x[max(len(x) - window + 1, 0):]
+    median_after = np.r_[trailing_median[window - 1:],
+                         _rolling_median(tail[::-1], window)[::-1]]
+    shift = median_after - median_before
+    jump = np.r_[np.nan, np.diff(x)]
+    with np.errstate(invalid='ignore'):
+        isstep = ((np.abs(jump) > threshold) &
+                  (np.abs(shift) > threshold) &
+                  (np.sign(jump) == np.sign(shift)))
+    return valid[isstep]
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+# -----------------------------------------------------------------------------
+
+"""
+A binary cache for the datasets that were parsed and post-processed from
+input data files.
+
+The cached content of a data file is keyed by the path, the modification
+time and the size of the file, and of the other files its content depends
+on, so that it is automatically invalidated when any of them is modified.
+The cache is opt-in and disabled by default. It can be enabled with the
+'enabled' option of the 'parse_cache' section of the configs.
+"""
+
+# ---- Standard imports
+from glob import glob
+import hashlib
+import os
+import os.path as osp
+import pickle
+
+# ---- Local imports
+from gwhat import __namever__
+from gwhat.config.main import CONF, CONFIG_DIR
+
+CACHE_DIR = osp.join(CONFIG_DIR, 'parse_cache')
+
+
+def is_parse_cache_enabled():
+    """Return whether the parse cache is enabled in the configs."""
+    return bool(CONF.get('parse_cache', 'enabled', False))
+
+
+def get_cache_filename(kind, filename, dependencies=(), cachedir=None):
+    """
+    Return the path of the cache file for the content of filename parsed
+    as kind. The name of the cache file changes whenever filename or one of
+    its dependencies is modified.
+    """
+    cachedir = CACHE_DIR if cachedir is None else cachedir
+    filename = osp.abspath(filename)
+    signature = [kind, __namever__]
+    for fname in (filename,) + tuple(dependencies):
+        if osp.exists(fname):
+            stat = os.stat(fname)
+            signature.append((osp.abspath(fname), stat.st_mtime_ns,
+                              stat.st_size))
+        else:
+            signature.append((osp.abspath(fname), None, None))
+    prefix = hashlib.sha1(
+        (kind + filename).encode('utf-8')).hexdigest()[:16]
+    suffix = hashlib.sha1(repr(signature).encode('utf-8')).hexdigest()[:16]
+    return osp.join(cachedir, '{}_{}.pkl'.format(prefix, suffix))
+
+
+def load_from_parse_cache(kind, filename, dependencies=(),
+                          cachedir=None):
+    """
+    Return the cached content of filename parsed as kind or None if it is
+    not in the cache.
+    """
+    cachefile = get_cache_filename(kind, filename, dependencies, cachedir)
+    if not osp.exists(cachefile):
+        return None
+    try:
+        with open(cachefile, 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:
+        print('Failed to read "{}" from the cache: {}'.format(
+            osp.basename(filename), e))
+        return None
+
+
+def save_to_parse_cache(kind, filename, content, dependencies=(),
+                        cachedir=None):
+    """
+    Save the content of filename parsed as kind to the cache. The cache
+    files of previous versions of filename are removed.
+    """
+    cachefile = get_cache_filename(kind, filename, dependencies, cachedir)
+    cachedir = osp.dirname(cachefile)
+    prefix = osp.basename(cachefile).split('_')[0]
+    try:
+        if not osp.exists(cachedir):
+            os.makedirs(cachedir)
+        for oldfile in glob(osp.join(cachedir, prefix + '_*.pkl')):
+            os.remove(oldfile)
+        with open(cachefile, 'wb') as f:
+            pickle.dump(content, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        print('Failed to save "{}" to the cache: {}'.format(
+            osp.basename(filename), e))
+
+
+def clear_parse_cache(cachedir=None):
+    """Remove all the files from the parse cache."""
+    cachedir = CACHE_DIR if cachedir is None else cachedir
+    for cachefile in glob(osp.join(cachedir, '*.pkl')):
+        os.remove(cachefile)
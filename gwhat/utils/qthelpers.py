@@ -11,7 +11,7 @@
 
 # ---- Third party imports
 from PyQt5.QtCore import QByteArray
-from PyQt5.QtWidgets import QWidget, QSizePolicy
+from PyQt5.QtWidgets import QInputDialog, QWidget, QSizePolicy
 
 
 def qbytearray_to_hexstate(qba):
@@ -29,3 +29,19 @@ def create_toolbar_stretcher():
     stretcher = QWidget()
     stretcher.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
     return stretcher
+
+
+def get_rasterize_dpi(parent, default=300):
+    """
+    Ask the user for the resolution at which the dense data layers of a
+    figure are rasterized when saving it in the SVG format.
+
+    Return the resolution in dpi, or None to save all the layers as
+    vectors, and whether the user accepted the dialog.
+    """
+    dpi, ok = QInputDialog.getInt(
+        parent, "Save Figure",
+        "Resolution of the rasterized data layers in dpi\n"
+        "(0 to save all the layers as vectors):",
+        default, 0, 2400)
+    return (dpi or None), ok
@@ -10,10 +10,14 @@
 import os
 
 # ---- Third party imports
+import numpy as np
+import pandas as pd
 import pytest
+from xlrd.xldate import xldate_as_datetime
 
 # ---- Local imports
-from gwhat.utils.dates import qdate_from_xldate
+from gwhat.utils.dates import (
+    qdate_from_xldate, xldates_to_datetimeindex, datetimeindex_to_xldates)
 
 
 # ---- Tests
@@ -29,5 +33,38 @@ def test_qdate_from_xldate():
         assert qdate.year() == 2017
 
 
+def test_xldates_to_datetimeindex():
+    """
+    Assert that the vectorized conversion of numerical Excel dates to a
+    datetime index gives the same results as xlrd, including for the dates
+    before 1900-03-01, and that nan values are converted to NaT.
+    """
+    xldates = np.hstack([
+        [0, 1, 59, 59.5, 60, 61, 43000.87, 43000.999999999],
+        np.random.rand(1000) * 60000])
+    expected = pd.to_datetime(
+        [xldate_as_datetime(xldate, 0) for xldate in xldates])
+    assert xldates_to_datetimeindex(xldates).equals(expected)
+
+    datetimes = xldates_to_datetimeindex([np.nan, 43000.5])
+    assert pd.isnull(datetimes[0])
+    assert datetimes[1] == pd.Timestamp('2017-09-22 12:00:00')
+
+
+def test_datetimeindex_to_xldates():
+    """
+    Assert that the vectorized conversion of a datetime index to numerical
+    Excel dates is working as expected.
+    """
+    datetimes = pd.DatetimeIndex(
+        ['2017-09-22 12:00:00', None, '2000-01-01 06:00:00'])
+    xldates = datetimeindex_to_xldates(datetimes)
+    np.testing.assert_array_equal(xldates, [43000.5, np.nan, 36526.25])
+
+    datetimes = pd.date_range('2000-01-01', periods=1000, freq='15min')
+    assert xldates_to_datetimeindex(
+        datetimeindex_to_xldates(datetimes)).equals(datetimes)
+
+
 if __name__ == "__main__":
     pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+import os
+
+# ---- Third party imports
+import numpy as np
+import pytest
+
+# ---- Local imports
+from gwhat.utils.math import find_index_ranges, minmax_downsample
+
+
+# ---- Tests
+def test_minmax_downsample():
+    """
+    Assert that the min-max downsampling of a time series is working as
+    expected.
+    """
+    x = np.arange(100000) / 96
+    y = np.sin(x / 50) + np.random.RandomState(0).normal(0, 0.1, len(x))
+    y[20000:20100] = np.nan
+
+    indexes = minmax_downsample(x, y, 100, 900, 500)
+    assert len(indexes) <= 5 * 502
+    assert np.all(np.diff(indexes) > 0)
+
+    # Assert that the range is covered up to the edges of the axes.
+    assert x[indexes[0]] < 100 and x[indexes[-1]] > 900
+
+    # Assert that the extremums and the gap in the data are preserved.
+    inrange = np.where((x >= 100) & (x <= 900))[0]
+    assert np.nanmax(y[indexes]) == np.nanmax(y[inrange])
+    assert np.nanmin(y[indexes]) == np.nanmin(y[inrange])
+    assert np.any(np.isnan(y[indexes]))
+
+    # Assert that all the data are returned when there is only a few
+    # points in the range.
+    indexes = minmax_downsample(x, y, 100, 110, 500)
+    assert np.array_equal(
+        indexes, np.arange(np.where(x >= 100)[0][0] - 1,
+                           np.where(x <= 110)[0][-1] + 2))
+
+
+def test_find_index_ranges():
+    """
+    Assert that the ranges covering a set of sorted indexes are found
+    as expected.
+    """
+    assert find_index_ranges([]) == []
+    indexes = [2, 3, 4, 8, 10, 11, 20]
+    assert find_index_ranges(indexes) == [(2, 5), (8, 9), (10, 12), (20, 21)]
+    assert find_index_ranges(indexes, maxgap=3) == [(2, 12), (20, 21)]
+    assert find_index_ranges(indexes, maxgap=10) == [(2, 21)]
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
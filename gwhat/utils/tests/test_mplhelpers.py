@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+import os
+import os.path as osp
+
+# ---- Third party imports
+import numpy as np
+import pytest
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# ---- Local imports
+from gwhat.utils.mplhelpers import (
+    find_dense_artists, is_vector_format, rasterized_dense_artists)
+
+
+# ---- Tests
+def test_rasterized_dense_artists(tmp_path):
+    """
+    Assert that only the dense artists of a figure are rasterized when
+    saving it in a vector format and that they are restored afterwards.
+    """
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111)
+    x = np.arange(50000)
+    dense_line, = ax.plot(x, np.sin(x / 1000))
+    sparse_line, = ax.plot([0, 50000], [0, 1])
+    dense_fill = ax.fill_between(x, 0, np.cos(x / 1000))
+
+    dense_artists = find_dense_artists(figure)
+    assert dense_line in dense_artists
+    assert dense_fill in dense_artists
+    assert sparse_line not in dense_artists
+
+    assert is_vector_format('figure.PDF')
+    assert is_vector_format('figure.svg')
+    assert not is_vector_format('figure.png')
+
+    fname = osp.join(tmp_path, 'figure.svg')
+    figure.savefig(fname)
+    vector_size = os.path.getsize(fname)
+    with rasterized_dense_artists(figure):
+        assert dense_line.get_rasterized()
+        assert dense_fill.get_rasterized()
+        assert not sparse_line.get_rasterized()
+        figure.savefig(fname, dpi=100)
+    assert os.path.getsize(fname) < vector_size / 2
+    assert not dense_line.get_rasterized()
+    assert not dense_fill.get_rasterized()
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', __file__, '-v', '-rw'])
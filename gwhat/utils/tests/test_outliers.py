@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+import os
+
+# ---- Third party imports
+import numpy as np
+import pytest
+
+# ---- Local imports
+from gwhat.utils.outliers import find_flatlines, find_spikes, find_steps
+
+
+# ---- Pytest Fixtures
+@pytest.fixture
+def waterlevels():
+    time = np.arange(5000) / 24
+    return (3 + 0.5 * np.sin(2 * np.pi * time / 365) +
+            np.random.RandomState(0).normal(0, 0.002, len(time)))
+
+
+# ---- Tests
+def test_find_spikes(waterlevels):
+    """
+    Assert that the spikes of a time series are found as expected and that
+    nan values are ignored.
+    """
+    waterlevels[[100, 2000, 2001, 4999]] += [1.5, -0.8, -0.8, 2]
+    waterlevels[1000:1010] = np.nan
+    waterlevels[1010] -= 0.5
+    np.testing.assert_array_equal(
+        find_spikes(waterlevels), [100, 1010, 2000, 2001, 4999])
+    assert len(find_spikes(np.full(100, np.nan))) == 0
+
+
+def test_find_flatlines(waterlevels):
+    """
+    Assert that the flat lines of a time series are found as expected.
+    """
+    waterlevels[500:530] = waterlevels[500]
+    waterlevels[1000:1010] = waterlevels[1000]
+    waterlevels[3000:3040] = waterlevels[3000]
+    waterlevels[3020] = np.nan
+    np.testing.assert_array_equal(
+        find_flatlines(waterlevels),
+        np.r_[501:530, 3001:3020, 3021:3040])
+    np.testing.assert_array_equal(
+        find_flatlines(waterlevels, min_length=5),
+        np.r_[501:530, 1001:1010, 3001:3020, 3021:3040])
+
+
+def test_find_flatlines_in_stuck_record():
+    """
+    Assert that a time series that is a single flat line, as when a logger
+    is stuck for the whole record, is flagged.
+    """
+    waterlevels = np.full(100, 3.5)
+    waterlevels[50] = np.nan
+    np.testing.assert_array_equal(
+        find_flatlines(waterlevels), np.r_[1:50, 51:100])
+    assert len(find_flatlines(waterlevels, min_length=100)) == 0
+
+
+def test_find_flatlines_in_quantized_data():
+    """
+    Assert that the plateaus of slowly varying data that are quantized by
+    the resolution of the logger are not taken for flat lines.
+    """
+    # Hourly water levels that drift by 2 mm per day and that are
+    # recorded with a resolution of 1 cm.
+    time = np.arange(2000) / 24
+    waterlevels = np.round((5 - 0.002 * time) / 0.01) * 0.01
+    assert len(find_flatlines(waterlevels)) == 0
+
+    # The logger gets stuck for 30 days from the start of a plateau.
+    i = np.flatnonzero(np.diff(waterlevels))[3] + 1
+    waterlevels[i:i + 720] = waterlevels[i]
+    np.testing.assert_array_equal(
+        find_flatlines(waterlevels), np.r_[i + 1:i + 720])
+    np.testing.assert_array_equal(
+        find_flatlines(waterlevels, resolution=0.1), [])
+
+
+def test_find_outliers_in_recharge_event():
+    """
+    Assert that the sharp rise of the water levels caused by a recharge
+    event, followed by a slow recession, is not taken for a spike or a
+    flat line, but is reported as a step to be reviewed.
+    """
+    time = np.arange(2000)
+    waterlevels = (5 - 0.0001 * time +
+                   np.random.RandomState(0).normal(0, 0.002, len(time)))
+    waterlevels[1000:] += 0.25 * np.exp(-(time[1000:] - 1000) / 300)
+    assert len(find_spikes(waterlevels)) == 0
+    assert len(find_flatlines(waterlevels)) == 0
+    np.testing.assert_array_equal(find_steps(waterlevels), [1000])
+
+
+def test_find_steps(waterlevels):
+    """
+    Assert that the abrupt shifts of the level of a time series are found
+    and that the spikes are not taken for steps.
+    """
+    waterlevels[1500:] += 0.4
+    waterlevels[3000:] -= 0.25
+    waterlevels[4000] += 1
+    np.testing.assert_array_equal(find_steps(waterlevels), [1500, 3000])
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+# Copyright © GWHAT Project Contributors
+# https://github.com/jnsebgosselin/gwhat
+#
+# This file is part of GWHAT (Ground-Water Hydrograph Analysis Toolbox).
+# Licensed under the terms of the GNU General Public License.
+
+# ---- Standard imports
+import os
+import os.path as osp
+import shutil
+
+# ---- Third party imports
+import numpy as np
+import pytest
+
+# ---- Local imports
+from gwhat import __rootdir__
+import gwhat.utils.parsecache as parsecache
+import gwhat.meteo.weather_reader as weather_reader
+import gwhat.projet.reader_waterlvl as reader_waterlvl
+from gwhat.meteo.weather_reader import WXDataFrame
+from gwhat.projet.reader_waterlvl import WLDataFrame
+
+DATADIR = osp.join(__rootdir__, 'tests', 'data')
+
+
+# ---- Pytest Fixtures
+@pytest.fixture
+def cachedir(tmp_path, monkeypatch):
+    cachedir = osp.join(tmp_path, 'parse_cache')
+    monkeypatch.setattr(parsecache, 'CACHE_DIR', cachedir)
+    return cachedir
+
+
+# ---- Tests
+def test_weather_parse_cache(cachedir, tmp_path, mocker):
+    """
+    Assert that the weather data are read from the parse cache and that
+    the cache is invalidated when the data file or the log file change.
+    """
+    for ext in ['.out', '.log']:
+        shutil.copyfile(
+            osp.join(DATADIR, "MARIEVILLE (7024627)_2000-2015" + ext),
+            osp.join(tmp_path, "MARIEVILLE" + ext))
+    filename = osp.join(tmp_path, "MARIEVILLE.out")
+    spy = mocker.spy(weather_reader, 'read_weather_datafile')
+
+    expected = WXDataFrame(filename, use_cache=False)
+    assert spy.call_count == 1
+    wxdset = WXDataFrame(filename, use_cache=True)
+    assert spy.call_count == 2
+    assert len(os.listdir(cachedir)) == 1
+
+    # The data should now be read from the cache.
+    wxdset = WXDataFrame(filename, use_cache=True)
+    assert spy.call_count == 2
+    assert wxdset.metadata == expected.metadata
+    assert wxdset.data.equals(expected.data)
+    for var, indexes in expected.missing_value_indexes.items():
+        assert wxdset.missing_value_indexes[var].equals(indexes)
+
+    # Modify the log file. The data should be read again from the file and
+    # the old cache file should be removed.
+    logfile = osp.join(tmp_path, "MARIEVILLE.log")
+    mtime_ns = os.stat(logfile).st_mtime_ns + 10**9
+    os.utime(logfile, ns=(mtime_ns, mtime_ns))
+    wxdset = WXDataFrame(filename, use_cache=True)
+    assert spy.call_count == 3
+    assert len(os.listdir(cachedir)) == 1
+
+
+def test_water_level_parse_cache(cachedir, mocker):
+    """
+    Assert that the water level data and metadata are read from the parse
+    cache as expected.
+    """
+    filename = osp.join(DATADIR, 'sample_water_level_datafile.csv')
+    spy = mocker.spy(reader_waterlvl, 'read_water_level_datafile')
+
+    expected = WLDataFrame(filename, use_cache=True)
+    wldset = WLDataFrame(filename, use_cache=True)
+    assert spy.call_count == 1
+    for key in ['Well', 'Well ID', 'Latitude', 'Longitude', 'Elevation',
+                'Municipality', 'Province', 'filename']:
+        assert wldset[key] == expected[key]
+    assert np.array_equal(wldset.xldates, expected.xldates)
+    np.testing.assert_array_equal(wldset['WL'], expected['WL'])
+
+    parsecache.clear_parse_cache()
+    assert len(os.listdir(cachedir)) == 0
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', __file__, '-v', '-rw'])